@@ -1,11 +1,21 @@
 import streamlit as st
-import json
-from datetime import datetime
-from abc import ABC, abstractmethod
+import cProfile
+import functools
+import io
+import itertools
+from collections import OrderedDict
+from datetime import date
+import math
 import os
-import pandas as pd
+import pstats
+import threading
 from pathlib import Path
 
+from inventory_core import (
+    Clothing, DuplicateProductError, Electronics, Field, Grocery, IMPORT_CHUNK_SIZE, IMPORT_WORKERS,
+    InvalidDataError, PERF, PICKER_LIMIT, ProductNotFoundError, SharedInventory, create_inventory,
+)
+
 
 # Set page configuration
 st.set_page_config(
@@ -17,6 +27,26 @@ st.set_page_config(
 # Constants
 SELECT_PRODUCT_LABEL = "Select Product"
 DEFAULT_FILENAME = Path("C:/Users/WWW.SZLAIWIIT.COM/Downloads/inventory.json")
+FILENAME_HELP = "Use a .jsonl extension for newline-delimited JSON (one product per line), or .invsnap for a binary snapshot."
+JOURNAL_HELP = "Loads the file, replays its .log journal, then records every change in the journal until compacted."
+IMPORT_HELP = ("A .csv or .parquet file with columns type, product_id, name, price, quantity_in_stock, plus "
+               "warranty_years and brand (Electronics), expiry_date (Grocery), size and material (Clothing), "
+               "and optionally reorder_point.")
+WAREHOUSE_HELP = ("One saved inventory file per line, as warehouse=path or just a path (named after the file). "
+                  "Replaces the current inventory with all of them merged.")
+MERGE_POLICY_LABELS = {"Stop with an error": "raise", "Add up their stock": "sum", "Keep the last file's": "last"}
+REORDER_HELP = "Raise an alert when stock falls to this level or below. Leave empty for no alerts."
+REORDER_TABLE_ROWS = 250
+REORDER_TOASTS = 5
+SALES_PERIODS = {"7 days": 7, "30 days": 30, "90 days": 90, "12 months": None}  # None: monthly
+SALES_TOP = 10
+ADVANCED_RESULTS = 100  # products listed by Advanced Search
+PROFILE_LINES = 40  # lines of the cProfile report kept for the Performance page
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+TABLE_SORT_OPTIONS = {"Added": None, "ID": "product_id", "Name": "name", "Type": "type", "Price": "price",
+                      "Stock": "quantity_in_stock", "Value": "value"}
+ROW_CACHE_SIZE = 5000
+DASHBOARD_MEMO_SIZE = 256
 METRIC_CARD_START = '<div class="metric-card">'
 METRIC_CARD_END = '</div>'
 # Define constant at top of your file
@@ -124,242 +154,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Abstract Base Class: Product
-class Product(ABC):
-    def __init__(self, product_id, name, price, quantity_in_stock):
-        self._product_id = product_id
-        self._name = name
-        self._price = price
-        self._quantity_in_stock = quantity_in_stock
-    
-    def restock(self, amount):
-        if amount > 0:
-            self._quantity_in_stock += amount
-            return True
-        return False
-    
-    def sell(self, quantity):
-        if quantity <= self._quantity_in_stock and quantity > 0:
-            self._quantity_in_stock -= quantity
-            return True
-        return False
-    
-    def get_total_value(self):
-        return self._price * self._quantity_in_stock
-    
-    @abstractmethod
-    def __str__(self):
-        pass
-    
-    def to_dict(self):
-        return {
-            "type": self.__class__.__name__,
-            "product_id": self._product_id,
-            "name": self._name,
-            "price": self._price,
-            "quantity_in_stock": self._quantity_in_stock
-        }
-
-# Subclass: Electronics
-class Electronics(Product):
-    def __init__(self, product_id, name, price, quantity_in_stock, warranty_years, brand):
-        super().__init__(product_id, name, price, quantity_in_stock)
-        self._warranty_years = warranty_years
-        self._brand = brand
-    
-    def __str__(self):
-        return f"Electronics: {self._name} ({self._brand}), Rs.{self._price}, Stock: {self._quantity_in_stock}, Warranty: {self._warranty_years} yrs"
-    
-    def to_dict(self):
-        data = super().to_dict()
-        data.update({
-            "warranty_years": self._warranty_years,
-            "brand": self._brand
-        })
-        return data
-
-# Subclass: Grocery
-class Grocery(Product):
-    def __init__(self, product_id, name, price, quantity_in_stock, expiry_date):
-        super().__init__(product_id, name, price, quantity_in_stock)
-        self._expiry_date = expiry_date
-    
-    def is_expired(self):
-        today = datetime.today().date()
-        expiry = datetime.strptime(self._expiry_date, "%Y-%m-%d").date()
-        return today > expiry
-    
-    def __str__(self):
-        status = " (Expired)" if self.is_expired() else ""
-        return f"Grocery: {self._name}, Rs.{self._price}, Stock: {self._quantity_in_stock}, Expiry: {self._expiry_date}{status}"
-    
-    def to_dict(self):
-        data = super().to_dict()
-        data.update({
-            "expiry_date": self._expiry_date
-        })
-        return data
-
-# Subclass: Clothing
-class Clothing(Product):
-    def __init__(self, product_id, name, price, quantity_in_stock, size, material):
-        super().__init__(product_id, name, price, quantity_in_stock)
-        self._size = size
-        self._material = material
-    
-    def __str__(self):
-        return f"Clothing: {self._name}, Rs.{self._price}, Stock: {self._quantity_in_stock}, Size: {self._size}, Material: {self._material}"
-    
-    def to_dict(self):
-        data = super().to_dict()
-        data.update({
-            "size": self._size,
-            "material": self._material
-        })
-        return data
-
-# Custom Exceptions
-class InsufficientStockError(Exception):
-    pass
-
-class DuplicateProductError(Exception):
-    pass
-
-class InvalidDataError(Exception):
-    pass
-
-# Inventory Class
-class Inventory:
-    def __init__(self):
-        self._products = {}
-    
-    def add_product(self, product):
-        if product._product_id in self._products:
-            raise DuplicateProductError(f"Product with ID {product._product_id} already exists")
-        self._products[product._product_id] = product
-    
-    def remove_product(self, product_id):
-        if product_id in self._products:
-            del self._products[product_id]
-            return True
-        return False
-    
-    def search_by_name(self, name):
-        return [p for p in self._products.values() if name.lower() in p._name.lower()]
-    
-    def search_by_type(self, product_type):
-        return [p for p in self._products.values() if p.__class__.__name__ == product_type]
-    
-    def list_all_products(self):
-        return list(self._products.values())
-    
-    def sell_product(self, product_id, quantity):
-        if product_id not in self._products:
-            return False, "Product not found"
-        
-        product = self._products[product_id]
-        try:
-            if product._quantity_in_stock < quantity:
-                raise InsufficientStockError(f"Not enough stock. Available: {product._quantity_in_stock}")
-            
-            product.sell(quantity)
-            return True, f"Sold {quantity} units of {product._name}"
-        except InsufficientStockError as e:
-            return False, str(e)
-    
-    def restock_product(self, product_id, quantity):
-        if product_id not in self._products:
-            return False, "Product not found"
-        
-        product = self._products[product_id]
-        if quantity <= 0:
-            return False, "Quantity must be positive"
-        
-        product.restock(quantity)
-        return True, f"Restocked {quantity} units of {product._name}"
-    
-    def total_inventory_value(self):
-        return sum(product.get_total_value() for product in self._products.values())
-    
-    def remove_expired_products(self):
-        expired_products = []
-        for pid, product in list(self._products.items()):
-            if isinstance(product, Grocery) and product.is_expired():
-                expired_products.append(product._name)
-                del self._products[pid]
-        return expired_products
-    
-    def save_to_file(self, filename):
-        try:
-            data = [product.to_dict() for product in self._products.values()]
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=4)
-            return True, "Inventory saved successfully"
-        except Exception as e:
-            return False, f"Error saving file: {str(e)}"
-    
-    def load_from_file(self, filename):
-        try:
-            if not os.path.exists(filename):
-                return False, f"File {filename} does not exist"
-            
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            
-            # Clear existing inventory
-            self._products.clear()
-            
-            for item in data:
-                ptype = item["type"]
-                try:
-                    if ptype == "Electronics":
-                        product = Electronics(
-                            item["product_id"],
-                            item["name"],
-                            item["price"],
-                            item["quantity_in_stock"],
-                            item["warranty_years"],
-                            item["brand"]
-                        )
-                    elif ptype == "Grocery":
-                        product = Grocery(
-                            item["product_id"],
-                            item["name"],
-                            item["price"],
-                            item["quantity_in_stock"],
-                            item["expiry_date"]
-                        )
-                    elif ptype == "Clothing":
-                        product = Clothing(
-                            item["product_id"],
-                            item["name"],
-                            item["price"],
-                            item["quantity_in_stock"],
-                            item["size"],
-                            item["material"]
-                        )
-                    else:
-                        raise InvalidDataError(f"Unknown product type: {ptype}")
-                    
-                    self._products[product._product_id] = product
-                except KeyError as e:
-                    raise InvalidDataError(f"Missing required field: {str(e)}")
-            
-            return True, "Inventory loaded successfully"
-        except json.JSONDecodeError:
-            return False, "Invalid JSON file"
-        except InvalidDataError as e:
-            return False, str(e)
-        except Exception as e:
-            return False, f"Error loading file: {str(e)}"
+# Shared inventory: one catalog per server process instead of one copy per browser session
+@st.cache_resource
+def get_shared_inventory():
+    return SharedInventory(create_inventory())
 
 # Initialize session state
 if 'inventory' not in st.session_state:
-    st.session_state.inventory = Inventory()
+    # INVENTORY_SHARED=0 restores one private inventory per session
+    if os.environ.get("INVENTORY_SHARED", "1") != "0":
+        st.session_state.inventory = get_shared_inventory()
+    else:
+        st.session_state.inventory = create_inventory()
 if 'notification' not in st.session_state:
     st.session_state.notification = None
 if 'notification_type' not in st.session_state:
     st.session_state.notification_type = None
+if 'reorder_alert_seen' not in st.session_state:
+    # A new session only hears about alerts raised from now on
+    alerts = st.session_state.inventory.reorder_alerts()
+    st.session_state.reorder_alert_seen = alerts[-1].seq if alerts else 0
 
 # Function to display notification
 def show_notification():
@@ -382,34 +196,98 @@ def set_notification(message, type="info"):
     st.session_state.notification = message
     st.session_state.notification_type = type
 
+def show_reorder_alerts():
+    """Toast the reorder alerts raised since this session last looked, from any session."""
+    alerts = st.session_state.inventory.reorder_alerts(after=st.session_state.reorder_alert_seen)
+    if not alerts:
+        return
+    st.session_state.reorder_alert_seen = alerts[-1].seq
+    for alert in alerts[-REORDER_TOASTS:]:
+        st.toast(f"Reorder {alert.name}: {alert.quantity_in_stock} left (reorder point {alert.reorder_point})",
+                 icon="⚠️")
+    if len(alerts) > REORDER_TOASTS:
+        st.toast(f"{len(alerts) - REORDER_TOASTS} more products need reordering; see the Dashboard", icon="⚠️")
+
 # Helper functions for dashboard
+class VersionMemo:
+    """Results computed from an inventory, reused while its version and today's date stay the same."""
+    
+    def __init__(self, maxsize=DASHBOARD_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, inventory, name, compute, *args):
+        # Read the version first: if the inventory changes mid-compute, the result lands under a stale key
+        key = (inventory._uid, inventory.version(), date.today(), name, args)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        result = compute(inventory, *args)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
+
+def instrumented(func):
+    """Time func into PERF when instrumentation is on; decided on each rerun, as this module re-executes."""
+    return PERF.wrap(func.__name__, func) if PERF.enabled else func
+
+@st.cache_resource
+def get_dashboard_memo():
+    """One memo per server process, so a rerun or page switch reuses the last results."""
+    return VersionMemo()
+
+def memoize_on_version(func):
+    """Memoize func(inventory, *args) until the inventory changes; args must be hashable."""
+    @functools.wraps(func)
+    def memoized(inventory, *args):
+        # Keyed by name: reruns re-execute this module, so the function object itself is new each time
+        return get_dashboard_memo().get(inventory, func.__qualname__, func, *args)
+    return memoized
+
+@memoize_on_version
+def summary_metrics(inventory):
+    """Product count, total inventory value, expired count and the count due for reorder."""
+    return (inventory.product_count(), inventory.total_inventory_value(), inventory.expired_count(),
+            inventory.reorder_count())
+
+@memoize_on_version
+def type_distribution(inventory):
+    """Product count per type, in the order the chart shows them."""
+    return [inventory.count_by_type(ptype) for ptype in ("Electronics", "Grocery", "Clothing")]
+
 def display_summary_metrics(inventory):
     """Display summary metrics in the dashboard."""
-    products = inventory.list_all_products()
-    
-    col1, col2, col3 = st.columns(3)
+    product_count, total_value, expired_count, reorder_count = summary_metrics(inventory)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.markdown(METRIC_CARD_START, unsafe_allow_html=True)
-        st.metric("Total Products", len(products))
+        st.metric("Total Products", product_count)
         st.markdown(METRIC_CARD_END, unsafe_allow_html=True)
     
     with col2:
         st.markdown(METRIC_CARD_START, unsafe_allow_html=True)
-        st.metric("Total Inventory Value", f"Rs. {inventory.total_inventory_value():.2f}")
+        st.metric("Total Inventory Value", f"Rs. {total_value:.2f}")
         st.markdown(METRIC_CARD_END, unsafe_allow_html=True)
     
     with col3:
-        expired_count = len([p for p in products if isinstance(p, Grocery) and p.is_expired()])
         st.markdown(METRIC_CARD_START, unsafe_allow_html=True)
         st.metric("Expired Products", expired_count)
         st.markdown(METRIC_CARD_END, unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown(METRIC_CARD_START, unsafe_allow_html=True)
+        st.metric("Needs Reorder", reorder_count)
+        st.markdown(METRIC_CARD_END, unsafe_allow_html=True)
 
 def display_product_distribution(inventory):
     """Display product type distribution chart."""
-    electronics = len(inventory.search_by_type("Electronics"))
-    grocery = len(inventory.search_by_type("Grocery"))
-    clothing = len(inventory.search_by_type("Clothing"))
+    import pandas as pd  # imported by the pages that draw DataFrames, not at start-up
+    electronics, grocery, clothing = type_distribution(inventory)
     
     st.markdown('<div class="sub-header">Product Distribution</div>', unsafe_allow_html=True)
     
@@ -422,6 +300,48 @@ def display_product_distribution(inventory):
     # Display the chart - fixed column name
     st.bar_chart(chart_data.set_index("Type"))
 
+@memoize_on_version
+def sales_over_time(inventory, days):
+    """(date, units, revenue) per day for the last days days, or per month for the last 12 when days is None."""
+    if days is None:
+        return inventory.sales.monthly()[-12:]
+    return inventory.sales.daily(days)
+
+@memoize_on_version
+def top_sellers(inventory):
+    """Table rows for the products with the most revenue."""
+    rows = []
+    for product_id, units, revenue in inventory.sales.top_products(SALES_TOP):
+        product = inventory.get_product(product_id)
+        rows.append({"ID": product_id, "Name": product._name if product is not None else "(removed)",
+                     "Units Sold": units, "Revenue": f"Rs. {revenue:.2f}"})
+    return rows
+
+def display_sales(inventory):
+    """Revenue and units over time and the best sellers, read from the sales ledger's rollups."""
+    import pandas as pd
+    st.markdown('<div class="sub-header">Sales</div>', unsafe_allow_html=True)
+    
+    if not inventory.sales.top_products(1):
+        st.markdown('<div class="info-box">No sales yet. Sales appear here as they happen.</div>',
+                    unsafe_allow_html=True)
+        return
+    
+    period = st.radio("Period", list(SALES_PERIODS), horizontal=True, key="sales_period")
+    chart_data = pd.DataFrame(sales_over_time(inventory, SALES_PERIODS[period]),
+                              columns=["Date", "Units", "Revenue"]).set_index("Date")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Revenue (Rs.)")
+        st.bar_chart(chart_data["Revenue"])
+    with col2:
+        st.caption("Units sold")
+        st.bar_chart(chart_data["Units"])
+    
+    st.caption(f"Top {SALES_TOP} products by revenue")
+    st.dataframe(pd.DataFrame(top_sellers(inventory)), use_container_width=True, hide_index=True)
+
 def get_product_details(product):
     """Get formatted details for a specific product."""
     if isinstance(product, Electronics):
@@ -433,38 +353,162 @@ def get_product_details(product):
         return f"Size: {product._size}, Material: {product._material}"
     return ""
 
+def create_product_row(product):
+    """Create one row of the products table."""
+    return {
+        "ID": product._product_id,
+        "Name": product._name,
+        "Type": product.__class__.__name__,
+        "Price": f"Rs. {product._price:.2f}",
+        "Stock": product._quantity_in_stock,
+        "Value": f"Rs. {product.get_total_value():.2f}",
+        "Details": get_product_details(product)
+    }
+
+@instrumented
 def create_product_table_data(products):
-    """Create data for the products table."""
-    data = []
-    for product in products:
-        item = {
-            "ID": product._product_id,
-            "Name": product._name,
-            "Type": product.__class__.__name__,
-            "Price": f"Rs. {product._price:.2f}",
-            "Stock": product._quantity_in_stock,
-            "Value": f"Rs. {product.get_total_value():.2f}",
-            "Details": get_product_details(product)
-        }
-        data.append(item)
-    return data
+    """Create data for the products table, reusing rows of unchanged products."""
+    return get_row_cache().rows(products)
+
+def stored_version(product):
+    """(inventory uid, product version) for a product in an inventory; None for a detached one."""
+    inventory = product._inventory
+    if inventory is None:
+        return None
+    return inventory._uid, inventory.product_version(product._product_id)
+
+def product_row_version(product, today):
+    """What a product's table row depends on; the row is rebuilt only when this changes.
+    
+    A stored product's inventory versions it; a detached one is compared on everything the row shows.
+    """
+    stored = stored_version(product)
+    if stored is not None:
+        return stored + (product.is_expired(today),) if isinstance(product, Grocery) else stored
+    version = (product.__class__, product._name, product._price, product._quantity_in_stock)
+    if isinstance(product, Electronics):
+        return version + (product._brand, product._warranty_years)
+    if isinstance(product, Grocery):
+        return version + (product._expiry_date, product.is_expired(today))
+    if isinstance(product, Clothing):
+        return version + (product._size, product._material)
+    return version
+
+def product_label(product):
+    """Label for a product in the Manage Products pickers."""
+    return f"{product._product_id}: {product._name} (Stock: {product._quantity_in_stock})"
+
+def product_label_version(product, today):
+    return stored_version(product) or (product._name, product._quantity_in_stock)
+
+class ProductRowCache:
+    """Formatted rows (or labels) by product ID, least recently used first out.
+    
+    build(product) makes a row; it is rebuilt only when version(product, today) changes.
+    """
+    
+    def __init__(self, build=create_product_row, version=product_row_version, maxsize=ROW_CACHE_SIZE):
+        self.build = build
+        self.version = version
+        self.maxsize = maxsize
+        self._rows = OrderedDict()  # product_id -> (version, row)
+        self._lock = threading.Lock()
+    
+    def rows(self, products):
+        today = date.today()
+        rows = []
+        with self._lock:
+            for product in products:
+                pid = product._product_id
+                version = self.version(product, today)
+                cached = self._rows.get(pid)
+                if cached is None or cached[0] != version:
+                    cached = self._rows[pid] = (version, self.build(product))
+                self._rows.move_to_end(pid)
+                rows.append(cached[1])
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+        return rows
+
+@st.cache_resource
+def get_row_cache():
+    """One row cache per server process, surviving reruns."""
+    return ProductRowCache()
+
+@memoize_on_version
+def product_table_page(inventory, offset, limit, sort_by, descending, product_type, name):
+    """Number of matches and the table rows for one page of the Dashboard table."""
+    total, products = inventory.query_page(offset, limit, sort_by, descending, product_type, name)
+    return total, create_product_table_data(products)
+
+@memoize_on_version
+def reorder_table(inventory):
+    """Table rows for the products at or below their reorder point, the first REORDER_TABLE_ROWS of them."""
+    products = inventory.reorder_products(REORDER_TABLE_ROWS)
+    rows = create_product_table_data(products)
+    # Cached rows are shared, so extend copies
+    return [dict(row, **{"Reorder Point": product._reorder_point}) for row, product in zip(rows, products)]
+
+def display_reorder_products(inventory):
+    """List the products due for reorder, if any."""
+    import pandas as pd
+    count = summary_metrics(inventory)[3]
+    if not count:
+        return
+    with st.expander(f"Due for reorder: {count:,} at or below their reorder point"):
+        st.dataframe(pd.DataFrame(reorder_table(inventory)), use_container_width=True, hide_index=True)
+        if count > REORDER_TABLE_ROWS:
+            st.caption(f"Showing the first {REORDER_TABLE_ROWS:,}")
+
+@st.cache_resource
+def get_label_cache():
+    """Picker labels, shared like the row cache; a label is rebuilt when its product's stock changes."""
+    return ProductRowCache(product_label, product_label_version)
 
 def display_product_list(inventory):
-    """Display the list of all products."""
+    """Display one page of products, filtered and sorted by the inventory."""
+    import pandas as pd
     st.markdown('<div class="sub-header">All Products</div>', unsafe_allow_html=True)
     
-    products = inventory.list_all_products()
-    if not products:
+    if not summary_metrics(inventory)[0]:
         st.markdown('<div class="info-box">No products in inventory. Add some products to get started!</div>', 
                     unsafe_allow_html=True)
         return
     
-    # Create a table of products
-    data = create_product_table_data(products)
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        name = st.text_input("Filter by name", key="table_name")
+    with col2:
+        product_type = st.selectbox("Type", ["All", "Electronics", "Grocery", "Clothing"], key="table_type")
+    with col3:
+        sort_label = st.selectbox("Sort by", list(TABLE_SORT_OPTIONS), key="table_sort")
+    with col4:
+        descending = st.checkbox("Descending", key="table_descending")
+    
+    page_size = st.session_state.get("table_page_size", TABLE_PAGE_SIZES[0])
+    page = st.session_state.get("table_page", 1)
+    query = (TABLE_SORT_OPTIONS[sort_label], descending, None if product_type == "All" else product_type, name)
+    total, rows = product_table_page(inventory, (page - 1) * page_size, page_size, *query)
+    pages = max(1, math.ceil(total / page_size))
+    if page > pages:
+        # Filters shrank the result; show the last page that exists
+        page = st.session_state.table_page = pages
+        total, rows = product_table_page(inventory, (page - 1) * page_size, page_size, *query)
+    
+    if rows:
+        df = pd.DataFrame(rows)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.markdown('<div class="info-box">No products match these filters.</div>', unsafe_allow_html=True)
     
-    # Convert to DataFrame for better display
-    df = pd.DataFrame(data)
-    st.dataframe(df, use_container_width=True)
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key="table_page")
+    with col2:
+        st.selectbox("Rows per page", TABLE_PAGE_SIZES, key="table_page_size")
+    with col3:
+        first = (page - 1) * page_size + 1 if total else 0
+        st.caption(f"Showing {first:,}-{first + len(rows) - 1 if rows else 0:,} of {total:,} products")
 
 def handle_expired_products(inventory):
     """Handle the removal of expired products."""
@@ -477,6 +521,7 @@ def handle_expired_products(inventory):
         st.experimental_rerun()
 
 # Dashboard Page
+@instrumented
 def show_dashboard():
     
     st.markdown('<div class="section-header">Dashboard</div>', unsafe_allow_html=True)
@@ -486,9 +531,15 @@ def show_dashboard():
     # Display summary metrics
     display_summary_metrics(inventory)
     
+    # Display products due for reorder
+    display_reorder_products(inventory)
+    
     # Display product distribution
     display_product_distribution(inventory)
     
+    # Display sales history
+    display_sales(inventory)
+    
     # Display product list
     display_product_list(inventory)
     
@@ -497,6 +548,7 @@ def show_dashboard():
 
 
 # Add Product Page
+@instrumented
 def show_add_product():
     st.markdown('<div class="section-header">Add New Product</div>', unsafe_allow_html=True)
     
@@ -507,6 +559,7 @@ def show_add_product():
         name = st.text_input("Product Name")
         price = st.number_input("Price (Rs.)", min_value=0.01, step=0.01)
         quantity = st.number_input("Quantity in Stock", min_value=0, step=1)
+        reorder_point = st.number_input("Reorder Point", min_value=0, step=1, value=None, help=REORDER_HELP)
         
         # Type-specific fields
         if product_type == "Electronics":
@@ -530,11 +583,13 @@ def show_add_product():
                 
                 # Create product based on type
                 if product_type == "Electronics":
-                    product = Electronics(product_id, name, price, quantity, extra_fields[0], extra_fields[1])
+                    product = Electronics(product_id, name, price, quantity, extra_fields[0], extra_fields[1],
+                                          reorder_point)
                 elif product_type == "Grocery":
-                    product = Grocery(product_id, name, price, quantity, extra_fields[0])
+                    product = Grocery(product_id, name, price, quantity, extra_fields[0], reorder_point)
                 elif product_type == "Clothing":
-                    product = Clothing(product_id, name, price, quantity, extra_fields[0], extra_fields[1])
+                    product = Clothing(product_id, name, price, quantity, extra_fields[0], extra_fields[1],
+                                       reorder_point)
                 
                 # Add to inventory
                 inventory.add_product(product)
@@ -549,32 +604,46 @@ def show_add_product():
 
 
 # Manage Products Page
+def find_products_input(inventory, key):
+    """Type-ahead search box; returns the top matches. Kept outside forms so it updates as you search."""
+    query = st.text_input("Find product by name or ID", key=f"{key}_query",
+                          help=f"Shows the first {PICKER_LIMIT} matches")
+    return inventory.find_products(query)
+
+def select_product(products, key, labels=True):
+    """Selectbox over the matched products; returns the chosen product ID, or None if nothing matched."""
+    ids = [p._product_id for p in products]
+    if labels:
+        names = dict(zip(ids, get_label_cache().rows(products)))
+    else:
+        names = {p._product_id: f"{p._product_id}: {p._name}" for p in products}
+    return st.selectbox(SELECT_PRODUCT_LABEL, ids, format_func=names.get, key=key)
+
+@instrumented
 def show_manage_products():
     st.markdown('<div class="section-header">Manage Products</div>', unsafe_allow_html=True)
     
     inventory = st.session_state.inventory
-    products = inventory.list_all_products()
     
-    if not products:
+    if not inventory.product_count():
         st.markdown('<div class="info-box">No products in inventory. Add some products first!</div>', 
                     unsafe_allow_html=True)
         return
     
     # Create tabs for different management functions
-    tab1, tab2, tab3 = st.tabs(["Sell Products", "Restock Products", "Remove Products"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Sell Products", "Restock Products", "Remove Products", "Reorder Points"])
     
     with tab1:
         st.markdown('<div class="sub-header">Sell Products</div>', unsafe_allow_html=True)
+        matches = find_products_input(inventory, "sell")
         
         with st.form("sell_form"):
-            product_options = {f"{p._product_id}: {p._name} (Stock: {p._quantity_in_stock})": p._product_id for p in products}
-            selected_product = st.selectbox(SELECT_PRODUCT_LABEL, list(product_options.keys()), key="sell_select")
-            product_id = product_options[selected_product]
+            product_id = select_product(matches, "sell_select")
             
             quantity = st.number_input("Quantity to Sell", min_value=1, step=1, key="sell_qty")
             sell_submitted = st.form_submit_button("Sell")
             
-            if sell_submitted:
+            if sell_submitted and product_id is not None:
                 success, message = inventory.sell_product(product_id, quantity)
                 if success:
                     set_notification(message, "success")
@@ -584,16 +653,15 @@ def show_manage_products():
     
     with tab2:
         st.markdown('<div class="sub-header">Restock Products</div>', unsafe_allow_html=True)
+        matches = find_products_input(inventory, "restock")
         
         with st.form("restock_form"):
-            product_options = {f"{p._product_id}: {p._name} (Stock: {p._quantity_in_stock})": p._product_id for p in products}
-            selected_product = st.selectbox(SELECT_PRODUCT_LABEL, list(product_options.keys()), key="restock_select")
-            product_id = product_options[selected_product]
+            product_id = select_product(matches, "restock_select")
             
             quantity = st.number_input("Quantity to Add", min_value=1, step=1, key="restock_qty")
             restock_submitted = st.form_submit_button("Restock")
             
-            if restock_submitted:
+            if restock_submitted and product_id is not None:
                 success, message = inventory.restock_product(product_id, quantity)
                 if success:
                     set_notification(message, "success")
@@ -603,31 +671,104 @@ def show_manage_products():
     
     with tab3:
         st.markdown('<div class="sub-header">Remove Products</div>', unsafe_allow_html=True)
+        matches = find_products_input(inventory, "remove")
         
         with st.form("remove_form"):
-            product_options = {f"{p._product_id}: {p._name}": p._product_id for p in products}
-            selected_product = st.selectbox(SELECT_PRODUCT_LABEL, list(product_options.keys()), key="remove_select")
-            product_id = product_options[selected_product]
+            product_id = select_product(matches, "remove_select", labels=False)
             
             remove_submitted = st.form_submit_button("Remove Product")
             
-            if remove_submitted:
+            if remove_submitted and product_id is not None:
                 if inventory.remove_product(product_id):
                     set_notification("Product removed successfully", "success")
                 else:
                     set_notification("Failed to remove product", "error")
                 st.experimental_rerun()
+    
+    with tab4:
+        st.markdown('<div class="sub-header">Reorder Points</div>', unsafe_allow_html=True)
+        matches = find_products_input(inventory, "reorder")
+        
+        with st.form("reorder_form"):
+            product_id = select_product(matches, "reorder_select")
+            
+            reorder_point = st.number_input("Reorder Point", min_value=0, step=1, value=None, help=REORDER_HELP,
+                                            key="reorder_point")
+            reorder_submitted = st.form_submit_button("Set Reorder Point")
+            
+            if reorder_submitted and product_id is not None:
+                try:
+                    inventory.set_reorder_point(product_id, reorder_point)
+                    if reorder_point is None:
+                        set_notification("Reorder alerts turned off for this product", "success")
+                    else:
+                        set_notification(f"Reorder point set to {reorder_point}", "success")
+                except ProductNotFoundError:
+                    set_notification("Product not found", "error")
+                st.rerun()
 
 
 
 # Search Products Page
+def advanced_search_form():
+    """Inputs for common and per-type attributes, combined into one query predicate."""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        product_type = st.selectbox("Product type", ["Any", "Electronics", "Grocery", "Clothing"], key="adv_type")
+        name = st.text_input("Name contains", key="adv_name")
+    with col2:
+        min_price, max_price = st.slider("Price range (Rs.)", 0.0, 10000.0, (0.0, 10000.0), step=10.0,
+                                         key="adv_price")
+    with col3:
+        max_stock = st.number_input("Stock at most (-1 for any)", min_value=-1, value=-1, step=1, key="adv_stock")
+    
+    conditions = [Field("price").between(min_price, max_price)] if (min_price, max_price) != (0.0, 10000.0) else []
+    if product_type != "Any":
+        conditions.append(Field("type") == product_type)
+    if name:
+        conditions.append(Field("name").contains(name))
+    if max_stock >= 0:
+        conditions.append(Field("quantity_in_stock") <= max_stock)
+    
+    if product_type == "Electronics":
+        col1, col2 = st.columns(2)
+        with col1:
+            brand = st.text_input("Brand contains", key="adv_brand")
+        with col2:
+            warranty = st.number_input("Warranty at least (years)", min_value=0, value=0, step=1, key="adv_warranty")
+        if brand:
+            conditions.append(Field("brand").contains(brand))
+        if warranty:
+            conditions.append(Field("warranty_years") >= warranty)
+    elif product_type == "Grocery":
+        if st.checkbox("Expiring on or before", key="adv_expiring"):
+            conditions.append(Field("expiry_date") <= st.date_input("Date", key="adv_expiry"))
+    elif product_type == "Clothing":
+        col1, col2 = st.columns(2)
+        with col1:
+            sizes = st.multiselect("Sizes", ["XS", "S", "M", "L", "XL", "XXL"], key="adv_sizes")
+        with col2:
+            material = st.text_input("Material contains", key="adv_material")
+        if sizes:
+            conditions.append(Field("size").isin(sizes))
+        if material:
+            conditions.append(Field("material").contains(material))
+    
+    if not conditions:
+        return Field("price") >= 0  # matches everything
+    predicate = conditions[0]
+    for condition in conditions[1:]:
+        predicate = predicate & condition
+    return predicate
+
+@instrumented
 def show_search_products():
     st.markdown('<div class="section-header">Search Products</div>', unsafe_allow_html=True)
     
     inventory = st.session_state.inventory
     
     # Create tabs for different search methods
-    tab1, tab2 = st.tabs(["Search by Name", "Search by Type"])
+    tab1, tab2, tab3 = st.tabs(["Search by Name", "Search by Type", "Advanced Search"])
     
     with tab1:
         st.markdown('<div class="sub-header">Search by Name</div>', unsafe_allow_html=True)
@@ -657,10 +798,28 @@ def show_search_products():
             else:
                 st.markdown(f'<div class="warning-box">No {search_type} products found</div>', 
                             unsafe_allow_html=True)
-                
+    
+    with tab3:
+        st.markdown('<div class="sub-header">Advanced Search</div>', unsafe_allow_html=True)
+        predicate = advanced_search_form()
+        
+        if st.button("Search", key="advanced_search"):
+            # query() is lazy: take one more than we show to know whether there are others
+            results = list(itertools.islice(inventory.query(predicate), ADVANCED_RESULTS + 1))
+            if results:
+                more = len(results) > ADVANCED_RESULTS
+                count = f"first {ADVANCED_RESULTS}" if more else str(len(results))
+                st.markdown(f'<div class="success-text">Showing {count} matching products</div>',
+                            unsafe_allow_html=True)
+                for product in results[:ADVANCED_RESULTS]:
+                    st.markdown(f'<div class="product-card">{str(product)}</div>', unsafe_allow_html=True)
+            else:
+                st.markdown('<div class="warning-box">No products match these conditions</div>',
+                            unsafe_allow_html=True)
 
 
 # Save/Load Page
+@instrumented
 def show_save_load():
     st.markdown('<div class="section-header">Save / Load Inventory</div>', unsafe_allow_html=True)
     
@@ -670,7 +829,7 @@ def show_save_load():
     
     with col1:
         st.markdown('<div class="sub-header">Save Inventory</div>', unsafe_allow_html=True)
-        save_filename = st.text_input("Filename to save", DEFAULT_FILENAME)
+        save_filename = st.text_input("Filename to save", DEFAULT_FILENAME, help=FILENAME_HELP)
         
         if st.button("Save Inventory"):
             success, message = inventory.save_to_file(save_filename)
@@ -683,7 +842,7 @@ def show_save_load():
     
     with col2:
         st.markdown('<div class="sub-header">Load Inventory</div>', unsafe_allow_html=True)
-        load_filename = st.text_input("Filename to load", DEFAULT_FILENAME)
+        load_filename = st.text_input("Filename to load", DEFAULT_FILENAME, help=FILENAME_HELP)
         
         if st.button("Load Inventory"):
             success, message = inventory.load_from_file(load_filename)
@@ -693,6 +852,22 @@ def show_save_load():
                 set_notification(message, "error")
 
             print(""" Please check download folder after save.""")
+    
+    st.markdown('<div class="sub-header">Journal</div>', unsafe_allow_html=True)
+    journal_filename = st.text_input("Journaled inventory file", DEFAULT_FILENAME, help=JOURNAL_HELP)
+    jcol1, jcol2 = st.columns(2)
+    
+    with jcol1:
+        if st.button("Open Journal"):
+            success, message = inventory.open_journal(journal_filename)
+            set_notification(message, "success" if success else "error")
+    
+    with jcol2:
+        if st.button("Compact Journal"):
+            success, message = inventory.compact_journal()
+            set_notification(message, "success" if success else "error")
+    
+    show_warehouse_load(inventory)
 
     st.markdown(
         """
@@ -707,28 +882,159 @@ def show_save_load():
             #st.experimental_rerun()
 
 
+def warehouse_sources(text):
+    """{warehouse: path} from one "warehouse=path" or "path" per line."""
+    sources = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        name, sep, path = line.partition("=")
+        path = path.strip() if sep else line.strip()
+        warehouse = name.strip() if sep else Path(path).stem
+        if warehouse in sources:
+            raise ValueError(f"Warehouse {warehouse} is listed twice")
+        sources[warehouse] = path
+    return sources
+
+@memoize_on_version
+def warehouse_table(inventory):
+    """Products and units per warehouse, as the warehouse files were loaded."""
+    return [{"Warehouse": warehouse, "Products": products, "Units Loaded": units}
+            for warehouse, (products, units) in inventory.warehouse_totals().items()]
+
+def show_warehouse_load(inventory):
+    st.markdown('<div class="sub-header">Load Warehouses</div>', unsafe_allow_html=True)
+    files = st.text_area("Warehouse files", help=WAREHOUSE_HELP)
+    col1, col2 = st.columns(2)
+    with col1:
+        policy = st.selectbox("Products in more than one file", list(MERGE_POLICY_LABELS))
+    with col2:
+        workers = st.number_input("Worker processes", min_value=1, value=os.cpu_count() or 1, step=1,
+                                  key="warehouse_workers", help="Files are parsed in parallel, one per process")
+    
+    if st.button("Load Warehouses"):
+        try:
+            count = inventory.load_from_files(warehouse_sources(files), MERGE_POLICY_LABELS[policy], int(workers))
+            set_notification(f"Loaded {count:,} products from {len(inventory.warehouse_totals())} warehouse(s)",
+                             "success")
+        except (InvalidDataError, DuplicateProductError, ValueError) as e:
+            set_notification(str(e), "error")
+        except Exception as e:
+            set_notification(f"Error loading files: {str(e)}", "error")
+    
+    rows = warehouse_table(inventory)
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+# Bulk Import Page
+@instrumented
+def show_bulk_import():
+    st.markdown('<div class="section-header">Bulk Import</div>', unsafe_allow_html=True)
+    
+    inventory = st.session_state.inventory
+    import_filename = st.text_input("Catalog file", help=IMPORT_HELP)
+    col1, col2 = st.columns(2)
+    with col1:
+        chunk_size = st.number_input("Rows per chunk", min_value=1000, value=IMPORT_CHUNK_SIZE, step=10_000)
+    with col2:
+        workers = st.number_input("Worker processes", min_value=0, value=IMPORT_WORKERS, step=1,
+                                  help="0 builds products in the app process")
+    
+    if st.button("Import Catalog"):
+        bar = st.progress(0.0, text="Reading catalog...")
+        try:
+            count = inventory.import_products(import_filename, int(chunk_size), int(workers),
+                                              progress=lambda fraction, text: bar.progress(fraction, text=text))
+            bar.progress(1.0, text="Done")
+            set_notification(f"Imported {count:,} products", "success")
+        except (InvalidDataError, DuplicateProductError) as e:
+            set_notification(str(e), "error")
+        except Exception as e:
+            set_notification(f"Error importing file: {str(e)}", "error")
+
+
+# Performance Page, listed only with ?perf=1 in the URL or while instrumentation is on
+def show_performance():
+    import pandas as pd
+    st.markdown('<div class="section-header">Performance</div>', unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        enabled = st.toggle("Record timings", value=PERF.enabled,
+                            help="Times inventory operations and pages; off costs nothing")
+        if enabled != PERF.enabled:
+            if enabled:
+                PERF.enable()
+            else:
+                PERF.disable()
+            st.rerun()
+    with col2:
+        st.toggle("Profile each rerun", key="profile_reruns",
+                  help="Runs other pages under cProfile; the last profile is shown here")
+    with col3:
+        if st.button("Clear"):
+            PERF.clear()
+            st.session_state.pop("last_profile", None)
+    
+    rows = PERF.stats()
+    if rows:
+        table = pd.DataFrame(rows).rename(columns={
+            "operation": "Operation", "calls": "Calls", "p50_ms": "p50 ms", "p99_ms": "p99 ms",
+            "max_ms": "Max ms", "total_s": "Total s",
+        })
+        st.dataframe(table, use_container_width=True, hide_index=True,
+                     column_config={column: st.column_config.NumberColumn(format="%.3f")
+                                    for column in ("p50 ms", "p99 ms", "Max ms", "Total s")})
+    else:
+        st.markdown('<div class="info-box">No timings yet. Turn on recording and use the other pages.</div>',
+                    unsafe_allow_html=True)
+    
+    if st.session_state.get("last_profile"):
+        st.markdown('<div class="sub-header">Last profiled rerun</div>', unsafe_allow_html=True)
+        st.code(st.session_state.last_profile, language=None)
+
+def run_profiled(page):
+    """Run page() under cProfile and keep the top of the report for the Performance page."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(page)
+    finally:
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        st.session_state.last_profile = report.getvalue()
+
+
 # Main App UI
+@instrumented
 def main():
     st.markdown('<h1 class="main-header">📦 Inventory Management System</h1>', unsafe_allow_html=True)
     
     # Sidebar for navigation
     st.sidebar.markdown('<div class="sidebar-header">Navigation</div>', unsafe_allow_html=True)
-    page = st.sidebar.radio("Go to", ["Dashboard", "Add Product", "Manage Products", "Search Products", "Save/Load"])
+    pages = ["Dashboard", "Add Product", "Manage Products", "Search Products", "Bulk Import", "Save/Load"]
+    if PERF.enabled or st.query_params.get("perf") == "1":
+        pages.append("Performance")
+    page = st.sidebar.radio("Go to", pages)
     
     # Show notification if any
     show_notification()
+    show_reorder_alerts()
     
     # Display the selected page
-    if page == "Dashboard":
-        show_dashboard()
-    elif page == "Add Product":
-        show_add_product()
-    elif page == "Manage Products":
-        show_manage_products()
-    elif page == "Search Products":
-        show_search_products()
-    elif page == "Save/Load":
-        show_save_load()
+    show = {
+        "Dashboard": show_dashboard,
+        "Add Product": show_add_product,
+        "Manage Products": show_manage_products,
+        "Search Products": show_search_products,
+        "Bulk Import": show_bulk_import,
+        "Save/Load": show_save_load,
+        "Performance": show_performance,
+    }[page]
+    if page != "Performance" and st.session_state.get("profile_reruns"):
+        run_profiled(show)
+    else:
+        show()
         
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""Load generator for inventory_api.py: requests per second and tail latency, batched or not.
+
+Starts the server in its own process, then keeps CONNECTIONS keep-alive connections busy;
+each one restocks and sells the same units of its own product, so every request must
+succeed and the catalog's value must end where it started.
+
+Usage: python benchmarks/bench_api.py [CONNECTIONS] [SECONDS]   (default: 64 5)
+"""
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from catalog import make_inventory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = [
+    ("one call per request", ["--batch-lines", "1", "--batch-wait-ms", "0"]),
+    ("batched, no wait", ["--batch-wait-ms", "0"]),
+    ("batched, 1 ms wait", ["--batch-wait-ms", "1"]),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def terminal(port, product_id, deadline, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            for action in ("restock", "sell"):
+                start = time.perf_counter()
+                status, reply = await request(reader, writer, "POST", f"/{action}", {"product_id": product_id, "quantity": 2})
+                latencies.append(time.perf_counter() - start)
+                assert status == 200, reply
+    finally:
+        writer.close()
+
+
+async def load(port, connections, seconds):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    before = (await request(reader, writer, "GET", "/valuation"))[1]["total_value"]
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(terminal(port, product_id, deadline, latencies) for product_id in range(1, connections + 1)))
+    elapsed = time.perf_counter() - start
+    after = (await request(reader, writer, "GET", "/valuation"))[1]["total_value"]
+    writer.close()
+    assert abs(after - before) < 0.01, (before, after)
+    latencies.sort()
+    return len(latencies) / elapsed, [latencies[int(q * (len(latencies) - 1))] * 1000 for q in (0.5, 0.99, 0.999)]
+
+
+def run(options, connections, seconds):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "inventory_api.py"), "--port", str(port), *options],
+                              cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        server.stdout.readline()  # "Serving N products on ..." once the catalog is loaded
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        return asyncio.run(load(port, connections, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = os.path.join(tmp, "catalog.jsonl")
+        make_inventory(10_000).save_to_file(catalog)
+        print(f"{connections} connections, {seconds:g}s per run, one client process")
+        print(f"{'':>34} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9}")
+        for storage in ("in memory", "fsync journal"):
+            for number, (label, options) in enumerate(MODES):
+                if storage == "in memory":
+                    options = ["--load", catalog, *options]
+                else:
+                    # A fresh journal per run, so no run replays another's sales
+                    journal = os.path.join(tmp, f"journal{number}.jsonl")
+                    shutil.copy(catalog, journal)
+                    options = ["--journal", journal, "--sync", *options]
+                rate, (p50, p99, p999) = run(options, connections, seconds)
+                print(f"{storage + ', ' + label:>34} {rate:>8,.0f} {p50:>8.2f} {p99:>8.2f} {p999:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: sell_many / restock_many versus one sell_product / restock_product call per line.
+
+Each backend gets the same order batches both ways; the final stock and totals must
+match, a batch with a bad line must change nothing, and a journaled batch must replay.
+
+Usage: python benchmarks/bench_batch.py [LINES]   (default: 5000)
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+from catalog import core, make_products
+
+CATALOG_SIZE = 20_000
+JOURNALED_LINES = 1000
+
+
+def fill(backend):
+    inventory = core.INVENTORY_BACKENDS[backend]()
+    for product in make_products(CATALOG_SIZE, seed=3):
+        inventory.add_product(product)
+    return inventory
+
+
+def make_orders(lines, seed):
+    rng = random.Random(seed)
+    return [(rng.randint(1, CATALOG_SIZE), rng.randint(1, 3)) for _ in range(lines)]
+
+
+def state(inventory):
+    stock = {p._product_id: p._quantity_in_stock for p in inventory.list_all_products()}
+    return stock, round(inventory.total_inventory_value(), 2), inventory.stock_by_type("Grocery")
+
+
+def per_call(inventory, restocks, sells):
+    for pid, qty in restocks:
+        inventory.restock_product(pid, qty)
+    for pid, qty in sells:
+        inventory.sell_product(pid, qty)
+
+
+def batched(inventory, restocks, sells):
+    assert inventory.restock_many(restocks).ok
+    assert inventory.sell_many(sells).ok
+
+
+def check_rejects(backend):
+    # A bad line anywhere rejects the whole batch, with one error per bad line
+    inventory = fill(backend)
+    before = state(inventory)
+    stock = inventory.get_product(5)._quantity_in_stock
+    result = inventory.sell_many([(1, 1), (5, stock), (5, 1), (CATALOG_SIZE + 1, 1), (2, 0), ("x",)])
+    assert not result.ok and result.units == 0
+    assert [error.line for error in result.errors] == [3, 4, 5, 6], result.errors
+    assert state(inventory) == before
+    assert inventory.check_consistency() == []
+
+
+def check_replay(backend, restocks, sells):
+    with tempfile.TemporaryDirectory() as tmp:
+        inventory = fill(backend)
+        filename = os.path.join(tmp, "catalog.jsonl")
+        inventory.save_to_file(filename)
+        inventory.open_journal(filename)
+        batched(inventory, restocks, sells)
+        inventory.close_journal()
+        replayed = core.INVENTORY_BACKENDS[backend]()
+        replayed.load_from_file(filename)
+        assert replayed.open_journal(filename)[0]
+        assert state(replayed) == state(inventory)
+        replayed.close_journal()
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # Restock what will be sold first, so both paths apply every line
+    sells = make_orders(lines, seed=2)
+    restocks = sells[::-1]
+    print(f"{'backend':>9} {'per call ms':>12} {'batch ms':>10} {'lines/s batch':>14} {'speedup':>8}")
+    for backend in core.INVENTORY_BACKENDS:
+        check_rejects(backend)
+        check_replay(backend, restocks, sells)
+        timings = []
+        results = []
+        for run in (per_call, batched):
+            inventory = fill(backend)
+            gc.collect()  # don't bill either path for the garbage fill() left behind
+            start = time.perf_counter()
+            run(inventory, restocks, sells)
+            timings.append(time.perf_counter() - start)
+            results.append(state(inventory))
+            assert inventory.check_consistency() == []
+        assert results[0] == results[1], backend
+        rate = 2 * lines / timings[1]
+        print(f"{backend:>9} {timings[0] * 1000:>12.1f} {timings[1] * 1000:>10.1f} "
+              f"{rate:>14,.0f} {timings[0] / timings[1]:>7.1f}x")
+
+    # With a synced journal the batch writes one record where the loop writes one per line
+    sells = sells[:JOURNALED_LINES]
+    restocks = sells[::-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = []
+        for run in (per_call, batched):
+            inventory = fill("dict")
+            filename = os.path.join(tmp, f"{run.__name__}.jsonl")
+            inventory.save_to_file(filename)
+            inventory.open_journal(filename, sync=True)
+            gc.collect()
+            start = time.perf_counter()
+            run(inventory, restocks, sells)
+            timings.append(time.perf_counter() - start)
+            inventory.close_journal()
+    print(f"{'fsync':>9} {timings[0] * 1000:>12.1f} {timings[1] * 1000:>10.1f} "
+          f"{2 * len(sells) / timings[1]:>14,.0f} {timings[0] / timings[1]:>7.1f}x   "
+          f"(dict, {len(sells)} lines, synced journal)")
+
+
+if __name__ == "__main__":
+    main()
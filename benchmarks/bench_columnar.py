@@ -0,0 +1,73 @@
+"""Memory and query throughput of the dict and columnar Inventory backends.
+
+Usage: python benchmarks/bench_columnar.py [SKUS ...]   (default: 100000 1000000)
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from catalog import core, make_products
+
+REPEAT = 5
+
+
+def build(backend, size):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    inventory = backend()
+    for product in make_products(size):
+        inventory.add_product(product)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return inventory, elapsed, memory
+
+
+def timed(func, *args):
+    func(*args)  # warm-up: the columnar name search builds its lookup string lazily
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(*args)
+    return (time.perf_counter() - start) / REPEAT * 1e3, result
+
+
+def type_counts(inventory):
+    return [inventory.count_by_type(t) for t in core.COLUMNAR_TYPES]
+
+
+def low_stock_count(inventory):
+    return len(inventory.low_stock_products(5))
+
+
+def name_search_count(inventory):
+    return len(inventory.search_by_name("milk"))
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        print(f"--- {size:,} SKUs")
+        results = {}
+        for label, backend in core.INVENTORY_BACKENDS.items():
+            inventory, build_s, memory = build(backend, size)
+            print(f"{label:>9}: {memory / size:7.0f} bytes/SKU, build {build_s:6.1f}s (under tracemalloc)")
+            rows = {
+                "total value": timed(inventory.total_inventory_value),
+                "type counts": timed(type_counts, inventory),
+                "expired count": timed(inventory.expired_count),
+                "low stock <= 5": timed(low_stock_count, inventory),
+                "name search": timed(name_search_count, inventory),
+            }
+            for op, (ms, result) in rows.items():
+                print(f"{'':>11}{op:>16}: {ms:9.3f} ms")
+            results[label] = {op: result for op, (ms, result) in rows.items()}
+            del inventory
+        dict_results, columnar_results = results["dict"], results["columnar"]
+        assert abs(dict_results.pop("total value") - columnar_results.pop("total value")) < 1
+        assert dict_results == columnar_results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Stress test: concurrent sells, restocks and reservations on every backend.
+
+Checks that no update is lost and no product is oversold, then compares sell throughput
+with per-product lock stripes against one global lock, with and without a synced journal,
+as the thread count grows.
+
+Usage: python benchmarks/bench_concurrency.py [THREADS ...]   (default: 1 2 4 8)
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from catalog import core, make_products
+
+CATALOG_SIZE = 2_000
+OPS_PER_THREAD = 2_000
+
+
+class CoarseLocked:
+    """Baseline: every stock change behind one lock, like the old SharedInventory."""
+
+    def __init__(self, inventory):
+        self._inventory = inventory
+        self._lock = threading.Lock()
+
+    def sell_product(self, product_id, quantity):
+        with self._lock:
+            return self._inventory.sell_product(product_id, quantity)
+
+
+def fill(backend):
+    inventory = core.INVENTORY_BACKENDS[backend]()
+    for product in make_products(CATALOG_SIZE, seed=7):
+        inventory.add_product(product)
+    return inventory
+
+
+def in_threads(threads, work):
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def target(number):
+        barrier.wait()
+        results[number] = work(number)
+
+    workers = [threading.Thread(target=target, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def check_hot_product(backend, threads):
+    # Everyone fights over one product: exactly its stock gets sold, never more
+    inventory = fill(backend)
+    product = inventory.get_product(1)
+    stock = product._quantity_in_stock
+    sold = in_threads(threads, lambda n: sum(
+        inventory.sell_product(1, 1)[0] for _ in range(stock)))
+    assert sum(sold) == stock, (backend, sum(sold), stock)
+    assert inventory.get_product(1)._quantity_in_stock == 0
+    assert inventory.check_consistency() == []
+
+
+def check_no_lost_updates(backend, threads):
+    # Random sells and restocks; the per-product net change must match what succeeded
+    inventory = fill(backend)
+    before = {p._product_id: p._quantity_in_stock for p in inventory.list_all_products()}
+    value_before = inventory.total_inventory_value()
+
+    def work(number):
+        rng = random.Random(number)
+        net = {}
+        for _ in range(OPS_PER_THREAD):
+            pid = rng.randint(1, 50)
+            qty = rng.randint(1, 5)
+            if rng.random() < 0.6:
+                ok = inventory.sell_product(pid, qty)[0]
+                delta = -qty
+            else:
+                ok = inventory.restock_product(pid, qty)[0]
+                delta = qty
+            if ok:
+                net[pid] = net.get(pid, 0) + delta
+        return net
+
+    nets = in_threads(threads, work)
+    expected_value = value_before
+    for pid, stock in before.items():
+        change = sum(net.get(pid, 0) for net in nets)
+        actual = inventory.get_product(pid)._quantity_in_stock
+        assert actual == stock + change >= 0, (backend, pid, actual, stock, change)
+        expected_value += change * inventory.get_product(pid)._price
+    assert abs(inventory.total_inventory_value() - expected_value) < 1e-6 * max(1, expected_value)
+    assert inventory.check_consistency() == []
+
+
+def check_reservations(backend, threads):
+    # Reservations and plain sells share the same stock without overselling
+    inventory = fill(backend)
+    stock = inventory.get_product(2)._quantity_in_stock
+
+    def work(number):
+        taken = 0
+        for step in range(stock):
+            if (number + step) % 2:
+                taken += inventory.sell_product(2, 1)[0]
+                continue
+            try:
+                reservation = inventory.reserve(2, 1)
+            except core.InsufficientStockError:
+                continue
+            if step % 3:
+                inventory.commit_reservation(reservation)
+                taken += 1
+            else:
+                inventory.release_reservation(reservation)
+        return taken
+
+    taken = sum(in_threads(threads, work))
+    assert taken == stock - inventory.get_product(2)._quantity_in_stock
+    assert inventory._held == {}
+    assert inventory.check_consistency() == []
+
+
+def throughput(inventory, threads):
+    ids = list(range(1, CATALOG_SIZE + 1))
+
+    def work(number):
+        rng = random.Random(number)
+        for _ in range(OPS_PER_THREAD // 4):
+            inventory.sell_product(rng.choice(ids), 1)
+
+    start = time.perf_counter()
+    in_threads(threads, work)
+    return threads * (OPS_PER_THREAD // 4) / (time.perf_counter() - start)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8]
+    threads = max(counts)
+    for backend in core.INVENTORY_BACKENDS:
+        check_hot_product(backend, threads)
+        check_no_lost_updates(backend, threads)
+        check_reservations(backend, threads)
+        print(f"{backend:>9}: hot product, lost updates and reservations OK with {threads} threads")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\n{'journal':>8} {'threads':>8} {'coarse lock':>14} {'stripes':>14}")
+        for sync in (False, True):
+            for count in counts:
+                rates = []
+                for striped in (False, True):
+                    inventory = fill("dict")
+                    snapshot = os.path.join(tmp, f"bench-{sync}-{count}-{striped}.json")
+                    inventory.save_to_file(snapshot)
+                    inventory.open_journal(snapshot, sync=sync)
+                    rates.append(throughput(inventory if striped else CoarseLocked(inventory), count))
+                    inventory.close_journal()
+                label = "fsync" if sync else "flush"
+                print(f"{label:>8} {count:>8} {rates[0]:>10,.0f} op/s {rates[1]:>10,.0f} op/s")
+
+
+if __name__ == "__main__":
+    main()
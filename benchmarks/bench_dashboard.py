@@ -0,0 +1,73 @@
+"""Benchmark: building the Dashboard product table, whole catalog versus one cached page.
+
+The old table formatted every product into a DataFrame on each rerun; the paged table asks
+the inventory for one sorted, filtered page and reuses rows that haven't changed. A page
+must match the same slice of the full table.
+
+Usage: python benchmarks/bench_dashboard.py [SKUS]   (default: 100000)
+"""
+import sys
+import time
+
+import pandas as pd
+
+from catalog import core, make_products
+
+import app  # the Streamlit front end; expect bare-mode warnings on stderr
+
+PAGE_SIZE = 50
+RERUNS = 5
+
+
+def full_table(inventory):
+    return pd.DataFrame(app.create_product_table_data(inventory.list_all_products()))
+
+
+def paged_table(inventory, cache, page, sort_by=None, descending=False, name=None):
+    total, products = inventory.query_page(page * PAGE_SIZE, PAGE_SIZE, sort_by, descending, None, name)
+    return total, pd.DataFrame(cache.rows(products))
+
+
+def per_rerun(run):
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        run()
+    return (time.perf_counter() - start) / RERUNS * 1000
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{skus:,} SKUs, {PAGE_SIZE} rows per page, ms per rerun")
+    print(f"{'backend':>9} {'full table':>11} {'page':>8} {'sorted page':>12} {'filtered':>9} {'after sell':>11}")
+    for backend in core.INVENTORY_BACKENDS:
+        inventory = core.INVENTORY_BACKENDS[backend]()
+        for product in make_products(skus, seed=21):
+            inventory.add_product(product)
+        cache = app.ProductRowCache()
+
+        full = full_table(inventory)
+        total, page = paged_table(inventory, cache, 3)
+        assert total == len(full)
+        pd.testing.assert_frame_equal(page, full.iloc[3 * PAGE_SIZE:4 * PAGE_SIZE].reset_index(drop=True))
+        _, by_value = paged_table(inventory, cache, 0, "value", True)
+        values = full["Value"].str[4:].astype(float)
+        assert by_value["ID"].tolist() == full.loc[values.sort_values(ascending=False, kind="stable").index[:PAGE_SIZE], "ID"].tolist()
+
+        timings = [
+            per_rerun(lambda: full_table(inventory)),
+            per_rerun(lambda: paged_table(inventory, cache, 10)),
+            per_rerun(lambda: paged_table(inventory, cache, 10, "price", True)),
+            per_rerun(lambda: paged_table(inventory, cache, 0, None, False, "smart phone")),
+        ]
+        # A sale changes one row's version; only that row gets rebuilt
+        first = inventory.query_page(10 * PAGE_SIZE, 1)[1][0]
+        inventory.restock_product(first._product_id, 1)
+        start = time.perf_counter()
+        _, page = paged_table(inventory, cache, 10)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert page.loc[0, "Stock"] == first._quantity_in_stock
+        print(f"{backend:>9} " + " ".join(f"{t:>{w}.1f}" for t, w in zip(timings, (11, 8, 12, 9, 11))))
+
+
+if __name__ == "__main__":
+    main()
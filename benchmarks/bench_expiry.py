@@ -0,0 +1,75 @@
+"""Compare the expiry index against parsing every grocery's expiry date per call."""
+import time
+from datetime import date, datetime, timedelta
+
+from catalog import core, make_inventory
+
+REPEAT = 10
+
+
+def strptime_expired(product, today):
+    # The pre-index Grocery.is_expired
+    return today > datetime.strptime(product._expiry_date, "%Y-%m-%d").date()
+
+
+def scan_expired_count(inventory):
+    today = datetime.today().date()
+    return len([p for p in inventory._products.values()
+                if isinstance(p, core.Grocery) and strptime_expired(p, today)])
+
+
+def scan_expiring_within(inventory, days):
+    today = datetime.today().date()
+    end = today + timedelta(days=days)
+    return [p for p in inventory._products.values() if isinstance(p, core.Grocery)
+            and today <= datetime.strptime(p._expiry_date, "%Y-%m-%d").date() <= end]
+
+
+def scan_remove_expired(inventory):
+    today = datetime.today().date()
+    removed = []
+    for pid, product in list(inventory._products.items()):
+        if isinstance(product, core.Grocery) and strptime_expired(product, today):
+            removed.append(product._name)
+            inventory.remove_product(pid)
+    return removed
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(*args)
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def timed_once(func, inventory):
+    start = time.perf_counter()
+    result = func(inventory)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    print(f"{'SKUs':>8} {'operation':>18} {'scan ms':>9} {'index ms':>9} {'speedup':>8}")
+    for size in (10_000, 100_000, 300_000):
+        inventory = make_inventory(size)
+        assert inventory.expired_count() == scan_expired_count(inventory)
+        assert ({p._product_id for p in inventory.expiring_within(7)}
+                == {p._product_id for p in scan_expiring_within(inventory, 7)})
+        rows = [
+            ("expired count", timed(scan_expired_count, inventory), timed(inventory.expired_count)),
+            ("expiring in 7d", timed(scan_expiring_within, inventory, 7),
+             timed(inventory.expiring_within, 7)),
+        ]
+
+        expected, scan_ms = timed_once(scan_remove_expired, make_inventory(size))
+        removed, index_ms = timed_once(core.Inventory.remove_expired_products, inventory)
+        assert removed == expected
+        rows.append(("remove expired", scan_ms, index_ms))
+
+        for label, scan, indexed in rows:
+            print(f"{size:>8} {label:>18} {scan:>9.3f} {indexed:>9.3f} {scan / indexed:>7.1f}x")
+    print(f"(today is {date.today()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: bulk CSV / Parquet import versus loading the same catalog as JSON lines.
+
+Every import must produce the same inventory as the JSON load, and a file with one bad
+row or one repeated ID must leave the inventory empty.
+
+Usage: python benchmarks/bench_import.py [ROWS]   (default: 200000)
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from catalog import core, make_products
+
+
+def summary(inventory):
+    return (inventory.product_count(), round(inventory.total_inventory_value(), 2), inventory.expired_count(),
+            [inventory.count_by_type(t) for t in core.COLUMNAR_TYPES])
+
+
+def timed(backend, load):
+    inventory = core.INVENTORY_BACKENDS[backend]()
+    gc.collect()
+    start = time.perf_counter()
+    load(inventory)
+    elapsed = time.perf_counter() - start
+    assert inventory.check_consistency() == []
+    return elapsed, summary(inventory)
+
+
+def check_rejects(tmp, frame):
+    bad = frame.astype({"price": object})
+    bad.loc[len(bad) // 2, "price"] = "n/a"
+    repeated = frame.copy()
+    repeated.loc[len(repeated) - 1, "product_id"] = repeated.loc[0, "product_id"]
+    for rows, error in ((bad, core.InvalidDataError), (repeated, core.DuplicateProductError)):
+        filename = os.path.join(tmp, "reject.csv")
+        rows.to_csv(filename, index=False)
+        for backend in core.INVENTORY_BACKENDS:
+            inventory = core.INVENTORY_BACKENDS[backend]()
+            try:
+                inventory.import_products(filename)
+            except error:
+                pass
+            else:
+                raise AssertionError(f"{backend} accepted a file that should raise {error.__name__}")
+            assert inventory.product_count() == 0
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = core.Inventory()
+        for product in make_products(rows, seed=11):
+            reference.add_product(product)
+        frame = pd.DataFrame(record for record in (p.to_dict() for p in reference.iter_products()))
+        files = {
+            "jsonl": os.path.join(tmp, "catalog.jsonl"),
+            "csv": os.path.join(tmp, "catalog.csv"),
+            "parquet": os.path.join(tmp, "catalog.parquet"),
+        }
+        reference.save_to_file(files["jsonl"])
+        frame.to_csv(files["csv"], index=False)
+        frame.to_parquet(files["parquet"])
+        expected = summary(reference)
+        del reference
+        check_rejects(tmp, frame.head(10_000))
+
+        runs = [
+            ("JSON lines, per record", lambda inv: inv.load_from_file(files["jsonl"])),
+            ("CSV import", lambda inv: inv.import_products(files["csv"], workers=0)),
+            ("Parquet import", lambda inv: inv.import_products(files["parquet"], workers=0)),
+            ("CSV import, 2 workers", lambda inv: inv.import_products(files["csv"], workers=2)),
+        ]
+        print(f"{rows:,} rows, {os.cpu_count()} CPU(s)")
+        print(f"{'':>24}" + "".join(f"{backend:>12}" for backend in core.INVENTORY_BACKENDS) + "   (seconds)")
+        for label, load in runs:
+            timings = []
+            for backend in core.INVENTORY_BACKENDS:
+                elapsed, result = timed(backend, load)
+                assert result == expected, (label, backend, result, expected)
+                timings.append(elapsed)
+            print(f"{label:>24}" + "".join(f"{elapsed:>12.2f}" for elapsed in timings))
+
+
+if __name__ == "__main__":
+    main()
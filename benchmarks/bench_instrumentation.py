@@ -0,0 +1,45 @@
+"""Benchmark: cost of the PERF instrumentation on hot inventory calls, off versus on.
+
+Off must leave the original methods on the classes; on adds one wrapper call per operation.
+
+Usage: python benchmarks/bench_instrumentation.py [CALLS]   (default: 100000)
+"""
+import sys
+import time
+
+from catalog import core, make_products
+
+
+def sell_and_restock(inventory, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        product_id = i % 1000 + 1
+        inventory.restock_product(product_id, 1)
+        inventory.sell_product(product_id, 1)
+    return (time.perf_counter() - start) / (2 * calls) * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    originals = {cls: dict(cls.__dict__) for cls in core.INVENTORY_BACKENDS.values()}
+    print(f"{calls:,} sell/restock pairs, us per call")
+    print(f"{'backend':>9} {'off':>8} {'on':>8} {'overhead':>9}")
+    for backend, cls in core.INVENTORY_BACKENDS.items():
+        inventory = cls()
+        for product in make_products(1000, seed=3):
+            inventory.add_product(product)
+        off = sell_and_restock(inventory, calls)
+        core.PERF.enable()
+        try:
+            on = sell_and_restock(inventory, calls)
+        finally:
+            core.PERF.disable()
+        recorded = {row["operation"]: row["calls"] for row in core.PERF.stats()}
+        assert recorded["sell_product"] == recorded["restock_product"] == calls, recorded
+        core.PERF.clear()
+        print(f"{backend:>9} {off:>8.2f} {on:>8.2f} {on - off:>8.2f}")
+    assert all(dict(cls.__dict__) == originals[cls] for cls in originals), "disable() left wrappers behind"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Durability cost per change: journal append versus rewriting the whole file.
+
+Usage: python benchmarks/bench_journal.py [SKUS ...]   (default: 10000 100000)
+Also checks that recovery drops a torn (truncated) tail record.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from catalog import core, make_inventory
+
+CHANGES = 2000
+
+
+def snapshot_state(inventory):
+    return [p.to_dict() for p in inventory.list_all_products()]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    workdir = tempfile.mkdtemp()
+    print(f"{'SKUs':>8} {'full save ms/change':>20} {'journal us/change':>18} {'recover ms':>11}")
+    for size in sizes:
+        filename = os.path.join(workdir, f"inventory-{size}.json")
+        inventory = make_inventory(size)
+
+        start = time.perf_counter()
+        inventory.sell_product(1, 1)
+        inventory.save_to_file(filename)
+        full_save = time.perf_counter() - start
+
+        inventory.open_journal(filename, compact_every=CHANGES * 10)
+        start = time.perf_counter()
+        for i in range(CHANGES):
+            pid = i % size + 1
+            inventory.restock_product(pid, 2)
+            inventory.sell_product(pid, 1)
+        journal = (time.perf_counter() - start) / (2 * CHANGES)
+        expected = snapshot_state(inventory)
+        inventory.close_journal()
+
+        # Simulate a crash in the middle of writing one more record
+        with open(filename + core.JOURNAL_SUFFIX, "a") as f:
+            f.write('{"op": "sell", "id": 1, "qt')
+        recovered = core.Inventory()
+        start = time.perf_counter()
+        success, message = recovered.open_journal(filename)
+        recover = time.perf_counter() - start
+        assert success, message
+        assert snapshot_state(recovered) == expected
+        assert recovered.check_consistency() == []
+        recovered.close_journal()
+
+        print(f"{size:>8} {full_save * 1e3:>20.1f} {journal * 1e6:>18.1f} {recover * 1e3:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
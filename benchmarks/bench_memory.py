@@ -0,0 +1,73 @@
+"""Bytes per SKU of the slotted Product classes against dict-backed equivalents.
+
+Usage: python benchmarks/bench_memory.py [SKUS ...]   (default: 10000 100000 1000000)
+"""
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+
+from catalog import core, make_products
+
+
+# Dict-backed copies of the product classes, as they were before __slots__
+class DictProduct:
+    def __init__(self, product_id, name, price, quantity_in_stock):
+        self._product_id = product_id
+        self._name = name
+        self._price = price
+        self._quantity_in_stock = quantity_in_stock
+        self._inventory = None
+
+
+class DictElectronics(DictProduct):
+    def __init__(self, product_id, name, price, quantity_in_stock, warranty_years, brand):
+        super().__init__(product_id, name, price, quantity_in_stock)
+        self._warranty_years = warranty_years
+        self._brand = brand
+
+
+class DictGrocery(DictProduct):
+    def __init__(self, product_id, name, price, quantity_in_stock, expiry_date):
+        super().__init__(product_id, name, price, quantity_in_stock)
+        self._expiry_date = expiry_date
+        self._expiry = datetime.strptime(expiry_date, "%Y-%m-%d").date()
+
+
+class DictClothing(DictProduct):
+    def __init__(self, product_id, name, price, quantity_in_stock, size, material):
+        super().__init__(product_id, name, price, quantity_in_stock)
+        self._size = size
+        self._material = material
+
+
+DICT_CLASSES = {"Electronics": DictElectronics, "Grocery": DictGrocery, "Clothing": DictClothing}
+SLOTTED_CLASSES = {"Electronics": core.Electronics, "Grocery": core.Grocery, "Clothing": core.Clothing}
+
+
+def measure(records, classes):
+    """Traced bytes per product built from records; field values are shared, not counted."""
+    gc.collect()
+    tracemalloc.start()
+    products = [classes[record["type"]](**record["fields"]) for record in records]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del products
+    return memory / len(records)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'SKUs':>10} {'dict B/SKU':>11} {'slots B/SKU':>12} {'saved':>7}")
+    for size in sizes:
+        records = []
+        for product in make_products(size):
+            fields = product.to_dict()
+            records.append({"type": fields.pop("type"), "fields": fields})
+        before = measure(records, DICT_CLASSES)
+        after = measure(records, SLOTTED_CLASSES)
+        print(f"{size:>10,} {before:>11.0f} {after:>12.0f} {1 - after / before:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Peak transient memory and time of save/load: whole-document json versus streaming.
+
+Usage: python benchmarks/bench_persistence.py [SKUS ...]   (default: 10000 100000)
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from catalog import core, make_inventory
+
+
+def whole_document_save(inventory, filename):
+    # save_to_file before streaming
+    data = [product.to_dict() for product in inventory.list_all_products()]
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+def whole_document_load(inventory, filename):
+    # load_from_file before streaming: parse everything, then build products
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    inventory._clear()
+    for item in data:
+        inventory._store(core.product_from_dict(item))
+
+
+def measure(func, *args):
+    """Return (seconds, bytes allocated at peak beyond what is still held afterwards)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak - current
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    workdir = tempfile.mkdtemp()
+    array_file = os.path.join(workdir, "inventory.json")
+    lines_file = os.path.join(workdir, "inventory.jsonl")
+    print(f"{'SKUs':>8} {'operation':>26} {'seconds':>8} {'peak MB':>8}")
+    for size in sizes:
+        inventory = make_inventory(size)
+        rows = [
+            ("save json (whole document)", measure(whole_document_save, inventory, array_file)),
+            ("save json (streaming)", measure(inventory.save_to_file, array_file)),
+            ("save jsonl (streaming)", measure(inventory.save_to_file, lines_file)),
+        ]
+        file_mb = os.path.getsize(array_file) / 1e6
+        rows += [
+            ("load json (whole document)", measure(whole_document_load, core.Inventory(), array_file)),
+            ("load json (streaming)", measure(core.Inventory().load_from_file, array_file)),
+            ("load jsonl (streaming)", measure(core.Inventory().load_from_file, lines_file)),
+        ]
+        for label, (seconds, peak) in rows:
+            print(f"{size:>8} {label:>26} {seconds:>8.2f} {peak / 1e6:>8.1f}")
+        print(f"{'':>8} {'json file size MB':>26} {'':>8} {file_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: Manage Products pickers, full-catalog option maps versus type-ahead top-k.
+
+The old page built a label for every product three times per rerun and sent them all to
+the browser; the picker asks the inventory for PICKER_LIMIT matches and reuses cached
+labels, rebuilding one only when its product's stock changes.
+
+Usage: python benchmarks/bench_picker.py [SKUS]   (default: 100000)
+"""
+import sys
+import time
+
+from catalog import core, make_products
+
+import app  # the Streamlit front end; expect bare-mode warnings on stderr
+
+RERUNS = 5
+QUERIES = ["", "smart", "4711", "ph"]
+
+
+def old_options(inventory):
+    products = inventory.list_all_products()
+    sell = {f"{p._product_id}: {p._name} (Stock: {p._quantity_in_stock})": p._product_id for p in products}
+    restock = {f"{p._product_id}: {p._name} (Stock: {p._quantity_in_stock})": p._product_id for p in products}
+    remove = {f"{p._product_id}: {p._name}": p._product_id for p in products}
+    return [list(sell), list(restock), list(remove)]
+
+
+def new_options(inventory, cache, query):
+    options = []
+    for _ in range(3):
+        matches = inventory.find_products(query)
+        options.append(cache.rows(matches))
+    return options
+
+
+def per_rerun(run):
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        result = run()
+    return (time.perf_counter() - start) / RERUNS * 1000, result
+
+
+def payload(options):
+    return sum(len(label) for labels in options for label in labels)
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{skus:,} SKUs, ms per rerun (KB of labels sent)")
+    print(f"{'backend':>9} {'old':>16}" + "".join(f"{repr(q):>16}" for q in QUERIES))
+    for backend in core.INVENTORY_BACKENDS:
+        inventory = core.INVENTORY_BACKENDS[backend]()
+        for product in make_products(skus, seed=5):
+            inventory.add_product(product)
+        builds = []
+
+        def build(product):
+            builds.append(product._product_id)
+            return app.product_label(product)
+
+        cache = app.ProductRowCache(build, app.product_label_version)
+
+        cells = []
+        elapsed, options = per_rerun(lambda: old_options(inventory))
+        cells.append(f"{elapsed:.1f} ({payload(options) // 1024})")
+        for query in QUERIES:
+            elapsed, options = per_rerun(lambda: new_options(inventory, cache, query))
+            cells.append(f"{elapsed:.1f} ({payload(options) // 1024})")
+        print(f"{backend:>9} " + "".join(f"{cell:>16}" for cell in cells))
+
+        exact = inventory.find_products("4711")
+        assert exact[0]._product_id == 4711
+        assert all("smart" in p._name.lower() for p in inventory.find_products("smart"))
+        # A sale rebuilds only the sold product's label
+        first = inventory.find_products("")
+        inventory.sell_product(first[0]._product_id, 1) if first[0]._quantity_in_stock else \
+            inventory.restock_product(first[0]._product_id, 1)
+        builds.clear()
+        labels = cache.rows(inventory.find_products(""))
+        assert builds == [first[0]._product_id], builds
+        assert labels[0] == app.product_label(inventory.get_product(first[0]._product_id))
+
+
+if __name__ == "__main__":
+    main()
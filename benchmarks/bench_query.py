@@ -0,0 +1,63 @@
+"""Benchmark: multi-attribute queries, list_all_products() plus a Python filter versus Inventory.query.
+
+Each query must return the same products in the same order as the filter. "first 10" times
+pulling ten results from the lazy iterator, which is all a paged screen needs.
+
+Usage: python benchmarks/bench_query.py [SKUS]   (default: 200000)
+"""
+import itertools
+import sys
+import time
+from datetime import date, timedelta
+
+from catalog import core, make_products
+from inventory_core import Field
+
+SOON = date.today() + timedelta(days=30)
+QUERIES = {
+    "Sony, warranty >= 2, stock < 10": (
+        (Field("type") == "Electronics") & (Field("brand") == "Sony") & (Field("warranty_years") >= 2)
+        & (Field("quantity_in_stock") < 10),
+        lambda p: isinstance(p, core.Electronics) and p._brand == "Sony" and p._warranty_years >= 2
+        and p._quantity_in_stock < 10),
+    "name has 'denim', price 100-500": (
+        Field("name").contains("denim") & Field("price").between(100, 500),
+        lambda p: "denim" in p._name.lower() and 100 <= p._price <= 500),
+    "expiring within 30 days, stock > 0": (
+        (Field("expiry_date") >= date.today()) & (Field("expiry_date") <= SOON) & (Field("quantity_in_stock") > 0),
+        lambda p: isinstance(p, core.Grocery) and date.today() <= p._expiry <= SOON and p._quantity_in_stock > 0),
+    "silk or wool, size M/L": (
+        Field("material").isin(["Silk", "Wool"]) & Field("size").isin(["M", "L"]),
+        lambda p: isinstance(p, core.Clothing) and p._material in ("Silk", "Wool") and p._size in ("M", "L")),
+}
+
+
+def timed(run, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{skus:,} SKUs, ms (best of 3)")
+    print(f"{'backend':>9} {'query':>36} {'filter':>9} {'query':>9} {'first 10':>9} {'matches':>8}  plan")
+    for backend, cls in core.INVENTORY_BACKENDS.items():
+        inventory = cls()
+        for product in make_products(skus, seed=17):
+            inventory.add_product(product)
+        for label, (predicate, check) in QUERIES.items():
+            filter_ms, expected = timed(lambda: [p._product_id for p in inventory.list_all_products() if check(p)])
+            query_ms, found = timed(lambda: [p._product_id for p in inventory.query(predicate)])
+            first_ms, first = timed(lambda: list(itertools.islice(inventory.query(predicate), 10)))
+            assert found == expected, (backend, label)
+            assert [p._product_id for p in first] == expected[:10]
+            plan = inventory.query_plan(predicate)
+            print(f"{backend:>9} {label:>36} {filter_ms:>9.1f} {query_ms:>9.1f} {first_ms:>9.1f} {len(found):>8,}  {plan}")
+
+
+if __name__ == "__main__":
+    main()
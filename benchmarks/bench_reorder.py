@@ -0,0 +1,71 @@
+"""Benchmark: products due for reorder from the reorder index versus a full scan, and the sell-path cost.
+
+One product in ten gets a reorder point. reorder_products must match the scan, and selling a
+product down past its reorder point one unit at a time must raise exactly one alert.
+
+Usage: python benchmarks/bench_reorder.py [SKUS]   (default: 1000000)
+"""
+import random
+import sys
+import time
+
+from catalog import core, make_products
+
+REORDER_SHARE = 0.1
+SELLS = 20_000
+
+
+def timed(run, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def sell_and_restock(inventory, product_ids):
+    start = time.perf_counter()
+    for pid in product_ids:
+        inventory.sell_product(pid, 1)
+        inventory.restock_product(pid, 1)
+    return (time.perf_counter() - start) / (2 * len(product_ids)) * 1e6
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(11)
+    points = {pid: rng.randint(0, 50) for pid in range(1, skus + 1) if rng.random() < REORDER_SHARE}
+    watched = list(points)
+    sold = [rng.choice(watched) for _ in range(SELLS)]
+    print(f"{skus:,} SKUs, {len(points):,} with a reorder point; ms (best of 3), sells in us per call")
+    print(f"{'backend':>9} {'scan':>9} {'list':>9} {'first 50':>9} {'count':>9} {'due':>8} {'sell, no points':>16} "
+          f"{'sell':>8}")
+    for backend, cls in core.INVENTORY_BACKENDS.items():
+        inventory = cls()
+        for product in make_products(skus, seed=5):
+            inventory.add_product(product)
+        plain = sell_and_restock(inventory, sold)
+        for pid, point in points.items():
+            inventory.set_reorder_point(pid, point)
+        with_points = sell_and_restock(inventory, sold)
+
+        scan_ms, expected = timed(lambda: [p._product_id for p in inventory.list_all_products() if p.needs_reorder()])
+        list_ms, found = timed(lambda: [p._product_id for p in inventory.reorder_products()])
+        page_ms, page = timed(lambda: [p._product_id for p in inventory.reorder_products(50)])
+        count_ms, count = timed(inventory.reorder_count)
+        assert found == expected and page == expected[:50] and count == len(expected), backend
+
+        # Sell one product down to zero: only the step onto its reorder point is an alert
+        pid = next(pid for pid, point in points.items() if inventory.get_product(pid)._quantity_in_stock > point)
+        last = inventory.reorder_alerts()[-1].seq if inventory.reorder_alerts() else 0
+        while inventory.get_product(pid)._quantity_in_stock:
+            inventory.sell_product(pid, 1)
+        alerts = inventory.reorder_alerts(after=last)
+        assert [(a.product_id, a.quantity_in_stock) for a in alerts] == [(pid, points[pid])], alerts
+        print(f"{backend:>9} {scan_ms:>9.1f} {list_ms:>9.1f} {page_ms:>9.2f} {count_ms:>9.2f} {count:>8,} "
+              f"{plain:>16.2f} {with_points:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
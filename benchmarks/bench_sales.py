@@ -0,0 +1,88 @@
+"""Benchmark: sales analytics from the ledger's rollups versus aggregating the raw sales.
+
+Records SALES sales spread over the last year, then answers "units and revenue per day",
+"per month" and "top 10 products" from the rollups, from the ledger's NumPy records, and
+from a plain list of sale dicts; all three must agree.
+
+Usage: python benchmarks/bench_sales.py [SALES] [PRODUCTS]   (default: 1000000 100000)
+"""
+import heapq
+import random
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from catalog import core
+
+DAYS = 365
+
+
+def timed(run, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def from_records(ledger, days):
+    """Per-day units and top products by revenue, computed from the ledger's raw record arrays."""
+    count = len(ledger)
+    ordinals = np.array([date.fromtimestamp(t).toordinal() for t in ledger._times[:count].tolist()])
+    quantities = ledger._quantities[:count]
+    revenue = quantities * ledger._prices[:count]
+    first = date.today().toordinal() - days + 1
+    units_by_day = np.bincount(ordinals - first, weights=quantities, minlength=days)
+    by_product = np.bincount(ledger._codes[:count], weights=revenue)
+    top = np.argsort(-by_product, kind="stable")[:10]
+    return units_by_day.astype(np.int64).tolist(), [ledger._product_ids[code] for code in top.tolist()]
+
+
+def from_events(events, days):
+    first = date.today().toordinal() - days + 1
+    units_by_day = [0] * days
+    by_product = {}
+    for event in events:
+        units_by_day[datetime.fromtimestamp(event["time"]).toordinal() - first] += event["quantity"]
+        by_product[event["product_id"]] = by_product.get(event["product_id"], 0) + event["quantity"] * event["price"]
+    return units_by_day, [pid for pid, _ in heapq.nlargest(10, by_product.items(), key=lambda item: item[1])]
+
+
+def main():
+    sales = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(3)
+    prices = [round(rng.uniform(10, 5000), 2) for _ in range(products + 1)]
+    now = time.time()
+    # Sorted by time, as live sales arrive; the rollups only ever see each day start once
+    stream = sorted((now - rng.uniform(0, (DAYS - 1) * 86400), int(rng.paretovariate(1.2)) % products + 1,
+                     rng.randint(1, 5)) for _ in range(sales))
+
+    ledger = core.SalesLedger(capacity=sales)
+    start = time.perf_counter()
+    for when, pid, quantity in stream:
+        ledger.record(pid, quantity, prices[pid], when)
+    record_us = (time.perf_counter() - start) / sales * 1e6
+    events = [{"time": when, "product_id": pid, "quantity": quantity, "price": prices[pid]}
+              for when, pid, quantity in stream]
+
+    rollup_ms, (daily, top) = timed(lambda: ([units for _, units, _ in ledger.daily(DAYS)],
+                                             [pid for pid, _, _ in ledger.top_products(10)]))
+    monthly_ms, _ = timed(ledger.monthly)
+    records_ms, from_arrays = timed(lambda: from_records(ledger, DAYS), repeat=1)
+    events_ms, from_list = timed(lambda: from_events(events, DAYS), repeat=1)
+    assert daily == from_arrays[0] == from_list[0]
+    assert top == from_arrays[1] == from_list[1]
+
+    print(f"{sales:,} sales of {products:,} products over {DAYS} days")
+    print(f"record: {record_us:.2f} us per sale; {ledger.nbytes() / 2**20:.1f} MiB of records")
+    print(f"{'daily units + top 10, ms':>28} {'rollups':>9} {'records':>9} {'dict list':>9}")
+    print(f"{'':>28} {rollup_ms:>9.2f} {records_ms:>9.1f} {events_ms:>9.1f}")
+    print(f"monthly rollup: {monthly_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Compare Inventory.search_by_name against the old full linear scan."""
+import time
+
+from catalog import make_inventory
+
+QUERIES = ["milk", "Wireless Phone", "org", "ee", "denim jacket", "zzz", "tea 4"]
+REPEAT = 20
+
+
+def linear_search(inventory, name):
+    # The pre-index implementation of search_by_name
+    return [p for p in inventory._products.values() if name.lower() in p._name.lower()]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(*args)
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    print(f"{'SKUs':>8} {'query':>16} {'hits':>7} {'scan ms':>9} {'index ms':>9} {'speedup':>8}")
+    for size in (1_000, 10_000, 100_000, 300_000):
+        inventory = make_inventory(size)
+        for query in QUERIES:
+            expected = linear_search(inventory, query)
+            assert inventory.search_by_name(query) == expected, query
+            scan = timed(linear_search, inventory, query)
+            indexed = timed(inventory.search_by_name, query)
+            print(f"{size:>8} {query:>16} {len(expected):>7} {scan * 1e3:>9.3f} "
+                  f"{indexed * 1e3:>9.3f} {scan / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Load test: per-session Inventory copies versus one SharedInventory.
+
+Each simulated session is a thread that loads the catalog (or attaches to the shared
+one), then performs dashboard-style reruns with an occasional sale.
+
+Usage: python benchmarks/bench_shared.py [SESSIONS ...]   (default: 1 10 25)
+"""
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from catalog import core, make_inventory
+
+CATALOG_SIZE = 20_000
+RERUNS = 20
+
+
+def rerun(inventory, session, step):
+    # Roughly what show_dashboard reads, plus a sale every few reruns
+    inventory.product_count()
+    inventory.total_inventory_value()
+    inventory.expired_count()
+    [inventory.count_by_type(t) for t in core.COLUMNAR_TYPES]
+    len(inventory.list_all_products())
+    if step % 4 == 0:
+        inventory.sell_product((session * RERUNS + step) % CATALOG_SIZE + 1, 1)
+
+
+def run(sessions, filename, shared):
+    gc.collect()
+    tracemalloc.start()
+    latencies = []
+    start = time.perf_counter()
+    shared_inventory = None
+    if shared:
+        shared_inventory = core.SharedInventory(core.Inventory())
+        shared_inventory.load_from_file(filename)
+    barrier = threading.Barrier(sessions)
+    inventories = []
+
+    def session(number):
+        inventory = shared_inventory
+        if inventory is None:
+            inventory = core.Inventory()
+            inventory.load_from_file(filename)
+        inventories.append(inventory)
+        barrier.wait()
+        for step in range(RERUNS):
+            began = time.perf_counter()
+            rerun(inventory, number, step)
+            latencies.append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return memory, elapsed, statistics.median(latencies), p99
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 10, 25]
+    filename = os.path.join(tempfile.mkdtemp(), "inventory.json")
+    make_inventory(CATALOG_SIZE).save_to_file(filename)
+    print(f"{CATALOG_SIZE:,} SKUs, {RERUNS} reruns per session (timings under tracemalloc)")
+    print(f"{'sessions':>8} {'mode':>12} {'memory MB':>10} {'wall s':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for sessions in counts:
+        for shared in (False, True):
+            memory, elapsed, p50, p99 = run(sessions, filename, shared)
+            mode = "shared" if shared else "per-session"
+            print(f"{sessions:>8} {mode:>12} {memory / 1e6:>10.1f} {elapsed:>7.1f} {p50 * 1e3:>8.2f} {p99 * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Cold-open time of a binary snapshot versus loading the same inventory from JSON.
+
+Usage: python benchmarks/bench_snapshot.py [SKUS ...]   (default: 100000 1000000)
+The files are freshly written, so timings are with a warm page cache.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from catalog import core, make_products
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def dashboard_metrics(inventory):
+    # What display_summary_metrics and display_product_distribution read
+    return (inventory.product_count(), inventory.total_inventory_value(), inventory.expired_count(),
+            [inventory.count_by_type(t) for t in core.COLUMNAR_TYPES])
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    workdir = tempfile.mkdtemp()
+    json_file = os.path.join(workdir, "inventory.json")
+    snap_file = os.path.join(workdir, "inventory" + core.SNAPSHOT_SUFFIX)
+    for size in sizes:
+        source = core.ColumnarInventory()
+        for product in make_products(size):
+            source.add_product(product)
+        source.save_to_file(json_file)
+        convert_ms, _ = timed(core.convert_inventory_file, json_file, snap_file)
+        del source
+        print(f"--- {size:,} SKUs: json {os.path.getsize(json_file) / 1e6:.0f} MB, "
+              f"snapshot {os.path.getsize(snap_file) / 1e6:.0f} MB, json -> snapshot {convert_ms / 1e3:.1f}s")
+
+        json_ms, _ = timed(core.Inventory().load_from_file, json_file)
+        snapshot = core.ColumnarInventory()
+        open_ms, _ = timed(snapshot.load_from_file, snap_file)
+        metrics_ms, metrics = timed(dashboard_metrics, snapshot)
+        lookup_ms, product = timed(snapshot.get_product, size // 2)
+        print(f"{'load json (dict backend)':>30}: {json_ms:10.1f} ms")
+        print(f"{'open snapshot (mmap)':>30}: {open_ms:10.1f} ms")
+        print(f"{'dashboard metrics':>30}: {metrics_ms:10.1f} ms  {metrics[:3]}")
+        print(f"{'first product lookup':>30}: {lookup_ms:10.1f} ms  ({product._name})")
+
+
+if __name__ == "__main__":
+    main()
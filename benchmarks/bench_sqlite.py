@@ -0,0 +1,62 @@
+"""Query and update latency of the dict and SQLite Inventory backends.
+
+Usage: python benchmarks/bench_sqlite.py [SKUS ...]   (default: 10000 100000)
+"""
+import sys
+import time
+
+from catalog import core, make_products
+
+REPEAT = 5
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(*args)
+    return (time.perf_counter() - start) / REPEAT * 1e3, result
+
+
+def sell_and_restock(inventory, size):
+    for pid in range(1, size + 1, max(size // 200, 1)):
+        inventory.sell_product(pid, 1)
+        inventory.restock_product(pid, 1)
+
+
+def operations(inventory, size):
+    return {
+        "search name 'milk'": lambda: [p._product_id for p in inventory.search_by_name("milk")],
+        "search name 'Denim Jacket'": lambda: [p._product_id for p in inventory.search_by_name("Denim Jacket")],
+        "search type Grocery": lambda: len(inventory.search_by_type("Grocery")),
+        "count by type": lambda: [inventory.count_by_type(t) for t in core.COLUMNAR_TYPES],
+        "total value": lambda: round(inventory.total_inventory_value(), 2),
+        "expired count": inventory.expired_count,
+        "400 sell/restock calls": lambda: sell_and_restock(inventory, size),
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for size in sizes:
+        backends = {"dict": core.Inventory(), "sqlite": core.SQLiteInventory(":memory:")}
+        for inventory in backends.values():
+            start = time.perf_counter()
+            for product in make_products(size):
+                inventory.add_product(product)
+            print(f"{size:>8,} SKUs: built {type(inventory).__name__} in {time.perf_counter() - start:.1f}s")
+        
+        print(f"{'operation':>28} {'dict ms':>9} {'sqlite ms':>10}")
+        dict_ops = operations(backends["dict"], size)
+        sqlite_ops = operations(backends["sqlite"], size)
+        for label in dict_ops:
+            dict_ms, expected = timed(dict_ops[label])
+            sqlite_ms, result = timed(sqlite_ops[label])
+            assert result == expected, label
+            print(f"{label:>28} {dict_ms:>9.3f} {sqlite_ms:>10.3f}")
+        
+        removed = {label: timed(inventory.remove_expired_products)[0] for label, inventory in backends.items()}
+        print(f"{'remove expired (first call)':>28} {removed['dict'] * REPEAT:>9.3f} {removed['sqlite'] * REPEAT:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: cold start, from a fresh interpreter to the inventory core and the first page.
+
+Each measurement runs in a new process so nothing is already imported. The -X importtime
+report lists the slowest modules behind each entry point and whether pandas was loaded;
+the render row times AppTest's first run of the default Dashboard page.
+
+Usage: python benchmarks/bench_startup.py [RUNS]   (default: 5)
+"""
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TOP = 6
+ENTRY_POINTS = {
+    "inventory_core": "import inventory_core",
+    "app (no page)": "import app",
+}
+FIRST_RENDER = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.path.insert(0, {root!r})
+app = AppTest.from_file({script!r})
+start = time.perf_counter()
+app.run(timeout=120)
+assert not app.exception, app.exception
+print(time.perf_counter() - start, "pandas" in sys.modules)
+"""
+
+
+def python(*args):
+    done = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return done.stdout, done.stderr
+
+
+def import_report(statement):
+    """(total ms, pandas imported, [(self ms, module)] slowest first) from -X importtime."""
+    _, stderr = python("-X", "importtime", "-c", statement)
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            own, cumulative, module = line[len("import time:"):].split("|")
+            rows.append((int(own) / 1000, int(cumulative) / 1000, module.rstrip()))
+    total = sum(own for own, _, _ in rows)
+    pandas = any(module.strip() == "pandas" for _, _, module in rows)
+    return total, pandas, sorted(((own, module.strip()) for own, _, module in rows), reverse=True)[:TOP]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"median of {runs} fresh processes")
+    for label, statement in ENTRY_POINTS.items():
+        reports = [import_report(statement) for _ in range(runs)]
+        total = statistics.median(report[0] for report in reports)
+        print(f"\n{label}: {total:.0f} ms to import, pandas {'loaded' if reports[0][1] else 'not loaded'}")
+        for own, module in reports[0][2]:
+            print(f"{own:>10.1f} ms  {module}")
+
+    script = FIRST_RENDER.format(root=str(ROOT), script=str(ROOT / "app.py"))
+    renders = [python("-c", script)[0].split() for _ in range(runs)]
+    seconds = statistics.median(float(render[0]) for render in renders)
+    print(f"\nfirst Dashboard render: {seconds * 1000:.0f} ms, pandas {'loaded' if renders[0][1] == 'True' else 'not loaded'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: Dashboard reruns with and without memoizing on the inventory version.
+
+A rerun with no change in between (switching pages, widget clicks) should reuse the metrics,
+distribution and table page; after a sale everything is recomputed and must be fresh.
+
+Usage: python benchmarks/bench_versions.py [SKUS]   (default: 100000)
+"""
+import sys
+import time
+
+from catalog import core, make_products
+
+import app  # the Streamlit front end; expect bare-mode warnings on stderr
+
+RERUNS = 20
+PAGE = (0, 25, None, False, None, "")
+
+
+def dashboard(inventory):
+    metrics = app.summary_metrics(inventory)
+    distribution = app.type_distribution(inventory)
+    total, rows = app.product_table_page(inventory, *PAGE)
+    return metrics, distribution, total, rows
+
+
+def uncached(inventory):
+    metrics = (inventory.product_count(), inventory.total_inventory_value(), inventory.expired_count(),
+               inventory.reorder_count())
+    distribution = [inventory.count_by_type(t) for t in ("Electronics", "Grocery", "Clothing")]
+    total, products = inventory.query_page(*PAGE)
+    return metrics, distribution, total, [app.create_product_row(p) for p in products]
+
+
+def per_rerun(run):
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        result = run()
+    return (time.perf_counter() - start) / RERUNS * 1000, result
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{skus:,} SKUs, ms per Dashboard rerun")
+    print(f"{'backend':>9} {'no memo':>9} {'unchanged':>10} {'after sell':>11}")
+    for backend in core.INVENTORY_BACKENDS:
+        inventory = core.INVENTORY_BACKENDS[backend]()
+        for product in make_products(skus, seed=8):
+            inventory.add_product(product)
+
+        plain, expected = per_rerun(lambda: uncached(inventory))
+        dashboard(inventory)
+        version = inventory.version()
+        memo, result = per_rerun(lambda: dashboard(inventory))
+        assert result == expected and inventory.version() == version
+
+        first = inventory.query_page(0, 1)[1][0]
+        inventory.restock_product(first._product_id, 3)
+        assert inventory.version() > version
+        start = time.perf_counter()
+        result = dashboard(inventory)
+        changed = (time.perf_counter() - start) * 1000
+        assert result == uncached(inventory)
+        assert result[3][0]["Stock"] == first._quantity_in_stock
+        print(f"{backend:>9} {plain:>9.2f} {memo:>10.3f} {changed:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
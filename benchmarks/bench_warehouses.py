@@ -0,0 +1,90 @@
+"""Benchmark: loading several warehouses' inventory files with 1, 2, 4, ... parsing processes.
+
+Each warehouse file holds its own slice of the catalog plus a tenth of the next warehouse's
+products, so merging with on_duplicate="sum" has real duplicates to add up. Every worker
+count must produce the same inventory, with stock equal to the per-warehouse sums.
+
+Parsing runs in the workers; storing the merged catalog stays in this process, which bounds
+the speedup.
+
+Usage: python benchmarks/bench_warehouses.py [SKUS] [WAREHOUSES]   (default: 800000 8)
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from catalog import core, make_products
+
+OVERLAP = 0.1
+
+
+def summary(inventory):
+    return (inventory.product_count(), round(inventory.total_inventory_value(), 2),
+            sorted(inventory.warehouse_totals().items()))
+
+
+def write_warehouses(products, warehouses, directory):
+    """Save one JSON file per warehouse; returns the filenames and the expected stock per product."""
+    share = len(products) // warehouses
+    files = []
+    expected = {}
+    for w in range(warehouses):
+        start = w * share
+        end = len(products) if w == warehouses - 1 else start + share
+        shared = products[end:end + int(share * OVERLAP)]
+        inventory = core.Inventory()
+        for product in products[start:end] + shared:
+            inventory.add_product(core.product_from_dict(product.to_dict()))
+            expected[product._product_id] = expected.get(product._product_id, 0) + product._quantity_in_stock
+        filename = os.path.join(directory, f"warehouse{w + 1}.json")
+        ok, message = inventory.save_to_file(filename)
+        assert ok, message
+        files.append(filename)
+    return files, expected
+
+
+def main():
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 800_000
+    warehouses = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    products = list(make_products(skus, seed=9))
+    with tempfile.TemporaryDirectory() as directory:
+        files, expected = write_warehouses(products, warehouses, directory)
+        size = sum(os.path.getsize(f) for f in files) / 2**20
+        print(f"{skus:,} SKUs in {warehouses} files ({size:.0f} MiB), {os.cpu_count()} CPU(s); seconds")
+        print(f"{'workers':>8} {'load':>8} {'speedup':>8}")
+
+        counts = [1]
+        while counts[-1] * 2 <= warehouses:
+            counts.append(counts[-1] * 2)
+        baseline = reference = None
+        for workers in counts:
+            inventory = core.Inventory()
+            gc.collect()
+            start = time.perf_counter()
+            loaded = inventory.load_from_files(files, on_duplicate="sum", workers=workers)
+            elapsed = time.perf_counter() - start
+            assert loaded == len(expected) and inventory.check_consistency() == []
+            sample = range(1, skus + 1, max(1, skus // 1000))
+            assert all(inventory.get_product(pid)._quantity_in_stock == expected[pid] for pid in sample)
+            if reference is None:
+                baseline, reference = elapsed, summary(inventory)
+            assert summary(inventory) == reference, workers
+            print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x")
+
+        # The merged products are stored in this process whatever the worker count
+        products, _ = core.merge_warehouses(zip(files, map(core.read_inventory_file, files)), "sum")
+        start = time.perf_counter()
+        core.Inventory()._replace_products(products)
+        print(f"storing the merged products takes {time.perf_counter() - start:.2f} of those seconds in every run")
+        
+        try:
+            core.Inventory().load_from_files(files, workers=1)
+            raise AssertionError("overlapping warehouses loaded without on_duplicate")
+        except core.DuplicateProductError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
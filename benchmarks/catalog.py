@@ -0,0 +1,47 @@
+"""Synthetic catalogs shared by the benchmark scripts.
+
+Run the scripts from the repository root, e.g. ``python benchmarks/bench_search.py``.
+"""
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import inventory_core as core  # noqa: E402
+
+WORDS = [
+    "organic", "wireless", "cotton", "smart", "classic", "premium", "fresh", "ultra",
+    "slim", "basmati", "denim", "silk", "bluetooth", "digital", "woolen", "green",
+    "phone", "laptop", "shirt", "jeans", "rice", "milk", "bread", "speaker",
+    "jacket", "tea", "charger", "scarf", "monitor", "butter", "kurta", "headset",
+]
+BRANDS = ["Samsung", "Sony", "Dell", "Haier", "Orient", "Nokia"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+MATERIALS = ["Cotton", "Wool", "Silk", "Denim", "Linen"]
+
+
+def make_products(n, seed=42):
+    """Yield n products, an even mix of the three product types."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=60)
+    for pid in range(1, n + 1):
+        name = " ".join(rng.sample(WORDS, 3)).title() + f" {pid % 997}"
+        price = round(rng.uniform(10, 5000), 2)
+        stock = rng.randint(0, 500)
+        kind = pid % 3
+        if kind == 0:
+            yield core.Electronics(pid, name, price, stock, rng.randint(0, 5), rng.choice(BRANDS))
+        elif kind == 1:
+            expiry = start + timedelta(days=rng.randint(0, 365))
+            yield core.Grocery(pid, name, price, stock, expiry.strftime("%Y-%m-%d"))
+        else:
+            yield core.Clothing(pid, name, price, stock, rng.choice(SIZES), rng.choice(MATERIALS))
+
+
+def make_inventory(n, seed=42):
+    inventory = core.Inventory()
+    for product in make_products(n, seed):
+        inventory.add_product(product)
+    return inventory
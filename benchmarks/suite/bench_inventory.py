@@ -0,0 +1,104 @@
+"""Core Inventory operations on every backend, timed with pytest-benchmark.
+
+Benchmarks that change the catalog build their own inventory outside the timed call;
+the rest share one filled inventory per backend and size.
+"""
+from itertools import cycle
+
+import pytest
+
+from conftest import catalog, core, filled
+
+ROUNDS = 3
+QUERIES = ["smart", "denim jacket", "zzz"]
+SAVE_SUFFIXES = [".json", ".jsonl", core.SNAPSHOT_SUFFIX]
+
+
+def bench_add_product(benchmark, backend, skus):
+    def fill(inventory, products):
+        for product in products:
+            inventory.add_product(product)
+
+    benchmark.pedantic(fill, setup=lambda: ((core.INVENTORY_BACKENDS[backend](), catalog(skus)), {}),
+                       rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def bench_search_by_name(benchmark, inventory, query):
+    found = benchmark(inventory.search_by_name, query)
+    assert all(query.split()[0] in product._name.lower() for product in found)
+
+
+@pytest.mark.parametrize("product_type", core.COLUMNAR_TYPES)
+def bench_search_by_type(benchmark, inventory, product_type):
+    found = benchmark(inventory.search_by_type, product_type)
+    assert found and all(type(product).__name__ == product_type for product in found)
+
+
+def bench_sell_and_restock(benchmark, inventory, skus):
+    # Restocking first keeps every sale valid and leaves the stock where it was
+    ids = cycle(range(1, skus + 1, max(1, skus // 1000)))
+
+    def sell_and_restock():
+        product_id = next(ids)
+        inventory.restock_product(product_id, 1)
+        inventory.sell_product(product_id, 1)
+
+    benchmark(sell_and_restock)
+
+
+def bench_total_inventory_value(benchmark, inventory):
+    assert benchmark(inventory.total_inventory_value) > 0
+
+
+def bench_reorder_products(benchmark, backend, skus):
+    # Reorder points are a change to the catalog, so this one builds its own inventory
+    inventory = filled(backend, skus)
+    for product_id in range(1, skus + 1, 10):
+        inventory.set_reorder_point(product_id, 50)
+    due = benchmark(inventory.reorder_products)
+    assert due and all(product.needs_reorder() for product in due)
+
+
+def bench_remove_expired_products(benchmark, backend, skus):
+    def setup():
+        return (filled(backend, skus),), {}
+
+    benchmark.pedantic(lambda inventory: inventory.remove_expired_products(), setup=setup, rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("suffix", SAVE_SUFFIXES)
+def bench_save_to_file(benchmark, inventory, suffix, tmp_path):
+    filename = str(tmp_path / f"catalog{suffix}")
+    ok, message = benchmark(inventory.save_to_file, filename)
+    assert ok, message
+
+
+@pytest.mark.parametrize("suffix", SAVE_SUFFIXES)
+def bench_load_from_file(benchmark, inventory, backend, suffix, tmp_path):
+    filename = str(tmp_path / f"catalog{suffix}")
+    assert inventory.save_to_file(filename)[0]
+    expected = (inventory.product_count(), round(inventory.total_inventory_value(), 2))
+
+    def load(target):
+        ok, message = target.load_from_file(filename)
+        assert ok, message
+        return target
+
+    loaded = benchmark.pedantic(load, setup=lambda: ((core.INVENTORY_BACKENDS[backend](),), {}), rounds=ROUNDS)
+    assert (loaded.product_count(), round(loaded.total_inventory_value(), 2)) == expected
+
+
+def bench_load_from_files(benchmark, inventory, backend, tmp_path):
+    # Two warehouses holding the same catalog, merged by adding up their stock
+    files = [str(tmp_path / f"{warehouse}.json") for warehouse in ("east", "west")]
+    for filename in files:
+        assert inventory.save_to_file(filename)[0]
+    expected = (inventory.product_count(), round(2 * inventory.total_inventory_value(), 2))
+
+    def load(target):
+        target.load_from_files(files, on_duplicate="sum")
+        return target
+
+    loaded = benchmark.pedantic(load, setup=lambda: ((core.INVENTORY_BACKENDS[backend](),), {}), rounds=ROUNDS)
+    assert (loaded.product_count(), round(loaded.total_inventory_value(), 2)) == expected
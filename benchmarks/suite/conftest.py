@@ -0,0 +1,69 @@
+"""Fixtures for the pytest-benchmark suite: synthetic catalogs per backend and size.
+
+Results are stored in benchmarks/suite/.results wherever pytest runs from:
+
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks/suite --benchmark-autosave
+    python -m pytest benchmarks/suite --benchmark-compare --benchmark-compare-fail=median:15%
+
+INVENTORY_BENCH_SKUS picks the catalog sizes (default "1000,10000"); add 100000 and 1000000
+for the large runs, which take minutes per backend. INVENTORY_BENCH_BACKENDS narrows the
+backends (default: all of them).
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog import core, make_products  # noqa: E402
+
+SKUS = [int(n) for n in os.environ.get("INVENTORY_BENCH_SKUS", "1000,10000").split(",")]
+BACKENDS = os.environ.get("INVENTORY_BENCH_BACKENDS", ",".join(core.INVENTORY_BACKENDS)).split(",")
+
+RESULTS = Path(__file__).resolve().parent / ".results"
+DEFAULT_STORAGE = "file://./.benchmarks"  # pytest-benchmark's default, relative to the current directory
+
+_records = {}
+_loaded = {}
+
+
+def pytest_configure(config):
+    # Runs before pytest-benchmark opens its storage; an explicit --benchmark-storage still wins
+    if config.getoption("benchmark_storage") == DEFAULT_STORAGE:
+        config.option.benchmark_storage = RESULTS.as_uri()
+
+
+def size_id(skus):
+    return f"{skus // 1_000_000}M" if skus % 1_000_000 == 0 else f"{skus // 1000}k" if skus % 1000 == 0 else str(skus)
+
+
+def pytest_generate_tests(metafunc):
+    if "backend" in metafunc.fixturenames:
+        metafunc.parametrize("backend", BACKENDS)
+    if "skus" in metafunc.fixturenames:
+        metafunc.parametrize("skus", SKUS, ids=size_id)
+
+
+def catalog(skus):
+    """Fresh Product objects for a catalog of the given size; the dict backend keeps the objects."""
+    if skus not in _records:
+        _records[skus] = [product.to_dict() for product in make_products(skus)]
+    return [core.product_from_dict(record) for record in _records[skus]]
+
+
+def filled(backend, skus):
+    inventory = core.INVENTORY_BACKENDS[backend]()
+    for product in catalog(skus):
+        inventory.add_product(product)
+    return inventory
+
+
+@pytest.fixture
+def inventory(backend, skus):
+    """A filled inventory shared by every benchmark that leaves the catalog as it found it."""
+    if (backend, skus) not in _loaded:
+        _loaded[backend, skus] = filled(backend, skus)
+    return _loaded[backend, skus]
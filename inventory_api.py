@@ -0,0 +1,344 @@
+"""JSON-over-HTTP API for point-of-sale terminals and scripts, without a browser or Streamlit.
+
+    python inventory_api.py --port 8080 --journal inventory.jsonl
+    
+    POST /sell       {"product_id": 7, "quantity": 2}
+    POST /restock    {"product_id": 7, "quantity": 10}
+    GET  /products?name=phone&type=Electronics&sort_by=price&descending=1&offset=0&limit=50
+    GET  /products/7
+    GET  /valuation
+    GET  /reorder?after=0&limit=50      products due for reorder, and alerts with a seq above after
+    GET  /sales?days=30&top=10          units and revenue per day, and the best sellers
+
+Runs on asyncio's own streams; InventoryAPI is also an ASGI app, so a local ASGI server works
+too (uvicorn --factory inventory_api:create_app). Concurrent sells and restocks are coalesced into
+sell_many / restock_many micro-batches: one lock round and one journal write per batch.
+"""
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+from inventory_core import (
+    COLUMNAR_TYPES, LEDGER_DAYS, PAGE_SORT_FIELDS, PICKER_LIMIT, SharedInventory, create_inventory,
+)
+
+BATCH_MAX_LINES = 1000
+# 0: a batch is whatever queued up while the previous one ran, which measured faster than waiting
+BATCH_MAX_WAIT = float(os.environ.get("INVENTORY_API_BATCH_WAIT_MS", "0")) / 1000
+MAX_BODY = 64 * 1024
+MAX_PAGE = 1000
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-line requests into one batch call on a worker thread.
+    
+    One batch is in flight at a time; lines that arrive meanwhile (or within max_wait) form
+    the next one. apply is sell_many or restock_many, which reject the whole batch if any line
+    fails, so failed lines are dropped and the rest retried: every request ends exactly as it
+    would have on its own, in arrival order.
+    """
+    
+    def __init__(self, apply, max_lines=BATCH_MAX_LINES, max_wait=BATCH_MAX_WAIT):
+        self._apply = apply
+        self.max_lines = max_lines
+        self.max_wait = max_wait
+        self._pending = []
+        self._worker = None
+        self.batches = 0
+    
+    async def submit(self, product_id, quantity):
+        """Wait for the line's batch; returns None, or the reason the line was rejected."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((product_id, quantity, future))
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._drain())
+        return await future
+    
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                if self.max_wait and len(self._pending) < self.max_lines:
+                    await asyncio.sleep(self.max_wait)
+                batch, self._pending = self._pending[:self.max_lines], self._pending[self.max_lines:]
+                try:
+                    reasons = await loop.run_in_executor(None, self._settle, [line[:2] for line in batch])
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), reason in zip(batch, reasons):
+                    if not future.done():
+                        future.set_result(reason)
+        finally:
+            self._worker = None
+    
+    def _settle(self, lines):
+        reasons = [None] * len(lines)
+        todo = list(range(len(lines)))
+        while todo:
+            self.batches += 1
+            result = self._apply([lines[i] for i in todo])
+            if result.ok:
+                break
+            failed = {error.line - 1 for error in result.errors}
+            for error in result.errors:
+                reasons[todo[error.line - 1]] = error.reason
+            todo = [index for position, index in enumerate(todo) if position not in failed]
+        return reasons
+
+
+def line_status(reason):
+    if reason == "Product not found":
+        return 404
+    if reason.startswith("Not enough stock"):
+        return 409
+    return 400
+
+
+def positive_int(value, field):
+    if type(value) is not int or value <= 0:
+        raise ApiError(400, f"{field} must be a positive integer")
+    return value
+
+
+class InventoryAPI:
+    """Routes requests to an Inventory; handle() does the work, the servers only move bytes."""
+    
+    def __init__(self, inventory=None, batch_wait=BATCH_MAX_WAIT, batch_lines=BATCH_MAX_LINES):
+        self.inventory = inventory if inventory is not None else SharedInventory(create_inventory())
+        self.sells = MicroBatcher(self.inventory.sell_many, batch_lines, batch_wait)
+        self.restocks = MicroBatcher(self.inventory.restock_many, batch_lines, batch_wait)
+    
+    async def handle(self, method, target, body):
+        """Return (status, JSON-ready payload) for one request."""
+        try:
+            url = urlsplit(target)
+            path = url.path.rstrip("/") or "/"
+            if path in ("/sell", "/restock"):
+                if method != "POST":
+                    raise ApiError(405, "Use POST")
+                return await self._stock_change(path[1:], body)
+            if method != "GET":
+                raise ApiError(405, "Use GET")
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if path == "/products":
+                return 200, await asyncio.to_thread(self._search, query)
+            if path.startswith("/products/"):
+                return 200, await asyncio.to_thread(self._product, path[len("/products/"):])
+            if path == "/valuation":
+                return 200, await asyncio.to_thread(self._valuation)
+            if path == "/reorder":
+                return 200, await asyncio.to_thread(self._reorder, query)
+            if path == "/sales":
+                return 200, await asyncio.to_thread(self._sales, query)
+            raise ApiError(404, f"No route for {path}")
+        except ApiError as e:
+            return e.status, {"ok": False, "error": str(e)}
+        except Exception as e:
+            return 500, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    
+    async def _stock_change(self, action, body):
+        try:
+            request = json.loads(body or b"null")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ApiError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise ApiError(400, "Expected a JSON object with product_id and quantity")
+        product_id = positive_int(request.get("product_id"), "product_id")
+        quantity = positive_int(request.get("quantity"), "quantity")
+        batcher = self.sells if action == "sell" else self.restocks
+        reason = await batcher.submit(product_id, quantity)
+        if reason is not None:
+            return line_status(reason), {"ok": False, "error": reason, "product_id": product_id}
+        return 200, {"ok": True, "action": action, "product_id": product_id, "quantity": quantity}
+    
+    def _search(self, query):
+        try:
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", PICKER_LIMIT)), MAX_PAGE)
+        except ValueError:
+            raise ApiError(400, "offset and limit must be integers")
+        if offset < 0 or limit < 0:
+            raise ApiError(400, "offset and limit must not be negative")
+        product_type = query.get("type") or None
+        if product_type is not None and product_type not in COLUMNAR_TYPES:
+            raise ApiError(400, f"type must be one of {', '.join(COLUMNAR_TYPES)}")
+        sort_by = query.get("sort_by") or None
+        if sort_by is not None and sort_by not in PAGE_SORT_FIELDS:
+            raise ApiError(400, f"sort_by must be one of {', '.join(PAGE_SORT_FIELDS)}")
+        descending = query.get("descending", "0") not in ("0", "false", "")
+        total, products = self.inventory.query_page(offset, limit, sort_by, descending, product_type,
+                                                    query.get("name") or None)
+        return {"total": total, "offset": offset, "products": [product.to_dict() for product in products]}
+    
+    def _product(self, product_id):
+        if not product_id.isdecimal():
+            raise ApiError(400, "product_id must be a positive integer")
+        product = self.inventory.get_product(int(product_id))
+        if product is None:
+            raise ApiError(404, "Product not found")
+        return product.to_dict()
+    
+    def _valuation(self):
+        return {
+            "total_value": round(self.inventory.total_inventory_value(), 2),
+            "products": self.inventory.product_count(),
+            "expired": self.inventory.expired_count(),
+            "by_type": {ptype: {"products": self.inventory.count_by_type(ptype),
+                                "value": round(self.inventory.value_by_type(ptype), 2)}
+                        for ptype in COLUMNAR_TYPES},
+        }
+    
+    def _reorder(self, query):
+        try:
+            after = int(query.get("after", 0))
+            limit = min(int(query.get("limit", PICKER_LIMIT)), MAX_PAGE)
+        except ValueError:
+            raise ApiError(400, "after and limit must be integers")
+        if limit < 0:
+            raise ApiError(400, "limit must not be negative")
+        alerts = [{"seq": alert.seq, "product_id": alert.product_id, "name": alert.name,
+                   "quantity_in_stock": alert.quantity_in_stock, "reorder_point": alert.reorder_point,
+                   "time": alert.time.isoformat(timespec="seconds")}
+                  for alert in self.inventory.reorder_alerts(after)]
+        return {
+            "due": self.inventory.reorder_count(),
+            "products": [product.to_dict() for product in self.inventory.reorder_products(limit)],
+            "alerts": alerts,
+        }
+    
+    def _sales(self, query):
+        try:
+            days = int(query.get("days", 30))
+            top = min(int(query.get("top", 10)), MAX_PAGE)
+        except ValueError:
+            raise ApiError(400, "days and top must be integers")
+        if not 0 < days <= LEDGER_DAYS or top < 0:
+            raise ApiError(400, f"days must be 1-{LEDGER_DAYS} and top must not be negative")
+        sales = self.inventory.sales
+        return {
+            "daily": [{"date": day.isoformat(), "units": units, "revenue": round(revenue, 2)}
+                      for day, units, revenue in sales.daily(days)],
+            "top": [{"product_id": product_id, "units": units, "revenue": round(revenue, 2)}
+                    for product_id, units, revenue in sales.top_products(top)],
+        }
+    
+    async def __call__(self, scope, receive, send):
+        """ASGI entry point."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        target = scope["path"] + ("?" + scope["query_string"].decode() if scope.get("query_string") else "")
+        status, payload = await self.handle(scope["method"], target, body)
+        data = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]})
+        await send({"type": "http.response.body", "body": data})
+    
+    async def serve_connection(self, reader, writer):
+        """Minimal HTTP/1.1 with keep-alive, enough for terminals and the load generator."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {"ok": False, "error": "Request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, target, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+def build_inventory(catalog=None, journal=None, sync=False):
+    """A SharedInventory on INVENTORY_BACKEND, loaded from catalog or kept durable by journal."""
+    inventory = create_inventory()
+    if journal:
+        success, message = inventory.open_journal(journal, sync=sync)
+    elif catalog:
+        success, message = inventory.load_from_file(catalog)
+    else:
+        success, message = True, ""
+    if not success:
+        raise SystemExit(message)
+    return SharedInventory(inventory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--load", metavar="FILE", help="catalog to load at start-up")
+    parser.add_argument("--journal", metavar="FILE", help="catalog to open with a journal, so sales survive restarts")
+    parser.add_argument("--sync", action="store_true", help="fsync the journal after every batch")
+    parser.add_argument("--batch-wait-ms", type=float, default=BATCH_MAX_WAIT * 1000,
+                        help="how long a batch waits for more requests; 0 batches only what queued up meanwhile")
+    parser.add_argument("--batch-lines", type=int, default=BATCH_MAX_LINES, help="most requests per batch; 1 turns batching off")
+    args = parser.parse_args()
+    api = InventoryAPI(build_inventory(args.load, args.journal, args.sync), args.batch_wait_ms / 1000, args.batch_lines)
+    print(f"Serving {api.inventory.product_count():,} products on http://{args.host}:{args.port}")
+    asyncio.run(api.serve(args.host, args.port))
+
+def create_app():
+    """ASGI factory, configured from the environment: uvicorn --factory inventory_api:create_app"""
+    return InventoryAPI(build_inventory(os.environ.get("INVENTORY_API_LOAD"),
+                                        os.environ.get("INVENTORY_API_JOURNAL")))
+
+if __name__ == "__main__":
+    main()
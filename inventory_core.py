@@ -0,0 +1,3403 @@
+"""Inventory domain model and storage backends, importable without Streamlit.
+
+app.py is the Streamlit front end; benchmarks and scripts import this module directly.
+"""
+import bisect
+import functools
+import heapq
+import itertools
+import json
+from datetime import date, datetime, timedelta
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+import math
+import operator
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+import weakref
+from pathlib import Path
+
+
+# Abstract Base Class: Product
+class Product(ABC):
+    # Slots instead of a per-instance __dict__; __weakref__ lets ColumnarInventory cache views
+    __slots__ = ("_product_id", "_name", "_price", "_quantity_in_stock", "_reorder_point", "_inventory",
+                 "__weakref__")
+    
+    def __init__(self, product_id, name, price, quantity_in_stock, reorder_point=None):
+        self._product_id = product_id
+        self._name = name
+        self._price = price
+        self._quantity_in_stock = quantity_in_stock
+        self._reorder_point = reorder_point  # alert when stock falls to this or below; None for never
+        self._inventory = None  # set while the product belongs to an Inventory
+    
+    # Pickled as a tuple of these, so products come back from pool workers cheaply and without their inventory
+    _pickled = ("_product_id", "_name", "_price", "_quantity_in_stock", "_reorder_point")
+    
+    def __getstate__(self):
+        return tuple([getattr(self, name) for name in self._pickled])
+    
+    def __setstate__(self, state):
+        for name, value in zip(self._pickled, state):
+            setattr(self, name, value)
+        self._inventory = None
+    
+    def restock(self, amount):
+        if amount > 0:
+            self._quantity_in_stock += amount
+            if self._inventory is not None:
+                self._inventory._stock_changed(self, amount)
+            return True
+        return False
+    
+    def sell(self, quantity):
+        if quantity <= self._quantity_in_stock and quantity > 0:
+            self._quantity_in_stock -= quantity
+            if self._inventory is not None:
+                self._inventory._stock_changed(self, -quantity)
+            return True
+        return False
+    
+    def get_total_value(self):
+        return self._price * self._quantity_in_stock
+    
+    def needs_reorder(self):
+        return self._reorder_point is not None and self._quantity_in_stock <= self._reorder_point
+    
+    @abstractmethod
+    def __str__(self):
+        pass
+    
+    def to_dict(self):
+        data = {
+            "type": self.__class__.__name__,
+            "product_id": self._product_id,
+            "name": self._name,
+            "price": self._price,
+            "quantity_in_stock": self._quantity_in_stock
+        }
+        if self._reorder_point is not None:
+            data["reorder_point"] = self._reorder_point
+        return data
+
+# Subclass: Electronics
+class Electronics(Product):
+    __slots__ = ("_warranty_years", "_brand")
+    _pickled = Product._pickled + __slots__
+    
+    def __init__(self, product_id, name, price, quantity_in_stock, warranty_years, brand, reorder_point=None):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
+        self._warranty_years = warranty_years
+        self._brand = brand
+    
+    def __str__(self):
+        return f"Electronics: {self._name} ({self._brand}), Rs.{self._price}, Stock: {self._quantity_in_stock}, Warranty: {self._warranty_years} yrs"
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            "warranty_years": self._warranty_years,
+            "brand": self._brand
+        })
+        return data
+
+# Subclass: Grocery
+class Grocery(Product):
+    __slots__ = ("_expiry_date", "_expiry")
+    _pickled = Product._pickled + __slots__
+    
+    def __init__(self, product_id, name, price, quantity_in_stock, expiry_date, reorder_point=None):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
+        self._expiry_date = expiry_date
+        # Parsed once here; the string is kept for display and to_dict
+        self._expiry = datetime.strptime(expiry_date, "%Y-%m-%d").date()
+    
+    def is_expired(self, today=None):
+        if today is None:
+            today = date.today()
+        return today > self._expiry
+    
+    def __str__(self):
+        status = " (Expired)" if self.is_expired() else ""
+        return f"Grocery: {self._name}, Rs.{self._price}, Stock: {self._quantity_in_stock}, Expiry: {self._expiry_date}{status}"
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            "expiry_date": self._expiry_date
+        })
+        return data
+
+# Subclass: Clothing
+class Clothing(Product):
+    __slots__ = ("_size", "_material")
+    _pickled = Product._pickled + __slots__
+    
+    def __init__(self, product_id, name, price, quantity_in_stock, size, material, reorder_point=None):
+        super().__init__(product_id, name, price, quantity_in_stock, reorder_point)
+        self._size = size
+        self._material = material
+    
+    def __str__(self):
+        return f"Clothing: {self._name}, Rs.{self._price}, Stock: {self._quantity_in_stock}, Size: {self._size}, Material: {self._material}"
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            "size": self._size,
+            "material": self._material
+        })
+        return data
+
+# Custom Exceptions
+class InsufficientStockError(Exception):
+    pass
+
+class DuplicateProductError(Exception):
+    pass
+
+class InvalidDataError(Exception):
+    pass
+
+class ProductNotFoundError(Exception):
+    pass
+
+# Persistence helpers
+JSON_LINES_SUFFIXES = (".jsonl", ".ndjson")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def reorder_point_value(value):
+    """Check a reorder point: None, or a non-negative integer."""
+    if value is None:
+        return None
+    if not isinstance(value, (int, np.integer)) or isinstance(value, bool) or value < 0:
+        raise ValueError(f"reorder_point must be a non-negative integer, got {value!r}")
+    return int(value)
+
+def product_from_dict(item):
+    """Rebuild a product from a to_dict() record."""
+    try:
+        ptype = item["type"]
+        reorder_point = reorder_point_value(item.get("reorder_point"))
+        if ptype == "Electronics":
+            return Electronics(
+                item["product_id"],
+                item["name"],
+                item["price"],
+                item["quantity_in_stock"],
+                item["warranty_years"],
+                item["brand"],
+                reorder_point
+            )
+        elif ptype == "Grocery":
+            return Grocery(
+                item["product_id"],
+                item["name"],
+                item["price"],
+                item["quantity_in_stock"],
+                item["expiry_date"],
+                reorder_point
+            )
+        elif ptype == "Clothing":
+            return Clothing(
+                item["product_id"],
+                item["name"],
+                item["price"],
+                item["quantity_in_stock"],
+                item["size"],
+                item["material"],
+                reorder_point
+            )
+        raise InvalidDataError(f"Unknown product type: {ptype}")
+    except KeyError as e:
+        raise InvalidDataError(f"Missing required field: {str(e)}")
+    except (TypeError, ValueError) as e:
+        raise InvalidDataError(f"Invalid product data: {str(e)}")
+
+def is_json_lines(filename):
+    return str(filename).lower().endswith(JSON_LINES_SUFFIXES)
+
+def write_json_array(f, records):
+    """Write records as a JSON array, byte-for-byte like json.dump(list(records), f, indent=4)."""
+    first = True
+    for record in records:
+        f.write("[\n    " if first else ",\n    ")
+        f.write(json.dumps(record, indent=4).replace("\n", "\n    "))
+        first = False
+    f.write("[]" if first else "\n]")
+
+def iter_json_lines(f):
+    """Yield one record per non-blank line of a newline-delimited JSON file."""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_json_array(f, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    skip = json.decoder.WHITESPACE.match
+    buffer, pos, eof = "", 0, False
+    state = "start"
+    while True:
+        pos = skip(buffer, pos).end()
+        if pos == len(buffer) and not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        char = buffer[pos:pos + 1]
+        
+        if state == "start":
+            if char != "[":
+                raise json.JSONDecodeError("Expecting '['", buffer, pos)
+            pos += 1
+            state = "first"
+        elif state == "after" and char == ",":
+            pos += 1
+            state = "value"
+        elif state in ("first", "after") and char == "]":
+            rest = buffer[pos + 1:] + f.read()
+            if rest.strip():
+                raise json.JSONDecodeError("Extra data", rest, 0)
+            return
+        elif state == "after":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
+            if end == len(buffer) and not eof:
+                # The value may continue in the next chunk
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item
+            pos = end
+            state = "after"
+
+def iter_file_products(filename):
+    """Yield the products in a file written by save_to_file; raises InvalidDataError for a bad file."""
+    if not os.path.exists(filename):
+        raise InvalidDataError(f"File {filename} does not exist")
+    if is_snapshot(filename):
+        snapshot = ColumnarInventory()
+        snapshot.open_snapshot(filename)
+        for product in snapshot.iter_products():
+            product._inventory = None  # a detached copy, not a view of the throwaway snapshot
+            yield product
+        return
+    
+    record = 0
+    try:
+        with open(filename, 'r') as f:
+            items = iter_json_lines(f) if is_json_lines(filename) else iter_json_array(f)
+            for record, item in enumerate(items, 1):
+                try:
+                    product = product_from_dict(item)
+                except InvalidDataError as e:
+                    raise InvalidDataError(f"Record {record}: {e}")
+                yield product
+    except json.JSONDecodeError:
+        raise InvalidDataError(f"Invalid JSON file (after record {record})")
+
+# Bulk import helpers
+PARQUET_SUFFIXES = (".parquet", ".pq")
+IMPORT_CHUNK_SIZE = 100_000
+IMPORT_MAX_ERRORS = 20
+# Pool size for building products during import; 0 builds them in this process
+IMPORT_WORKERS = int(os.environ.get("INVENTORY_IMPORT_WORKERS", "0"))
+IMPORT_REQUIRED = ("type", "product_id", "name", "price", "quantity_in_stock")
+IMPORT_TEXT = ("brand", "expiry_date", "size", "material")
+IMPORT_INT_LIMIT = 2**53  # numbers are parsed as floats, which hold every integer below this exactly
+
+def is_parquet(filename):
+    return str(filename).lower().endswith(PARQUET_SUFFIXES)
+
+def iter_import_chunks(filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield (DataFrame, fraction of the file read) for a CSV or Parquet catalog."""
+    import pandas as pd  # only imports need pandas; keep it off every other start-up path
+    try:
+        if is_parquet(filename):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise InvalidDataError("Importing Parquet files needs pyarrow")
+            parquet = pq.ParquetFile(filename)
+            total = parquet.metadata.num_rows or 1
+            done = 0
+            for batch in parquet.iter_batches(batch_size=chunk_size):
+                done += batch.num_rows
+                yield batch.to_pandas(), done / total
+            return
+        size = os.path.getsize(filename) or 1
+        with open(filename, "rb") as f:
+            # Everything as text: validation decides what is a number, not the parser
+            for frame in pd.read_csv(f, chunksize=chunk_size, dtype=str, keep_default_na=False):
+                yield frame, min(f.tell() / size, 1.0)
+    except pd.errors.EmptyDataError:
+        raise InvalidDataError("The CSV file is empty: expected a header row naming the columns")
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise InvalidDataError(f"Invalid CSV file: {str(e)}")
+
+def _whole(values):
+    return values.notna() & np.isfinite(values) & (values == values.round())
+
+def validate_import_chunk(frame, first_row):
+    """Check one import chunk with column-wide operations.
+    
+    Returns (normalized frame, number of bad rows, "Row N: reason" messages for the first few).
+    A blank or missing reorder_point becomes NO_REORDER in the normalized frame.
+    """
+    import pandas as pd
+    missing = [column for column in IMPORT_REQUIRED if column not in frame.columns]
+    if missing:
+        raise InvalidDataError(f"Missing column(s): {', '.join(missing)}")
+    
+    def text(column):
+        if column not in frame.columns:
+            return pd.Series("", index=frame.index, dtype=object)
+        values = frame[column]
+        return values.where(values.notna(), "").astype(str)
+    
+    def number(column):
+        if column not in frame.columns:
+            return pd.Series(np.nan, index=frame.index)
+        return pd.to_numeric(frame[column], errors="coerce").astype(float)
+    
+    ptype = text("type").str.strip()
+    ids = number("product_id")
+    names = text("name")
+    prices = number("price")
+    stock = number("quantity_in_stock")
+    warranty = number("warranty_years")
+    expiry = text("expiry_date")
+    reorder = number("reorder_point")
+    reorder_given = text("reorder_point").str.strip() != ""
+    electronics = ptype == "Electronics"
+    grocery = ptype == "Grocery"
+    parsed_expiry = pd.to_datetime(expiry.where(grocery), format="%Y-%m-%d", errors="coerce")
+    
+    # Earlier checks win when a row breaks several
+    checks = [
+        (~ptype.isin(COLUMNAR_TYPES), "unknown product type"),
+        (~_whole(ids) | (ids < 1), "product_id must be a positive integer"),
+        (ids >= IMPORT_INT_LIMIT, f"product_id must be less than {IMPORT_INT_LIMIT}"),
+        (names.str.len() == 0, "name is empty"),
+        (~np.isfinite(prices) | ~(prices > 0), "price must be a positive number"),
+        (~_whole(stock) | (stock < 0), "quantity_in_stock must be a non-negative integer"),
+        (stock >= IMPORT_INT_LIMIT, f"quantity_in_stock must be less than {IMPORT_INT_LIMIT}"),
+        (electronics & (~_whole(warranty) | (warranty < 0)), "warranty_years must be a non-negative integer"),
+        (electronics & (warranty >= IMPORT_INT_LIMIT), f"warranty_years must be less than {IMPORT_INT_LIMIT}"),
+        (grocery & parsed_expiry.isna(), "expiry_date must be YYYY-MM-DD"),
+        (reorder_given & (~_whole(reorder) | (reorder < 0)), "reorder_point must be blank or a non-negative integer"),
+        (reorder_given & (reorder >= IMPORT_INT_LIMIT), f"reorder_point must be less than {IMPORT_INT_LIMIT}"),
+    ]
+    reasons = np.full(len(frame), None, dtype=object)
+    for mask, reason in reversed(checks):
+        reasons[mask.to_numpy()] = reason
+    bad = np.flatnonzero(reasons != None)  # noqa: E711 (elementwise on an object array)
+    messages = [f"Row {first_row + row}: {reasons[row]}" for row in bad[:IMPORT_MAX_ERRORS]]
+    if len(bad):
+        return None, len(bad), messages
+    
+    clean = pd.DataFrame({
+        "type": ptype,
+        "product_id": ids.astype(np.int64),
+        "name": names,
+        "price": prices,
+        "quantity_in_stock": stock.astype(np.int64),
+        "warranty_years": warranty.where(electronics, 0).astype(np.int64),
+        "reorder_point": reorder.where(reorder_given, NO_REORDER).astype(np.int64),
+    })
+    for column in IMPORT_TEXT:
+        clean[column] = text(column)
+    return clean.reset_index(drop=True), 0, []
+
+def products_from_frame(frame):
+    """Build products from a validated import chunk; top-level so pool workers can run it."""
+    products = []
+    rows = zip(frame["type"].tolist(), frame["product_id"].tolist(), frame["name"].tolist(),
+               frame["price"].tolist(), frame["quantity_in_stock"].tolist(), frame["warranty_years"].tolist(),
+               frame["brand"].tolist(), frame["expiry_date"].tolist(), frame["size"].tolist(),
+               frame["material"].tolist(), frame["reorder_point"].tolist())
+    for ptype, pid, name, price, stock, warranty, brand, expiry, size, material, reorder in rows:
+        reorder = None if reorder == NO_REORDER else reorder
+        if ptype == "Electronics":
+            products.append(Electronics(pid, name, price, stock, warranty, brand, reorder))
+        elif ptype == "Grocery":
+            products.append(Grocery(pid, name, price, stock, expiry, reorder))
+        else:
+            products.append(Clothing(pid, name, price, stock, size, material, reorder))
+    return products
+
+def import_pool(workers):
+    """A process pool for products_from_frame and read_inventory_file.
+    
+    Workers start from a forkserver (spawn where there is none), never as forks of this process:
+    Streamlit and the API serve from many threads, and a fork inherits whatever locks they hold.
+    The workers only parse and build products; they never touch a live inventory.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # The server imports these once and every worker forks from it, already loaded
+        context.set_forkserver_preload(["inventory_core", "pandas"])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+# Multi-warehouse loading: each warehouse's file is parsed in its own worker, then merged here
+MERGE_POLICIES = ("raise", "sum", "last")
+
+def read_inventory_file(filename):
+    """Products from a file written by save_to_file; top-level so pool workers can run it."""
+    try:
+        return list(iter_file_products(filename))
+    except InvalidDataError as e:
+        raise InvalidDataError(f"{filename}: {e}")
+
+def merge_warehouses(loaded, on_duplicate="raise"):
+    """Merge (warehouse, products) pairs into (products, {product_id: {warehouse: units}}).
+    
+    A product ID seen more than once raises DuplicateProductError ("raise"), adds its stock
+    to the first one seen ("sum"), or replaces it ("last").
+    """
+    merged = {}
+    stock = {}
+    repeated = []
+    for warehouse, products in loaded:
+        for product in products:
+            pid = product._product_id
+            units = product._quantity_in_stock
+            first = merged.get(pid)
+            if first is None:
+                merged[pid] = product
+                stock[pid] = {warehouse: units}
+            elif on_duplicate == "raise":
+                repeated.append(pid)
+            elif on_duplicate == "sum":
+                if type(first) is not type(product):
+                    raise InvalidDataError(f"Product {pid} is {type(first).__name__} in one file "
+                                           f"but {type(product).__name__} in {warehouse}")
+                first._quantity_in_stock += units
+                by_warehouse = stock[pid]
+                by_warehouse[warehouse] = by_warehouse.get(warehouse, 0) + units
+            else:
+                merged[pid] = product
+                stock[pid] = {warehouse: units}
+    if repeated:
+        shown = ", ".join(str(pid) for pid in repeated[:IMPORT_MAX_ERRORS])
+        raise DuplicateProductError(f"{len(repeated):,} product ID(s) appear more than once: {shown}")
+    return list(merged.values()), stock
+
+# Journal helpers
+JOURNAL_SUFFIX = ".log"
+JOURNAL_COMPACT_EVERY = 10_000
+
+def file_identity(filename):
+    """Identify one version of a file; it changes whenever the file is replaced or rewritten."""
+    stat = os.stat(filename)
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+def start_journal(log_path, base):
+    """Atomically replace log_path with an empty journal for the snapshot identified by base."""
+    staging = f"{log_path}.tmp"
+    with open(staging, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"journal": 1, "base": base}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, log_path)
+
+class Journal:
+    """Append-only change log of one line of JSON per change."""
+    
+    def __init__(self, snapshot, path, compact_every, sync):
+        self.snapshot = snapshot
+        self.path = path
+        self.compact_every = compact_every
+        self.sync = sync
+        self.records = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+    
+    def append(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.records += 1
+        if self.sync:
+            # Outside the lock, so concurrent writers can share one fsync
+            os.fsync(self._file.fileno())
+    
+    def close(self):
+        self._file.close()
+
+# Name search index helpers
+NGRAM_SIZE = 3
+
+def name_ngrams(text):
+    """Return the set of NGRAM_SIZE-character substrings of text."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+# Lock stripes per Inventory; products hash onto one of these for stock changes
+LOCK_STRIPES = 64
+# Fields query_page can sort on; "value" is price * quantity_in_stock
+PAGE_SORT_FIELDS = ("product_id", "name", "type", "price", "quantity_in_stock", "value")
+PICKER_LIMIT = 50
+
+# Queries: predicates built from Field and compiled by each backend for Inventory.query
+QUERY_FIELDS = {  # field -> the product type that has it, None for every type
+    "product_id": None, "type": None, "name": None, "price": None, "quantity_in_stock": None,
+    "brand": "Electronics", "warranty_years": "Electronics", "expiry_date": "Grocery",
+    "size": "Clothing", "material": "Clothing",
+}
+ORDERED_FIELDS = ("product_id", "price", "quantity_in_stock", "warranty_years", "expiry_date")
+COMPARISONS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+               ">": operator.gt, ">=": operator.ge}
+SQL_COMPARISONS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+QUERY_CHUNK = 1024  # products materialized at a time by the array-backed query iterators
+
+def query_value(field, value):
+    """Check a predicate value against its field; expiry dates become date objects."""
+    if field == "expiry_date":
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            raise ValueError(f"expiry_date needs a date or YYYY-MM-DD, got {value!r}")
+    if field in ORDERED_FIELDS:
+        if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+            raise ValueError(f"{field} needs a number, got {value!r}")
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"{field} needs a string, got {value!r}")
+    return value
+
+class Field:
+    """Start of a predicate on one attribute: Field("brand") == "Sony", Field("price").between(10, 50).
+    
+    Subclass attributes (brand, warranty_years, expiry_date, size, material) only match
+    products of the type that has them; ~(Field("brand") == "Sony") matches every Grocery.
+    """
+    __slots__ = ("name",)
+    __hash__ = None
+    
+    def __init__(self, name):
+        if name not in QUERY_FIELDS:
+            raise ValueError(f"Can't query {name!r}; fields are {', '.join(QUERY_FIELDS)}")
+        self.name = name
+    
+    def __eq__(self, value):
+        return Compare(self.name, "==", value)
+    
+    def __ne__(self, value):
+        return Compare(self.name, "!=", value)
+    
+    def __lt__(self, value):
+        return Compare(self.name, "<", value)
+    
+    def __le__(self, value):
+        return Compare(self.name, "<=", value)
+    
+    def __gt__(self, value):
+        return Compare(self.name, ">", value)
+    
+    def __ge__(self, value):
+        return Compare(self.name, ">=", value)
+    
+    def between(self, low, high):
+        return Compare(self.name, ">=", low) & Compare(self.name, "<=", high)
+    
+    def isin(self, values):
+        return In(self.name, values)
+    
+    def contains(self, text):
+        return Contains(self.name, text)
+
+class Predicate:
+    """A query condition; combine with &, | and ~. Backends compile it with _python, _mask or _sql."""
+    __slots__ = ()
+    cost = 5  # evaluation order within an And on the columnar backend, cheapest first
+    
+    def __and__(self, other):
+        return And(self, other)
+    
+    def __or__(self, other):
+        return Or(self, other)
+    
+    def __invert__(self):
+        return Not(self)
+    
+    def conjuncts(self):
+        """The parts that must all hold, for the planners."""
+        return (self,)
+    
+    def _python(self):
+        """Compile to one function of a product, built from closures; nothing is evaluated as source."""
+        raise NotImplementedError
+    
+    def _owned_python(self, test):
+        owner = QUERY_FIELDS[self.field]
+        if owner is None:
+            return test
+        return lambda p: p.__class__.__name__ == owner and test(p)
+    
+    def _owner_mask(self, inventory, rows):
+        owner = QUERY_FIELDS[self.field]
+        return None if owner is None else inventory._columns["types"][rows] == COLUMNAR_TYPES.index(owner)
+    
+    def _owned(self, mask, inventory, rows):
+        owner = self._owner_mask(inventory, rows)
+        return mask if owner is None else mask & owner
+    
+    def _owned_sql(self, sql):
+        # Only the owning type has the column set; the guard keeps the result from being NULL,
+        # so NOT behaves as in Python. Expiry is guarded by its own column so its index stays usable.
+        owner = QUERY_FIELDS[self.field]
+        if owner is None:
+            return sql
+        if self.field == "expiry_date":
+            return f"p.expiry_ordinal IS NOT NULL AND {sql}"
+        return f"p.type = '{owner}' AND {sql}"
+
+# Product attribute, NumPy column and SQL column behind each field
+PYTHON_ATTRIBUTES = {field: "_" + field for field in QUERY_FIELDS}
+PYTHON_ATTRIBUTES["expiry_date"] = "_expiry"
+COLUMNAR_FIELDS = {"product_id": "ids", "price": "prices", "quantity_in_stock": "stock",
+                   "warranty_years": "warranty", "expiry_date": "expiry", "brand": "attr1", "size": "attr1",
+                   "material": "attr2"}
+SQL_COLUMNS = {field: "p." + field for field in QUERY_FIELDS}
+SQL_COLUMNS["expiry_date"] = "p.expiry_ordinal"
+
+def python_getter(field):
+    """A function reading field from a product."""
+    if field == "type":
+        return lambda p: p.__class__.__name__
+    return operator.attrgetter(PYTHON_ATTRIBUTES[field])
+
+def sql_value(field, value):
+    return value.toordinal() if field == "expiry_date" else value
+
+class Compare(Predicate):
+    __slots__ = ("field", "op", "value")
+    
+    def __init__(self, field, op, value):
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"Can't query {field!r}; fields are {', '.join(QUERY_FIELDS)}")
+        if op not in COMPARISONS:
+            raise ValueError(f"Unknown comparison {op!r}; use one of {', '.join(COMPARISONS)}")
+        if op not in ("==", "!=") and field not in ORDERED_FIELDS:
+            raise ValueError(f"{field} only supports ==, !=, isin and contains")
+        self.field = field
+        self.op = op
+        self.value = query_value(field, value)
+    
+    def __repr__(self):
+        return f"Field({self.field!r}) {self.op} {self.value!r}"
+    
+    @property
+    def cost(self):
+        if self.field == "product_id" and self.op == "==":
+            return 0
+        return 4 if self.field == "name" else 2
+    
+    def _python(self):
+        get, compare, value = python_getter(self.field), COMPARISONS[self.op], self.value
+        return self._owned_python(lambda p: compare(get(p), value))
+    
+    def _mask(self, inventory, rows):
+        compare = COMPARISONS[self.op]
+        if self.field == "type":
+            code = COLUMNAR_TYPES.index(self.value) if self.value in COLUMNAR_TYPES else REMOVED_TYPE - 1
+            return compare(inventory._columns["types"][rows], code)
+        if self.field == "name":
+            names = inventory._names
+            return np.fromiter((compare(names[row], self.value) for row in rows.tolist()), bool, len(rows))
+        column = inventory._columns[COLUMNAR_FIELDS[self.field]][rows]
+        if self.field in ORDERED_FIELDS:
+            return self._owned(compare(column, sql_value(self.field, self.value)), inventory, rows)
+        # Dictionary-encoded text: compare codes; a string never stored can only be unequal
+        code = inventory._string_codes.get(self.value, -1)
+        return self._owned(compare(column, code), inventory, rows)
+    
+    def _sql(self):
+        op = SQL_COMPARISONS[self.op]
+        return self._owned_sql(f"{SQL_COLUMNS[self.field]} {op} ?"), [sql_value(self.field, self.value)]
+
+class In(Predicate):
+    __slots__ = ("field", "values")
+    cost = 3
+    
+    def __init__(self, field, values):
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"Can't query {field!r}; fields are {', '.join(QUERY_FIELDS)}")
+        self.field = field
+        self.values = frozenset(query_value(field, value) for value in values)
+    
+    def __repr__(self):
+        return f"Field({self.field!r}).isin({sorted(self.values)!r})"
+    
+    def _python(self):
+        get, values = python_getter(self.field), self.values
+        return self._owned_python(lambda p: get(p) in values)
+    
+    def _mask(self, inventory, rows):
+        if self.field == "type":
+            codes = [COLUMNAR_TYPES.index(value) for value in self.values if value in COLUMNAR_TYPES]
+            return np.isin(inventory._columns["types"][rows], codes)
+        if self.field == "name":
+            names, values = inventory._names, self.values
+            return np.fromiter((names[row] in values for row in rows.tolist()), bool, len(rows))
+        if self.field in ORDERED_FIELDS:
+            keys = [sql_value(self.field, value) for value in self.values]
+        else:
+            keys = [inventory._string_codes[value] for value in self.values if value in inventory._string_codes]
+        return self._owned(np.isin(inventory._columns[COLUMNAR_FIELDS[self.field]][rows], keys), inventory, rows)
+    
+    def _sql(self):
+        values = sorted(sql_value(self.field, value) for value in self.values)
+        return self._owned_sql(f"{SQL_COLUMNS[self.field]} IN (SELECT value FROM json_each(?))"), [json.dumps(values)]
+
+class Contains(Predicate):
+    """Case-insensitive substring match on a text field."""
+    __slots__ = ("field", "text")
+    cost = 3
+    
+    def __init__(self, field, text):
+        if field in ORDERED_FIELDS or field not in QUERY_FIELDS:
+            raise ValueError(f"contains needs a text field, not {field!r}")
+        self.field = field
+        self.text = query_value(field, text).lower()
+    
+    def __repr__(self):
+        return f"Field({self.field!r}).contains({self.text!r})"
+    
+    def _python(self):
+        get, text = python_getter(self.field), self.text
+        return self._owned_python(lambda p: text in str(get(p)).lower())
+    
+    def _mask(self, inventory, rows):
+        if self.field == "name":
+            return np.isin(rows, inventory._name_rows(self.text))
+        if self.field == "type":
+            codes = [code for code, ptype in enumerate(COLUMNAR_TYPES) if self.text in ptype.lower()]
+            return np.isin(inventory._columns["types"][rows], codes)
+        # Match the string table once instead of every row
+        codes = [code for code, string in enumerate(inventory._strings) if self.text in str(string).lower()]
+        return self._owned(np.isin(inventory._columns[COLUMNAR_FIELDS[self.field]][rows], codes), inventory, rows)
+    
+    def _sql(self):
+        if self.field == "name":
+            if len(self.text) < NGRAM_SIZE:
+                return "p.rowid IN (SELECT rowid FROM product_names WHERE instr(name, ?) > 0)", [self.text]
+            phrase = '"' + self.text.replace('"', '""') + '"'
+            return "p.rowid IN (SELECT rowid FROM product_names WHERE product_names MATCH ?)", [phrase]
+        # py_lower: SQLite's lower() only folds ASCII, Python's str.lower folds everything
+        return self._owned_sql(f"instr(py_lower({SQL_COLUMNS[self.field]}), ?) > 0"), [self.text]
+
+class And(Predicate):
+    __slots__ = ("parts",)
+    
+    def __init__(self, *parts):
+        self.parts = tuple(piece for part in parts for piece in part.conjuncts())
+    
+    def __repr__(self):
+        return "(" + " & ".join(map(repr, self.parts)) + ")"
+    
+    def conjuncts(self):
+        return self.parts
+    
+    def _python(self):
+        tests = [part._python() for part in self.parts]
+        
+        def test(p):
+            for part in tests:
+                if not part(p):
+                    return False
+            return True
+        return test
+    
+    def _mask(self, inventory, rows):
+        # Cheap parts first, and each later part only looks at the rows still in play
+        mask = np.ones(len(rows), bool)
+        for part in sorted(self.parts, key=lambda part: part.cost):
+            live = np.flatnonzero(mask)
+            if not len(live):
+                break
+            mask[live] = part._mask(inventory, rows[live])
+        return mask
+    
+    def _sql(self):
+        compiled = [part._sql() for part in self.parts]
+        return " AND ".join(f"({sql})" for sql, _ in compiled), [p for _, params in compiled for p in params]
+
+class Or(Predicate):
+    __slots__ = ("parts",)
+    
+    def __init__(self, *parts):
+        self.parts = tuple(piece for part in parts for piece in (part.parts if isinstance(part, Or) else (part,)))
+    
+    def __repr__(self):
+        return "(" + " | ".join(map(repr, self.parts)) + ")"
+    
+    def _python(self):
+        tests = [part._python() for part in self.parts]
+        
+        def test(p):
+            for part in tests:
+                if part(p):
+                    return True
+            return False
+        return test
+    
+    def _mask(self, inventory, rows):
+        mask = np.zeros(len(rows), bool)
+        for part in self.parts:
+            rest = np.flatnonzero(~mask)
+            if not len(rest):
+                break
+            mask[rest] = part._mask(inventory, rows[rest])
+        return mask
+    
+    def _sql(self):
+        compiled = [part._sql() for part in self.parts]
+        return " OR ".join(f"({sql})" for sql, _ in compiled), [p for _, params in compiled for p in params]
+
+class Not(Predicate):
+    __slots__ = ("part",)
+    
+    def __init__(self, part):
+        self.part = part
+    
+    def __repr__(self):
+        return f"~{self.part!r}"
+    
+    def _python(self):
+        test = self.part._python()
+        return lambda p: not test(p)
+    
+    def _mask(self, inventory, rows):
+        return ~self.part._mask(inventory, rows)
+    
+    def _sql(self):
+        sql, params = self.part._sql()
+        return f"NOT ({sql})", params
+
+class Reservation:
+    """Units held by Inventory.reserve until committed or released."""
+    __slots__ = ("product_id", "quantity", "state")
+    
+    def __init__(self, product_id, quantity):
+        self.product_id = product_id
+        self.quantity = quantity
+        self.state = "held"
+
+class BatchLineError:
+    """Why one line of a sell_many / restock_many batch was rejected (line numbers start at 1)."""
+    __slots__ = ("line", "product_id", "quantity", "reason")
+    
+    def __init__(self, line, product_id, quantity, reason):
+        self.line = line
+        self.product_id = product_id
+        self.quantity = quantity
+        self.reason = reason
+    
+    def __repr__(self):
+        return f"BatchLineError(line={self.line}, product_id={self.product_id!r}, reason={self.reason!r})"
+
+class BatchResult:
+    """Outcome of a batch: either every line was applied or none was, and errors says why."""
+    __slots__ = ("ok", "lines", "units", "errors")
+    
+    def __init__(self, lines, units, errors):
+        self.ok = not errors
+        self.lines = lines
+        self.units = units
+        self.errors = errors
+    
+    def __repr__(self):
+        return f"BatchResult(ok={self.ok}, lines={self.lines}, units={self.units}, errors={len(self.errors)})"
+
+REORDER_ALERT_LIMIT = 1000  # alerts kept per inventory; older ones are dropped
+
+class ReorderAlert:
+    """A product's stock fell to or below its reorder point; seq grows with every alert."""
+    __slots__ = ("seq", "product_id", "name", "quantity_in_stock", "reorder_point", "time")
+    
+    def __init__(self, seq, product_id, name, quantity_in_stock, reorder_point):
+        self.seq = seq
+        self.product_id = product_id
+        self.name = name
+        self.quantity_in_stock = quantity_in_stock
+        self.reorder_point = reorder_point
+        self.time = datetime.now()
+    
+    def __repr__(self):
+        return (f"ReorderAlert(seq={self.seq}, product_id={self.product_id!r}, "
+                f"stock={self.quantity_in_stock}, reorder_point={self.reorder_point})")
+
+# Sales ledger: recent sales as compact array records, with rollups kept current as sales happen
+LEDGER_EVENTS = int(os.environ.get("INVENTORY_LEDGER_EVENTS", "1000000"))  # raw sales kept; older ones drop off
+LEDGER_DAYS = 400     # days kept at daily resolution; older days fold into their month
+LEDGER_FLUSH = 4096   # sales staged in a list before they are copied into the arrays together
+LEDGER_GROWTH = 4096
+
+class SalesLedger:
+    """Sales as records in NumPy ring buffers, plus per-day and per-product totals updated on each sale.
+    
+    The buffers hold the last `capacity` sales and grow only as sales arrive. The rollups cover
+    every sale recorded: per day for the last `days` days, per month before that, and per product.
+    """
+    
+    def __init__(self, capacity=LEDGER_EVENTS, days=LEDGER_DAYS):
+        self.capacity = capacity
+        self.days = days
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._times = np.zeros(0, np.float64)     # seconds since the epoch
+        self._codes = np.zeros(0, np.int32)       # index into _product_ids
+        self._quantities = np.zeros(0, np.int64)
+        self._prices = np.zeros(0, np.float64)    # unit price at the time of sale
+        self._next = 0                            # slot of the next record
+        self._count = 0                           # records held, at most capacity
+        self._pending = []                        # (time, product_id, quantity, price) not yet in the arrays
+        self._product_codes = {}                  # product_id -> code
+        self._product_ids = []
+        self._daily = {}       # date ordinal -> [units, revenue]
+        self._monthly = {}     # ordinal of the month's first day -> [units, revenue], for days folded out of _daily
+        self._by_product = {}  # product_id -> [units, revenue]
+        self._day = (0.0, 0.0, None)  # (start, end, _daily bucket) of the day sales last went to
+    
+    def clear(self):
+        with self._lock:
+            self._reset()
+    
+    def __len__(self):
+        with self._lock:
+            self._flush()
+            return self._count
+    
+    def record(self, product_id, quantity, price, when=None):
+        """Record a sale of quantity units at a unit price, made at when (seconds since the epoch, default now)."""
+        when = time.time() if when is None else when
+        with self._lock:
+            self._add(product_id, quantity, price, when)
+    
+    def record_many(self, sales, when=None):
+        """Record (product_id, quantity, unit price) sales made together."""
+        when = time.time() if when is None else when
+        with self._lock:
+            for product_id, quantity, price in sales:
+                self._add(product_id, quantity, price, when)
+    
+    def _add(self, product_id, quantity, price, when):
+        self._pending.append((when, product_id, quantity, price))
+        if len(self._pending) >= LEDGER_FLUSH:
+            self._flush()
+        amount = quantity * price
+        total = self._by_product.get(product_id)
+        if total is None:
+            total = self._by_product[product_id] = [0, 0.0]
+        total[0] += quantity
+        total[1] += amount
+        start, end, bucket = self._day
+        if not start <= when < end:
+            bucket = self._day_bucket(when)
+        bucket[0] += quantity
+        bucket[1] += amount
+    
+    def _day_bucket(self, when):
+        day = date.fromtimestamp(when)
+        ordinal = day.toordinal()
+        bucket = self._daily.get(ordinal)
+        if bucket is None:
+            bucket = self._daily[ordinal] = [0, 0.0]
+            self._downsample(ordinal)
+        start = datetime.combine(day, datetime.min.time()).timestamp()
+        self._day = (start, datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp(), bucket)
+        return bucket
+    
+    def _downsample(self, today):
+        for day in [day for day in self._daily if day <= today - self.days]:
+            units, revenue = self._daily.pop(day)
+            month = self._monthly.setdefault(date.fromordinal(day).replace(day=1).toordinal(), [0, 0.0])
+            month[0] += units
+            month[1] += revenue
+        start, end, bucket = self._day
+        if bucket is not None and bucket is not self._daily.get(date.fromtimestamp(start).toordinal()):
+            self._day = (0.0, 0.0, None)  # the cached day was just folded away
+    
+    def _flush(self):
+        """Copy the staged sales into the ring buffers, growing them up to capacity."""
+        pending = self._pending[-self.capacity:]
+        if not pending:
+            return
+        self._pending = []
+        codes = []
+        for _, product_id, _, _ in pending:
+            code = self._product_codes.get(product_id)
+            if code is None:
+                code = self._product_codes[product_id] = len(self._product_ids)
+                self._product_ids.append(product_id)
+            codes.append(code)
+        
+        count = len(pending)
+        size = len(self._times)
+        if self._count + count > size and size < self.capacity:
+            grown = min(self.capacity, max(2 * size, self._count + count, LEDGER_GROWTH))
+            for name in ("_times", "_codes", "_quantities", "_prices"):
+                column = getattr(self, name)
+                resized = np.zeros(grown, column.dtype)
+                resized[:size] = column
+                setattr(self, name, resized)
+        slots = (self._next + np.arange(count)) % self.capacity
+        times, _, quantities, prices = zip(*pending)
+        self._times[slots] = times
+        self._codes[slots] = codes
+        self._quantities[slots] = quantities
+        self._prices[slots] = prices
+        self._next = (self._next + count) % self.capacity
+        self._count = min(self._count + count, self.capacity)
+    
+    def daily(self, days=30, today=None):
+        """[(date, units, revenue)] for each of the last days days up to today, with zeros for days without sales."""
+        end = (today or date.today()).toordinal()
+        with self._lock:
+            return [(date.fromordinal(day), *self._daily.get(day, (0, 0.0))) for day in range(end - days + 1, end + 1)]
+    
+    def monthly(self):
+        """[(first day of the month, units, revenue)] for every month with sales, oldest first."""
+        with self._lock:
+            months = {month: list(total) for month, total in self._monthly.items()}
+            for day, (units, revenue) in self._daily.items():
+                month = months.setdefault(date.fromordinal(day).replace(day=1).toordinal(), [0, 0.0])
+                month[0] += units
+                month[1] += revenue
+        return [(date.fromordinal(month), units, revenue) for month, (units, revenue) in sorted(months.items())]
+    
+    def product_sales(self, product_id):
+        """(units, revenue) sold of one product."""
+        with self._lock:
+            return tuple(self._by_product.get(product_id, (0, 0.0)))
+    
+    def top_products(self, limit=10, by="revenue"):
+        """[(product_id, units, revenue)] for the best sellers by "revenue" or "units"."""
+        if by not in ("units", "revenue"):
+            raise ValueError(f"Can't rank by {by!r}")
+        index = 0 if by == "units" else 1
+        with self._lock:
+            best = heapq.nlargest(limit, self._by_product.items(), key=lambda item: item[1][index])
+        return [(product_id, units, revenue) for product_id, (units, revenue) in best]
+    
+    def recent(self, limit=100):
+        """The latest sales, newest first, as (datetime, product_id, quantity, unit price)."""
+        with self._lock:
+            self._flush()
+            count = min(limit, self._count)
+            slots = (self._next - 1 - np.arange(count)) % max(len(self._times), 1)
+            rows = zip(self._times[slots].tolist(), self._codes[slots].tolist(),
+                       self._quantities[slots].tolist(), self._prices[slots].tolist())
+            ids = self._product_ids
+            return [(datetime.fromtimestamp(when), ids[code], quantity, price) for when, code, quantity, price in rows]
+    
+    def nbytes(self):
+        """Memory held by the record buffers."""
+        return self._times.nbytes + self._codes.nbytes + self._quantities.nbytes + self._prices.nbytes
+
+# Inventory Class
+class Inventory:
+    def __init__(self):
+        self._products = {}
+        self._order = {}        # product_id -> insertion sequence, for stable result order
+        self._next_order = 0
+        self._names = {}        # product_id -> lowercased name
+        self._name_index = {}   # name n-gram -> set of product_ids
+        self._by_type = {}      # class name -> {product_id: product}, in insertion order
+        # Running totals, updated as deltas so the dashboard never rescans
+        self._total_value = 0
+        self._type_value = {}   # class name -> total value
+        self._type_stock = {}   # class name -> units in stock
+        # Groceries bucketed by expiry date, with the dates kept sorted
+        self._expiry_buckets = {}  # date -> {product_id: product}
+        self._expiry_dates = []
+        # Products with a reorder point, bucketed by stock minus reorder point, with the margins kept sorted;
+        # those at or below their reorder point are the buckets with margin <= 0
+        self._reorder_buckets = {}  # margin -> {product_id: product}
+        self._reorder_margins = []
+        self._init_concurrency()
+        self._init_versions()
+        self._init_events()
+    
+    # Concurrency: stock changes lock one stripe per product; structural changes lock every stripe
+    def _init_concurrency(self):
+        self._journal = None
+        self._stripes = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._totals_lock = threading.Lock()
+        self._held = {}  # product_id -> units held by open reservations
+        self._warehouse_stock = {}  # product_id -> {warehouse: units}, as of load_from_files
+    
+    def _stripe(self, product_id):
+        return self._stripes[hash(product_id) % LOCK_STRIPES]
+    
+    @contextmanager
+    def _all_stripes(self):
+        for lock in self._stripes:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._stripes):
+                lock.release()
+    
+    def _available(self, product):
+        return product._quantity_in_stock - self._held.get(product._product_id, 0)
+    
+    # Versions: every change bumps a counter, so readers can tell whether anything changed since they looked
+    def _init_versions(self):
+        self._uid = uuid.uuid4().hex  # tells inventories apart in caches shared across sessions
+        self._version = 0
+        self._bulk_version = 0  # version of the last change that may have touched every product
+        self._changed = {}      # product_id -> version of its last change since then
+        self._version_lock = threading.Lock()
+    
+    def _touch(self, product_ids=None):
+        """Bump the version after changing product_ids (None: possibly every product).
+        
+        Called after the change is complete, so a reader that saw the new version sees the new data.
+        """
+        with self._version_lock:
+            self._version += 1
+            if product_ids is None:
+                self._changed.clear()
+                self._bulk_version = self._version
+            else:
+                for pid in product_ids:
+                    self._changed[pid] = self._version
+    
+    # Events: reorder alerts, raised when a stock change or a new reorder point makes a product need
+    # reordering, and the sales ledger. Both live in this process only; journal replay records no sales.
+    def _init_events(self):
+        self._alerts = deque(maxlen=REORDER_ALERT_LIMIT)
+        self._alert_seq = itertools.count(1)
+        self.sales = SalesLedger()
+    
+    def _reorder_crossed(self, product_id, name, stock, reorder_point):
+        self._alerts.append(ReorderAlert(next(self._alert_seq), product_id, name, stock, reorder_point))
+    
+    def reorder_alerts(self, after=0):
+        """Alerts with a seq greater than after, oldest first; only the last REORDER_ALERT_LIMIT are kept."""
+        return [alert for alert in list(self._alerts) if alert.seq > after]
+    
+    def version(self):
+        """A counter that grows with every change; the same version means the same contents."""
+        return self._version
+    
+    def product_version(self, product_id):
+        """The inventory version as of the last change to this product."""
+        return self._changed.get(product_id, self._bulk_version)
+    
+    # Index maintenance: every change to _products goes through _store / _discard / _clear
+    def _index_product(self, product):
+        pid = product._product_id
+        lowered = str(product._name).lower()
+        self._names[pid] = lowered
+        for gram in name_ngrams(lowered):
+            self._name_index.setdefault(gram, set()).add(pid)
+        ptype = product.__class__.__name__
+        self._by_type.setdefault(ptype, {})[pid] = product
+        
+        value = product.get_total_value()
+        self._total_value += value
+        self._type_value[ptype] = self._type_value.get(ptype, 0) + value
+        self._type_stock[ptype] = self._type_stock.get(ptype, 0) + product._quantity_in_stock
+        product._inventory = self
+        
+        if isinstance(product, Grocery):
+            bucket = self._expiry_buckets.get(product._expiry)
+            if bucket is None:
+                bucket = self._expiry_buckets[product._expiry] = {}
+                bisect.insort(self._expiry_dates, product._expiry)
+            bucket[pid] = product
+        if product._reorder_point is not None:
+            self._add_reorder(product, product._quantity_in_stock - product._reorder_point)
+    
+    def _add_reorder(self, product, margin):
+        bucket = self._reorder_buckets.get(margin)
+        if bucket is None:
+            bucket = self._reorder_buckets[margin] = {}
+            bisect.insort(self._reorder_margins, margin)
+        bucket[product._product_id] = product
+    
+    def _drop_reorder(self, product_id, margin):
+        bucket = self._reorder_buckets[margin]
+        del bucket[product_id]
+        if not bucket:
+            del self._reorder_buckets[margin]
+            del self._reorder_margins[bisect.bisect_left(self._reorder_margins, margin)]
+    
+    def _move_reorder(self, product, delta):
+        """Rebucket a product whose stock just changed by delta; True if that took it to its reorder point."""
+        margin = product._quantity_in_stock - product._reorder_point
+        self._drop_reorder(product._product_id, margin - delta)
+        self._add_reorder(product, margin)
+        return margin <= 0 < margin - delta
+    
+    def _unindex_product(self, product):
+        pid = product._product_id
+        for gram in name_ngrams(self._names.pop(pid)):
+            postings = self._name_index[gram]
+            postings.discard(pid)
+            if not postings:
+                del self._name_index[gram]
+        ptype = product.__class__.__name__
+        bucket = self._by_type[ptype]
+        del bucket[pid]
+        product._inventory = None
+        
+        if isinstance(product, Grocery):
+            expiry_bucket = self._expiry_buckets[product._expiry]
+            del expiry_bucket[pid]
+            if not expiry_bucket:
+                del self._expiry_buckets[product._expiry]
+                del self._expiry_dates[bisect.bisect_left(self._expiry_dates, product._expiry)]
+        if product._reorder_point is not None:
+            self._drop_reorder(pid, product._quantity_in_stock - product._reorder_point)
+        
+        if bucket:
+            value = product.get_total_value()
+            self._total_value -= value
+            self._type_value[ptype] -= value
+            self._type_stock[ptype] -= product._quantity_in_stock
+        else:
+            # Last product of this type: drop the totals rather than keep float residue
+            del self._by_type[ptype]
+            self._total_value -= self._type_value.pop(ptype)
+            del self._type_stock[ptype]
+            if not self._by_type:
+                self._total_value = 0
+    
+    def _stock_changed(self, product, delta):
+        ptype = product.__class__.__name__
+        value = product._price * delta
+        crossed = False
+        # Sells on different stripes can run together; the shared totals and reorder index need their own lock
+        with self._totals_lock:
+            self._total_value += value
+            self._type_value[ptype] += value
+            self._type_stock[ptype] += delta
+            if product._reorder_point is not None:
+                crossed = self._move_reorder(product, delta)
+        if crossed:
+            self._reorder_crossed(product._product_id, product._name, product._quantity_in_stock,
+                                  product._reorder_point)
+        self._touch((product._product_id,))
+    
+    def _store(self, product):
+        pid = product._product_id
+        old = self._products.get(pid)
+        if old is not None:
+            # Overwriting keeps the dict position, so keep the old sequence number too
+            self._unindex_product(old)
+        else:
+            self._order[pid] = self._next_order
+            self._next_order += 1
+        self._products[pid] = product
+        self._index_product(product)
+        self._touch((pid,))
+    
+    def _discard(self, product_id):
+        product = self._products.pop(product_id)
+        self._unindex_product(product)
+        del self._order[product_id]
+        self._touch((product_id,))
+        return product
+    
+    def _clear(self):
+        for product in self._products.values():
+            product._inventory = None
+        self._products.clear()
+        self._order.clear()
+        self._names.clear()
+        self._name_index.clear()
+        self._by_type.clear()
+        self._total_value = 0
+        self._type_value.clear()
+        self._type_stock.clear()
+        self._expiry_buckets.clear()
+        self._expiry_dates.clear()
+        self._reorder_buckets.clear()
+        self._reorder_margins.clear()
+        self._touch()
+    
+    def get_product(self, product_id):
+        return self._products.get(product_id)
+    
+    def add_product(self, product):
+        with self._all_stripes():
+            if self.get_product(product._product_id) is not None:
+                raise DuplicateProductError(f"Product with ID {product._product_id} already exists")
+            self._store(product)
+            self._log({"op": "add", "product": product.to_dict()})
+        self._maybe_compact()
+    
+    def remove_product(self, product_id):
+        with self._all_stripes():
+            if self.get_product(product_id) is None:
+                return False
+            self._discard(product_id)
+            self._held.pop(product_id, None)
+            self._warehouse_stock.pop(product_id, None)
+            self._log({"op": "remove", "id": product_id})
+        self._maybe_compact()
+        return True
+    
+    def search_by_name(self, name):
+        query = name.lower()
+        names = self._names
+        if len(query) < NGRAM_SIZE:
+            # Too short to use the index; still avoids lowercasing every name
+            return [p for pid, p in self._products.items() if query in names[pid]]
+        
+        postings = []
+        for gram in name_ngrams(query):
+            ids = self._name_index.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        
+        # Sharing every n-gram doesn't guarantee a substring match, so verify
+        matches = [pid for pid in candidates if query in names[pid]]
+        matches.sort(key=self._order.__getitem__)
+        return [self._products[pid] for pid in matches]
+    
+    def search_by_type(self, product_type):
+        return list(self._by_type.get(product_type, {}).values())
+    
+    def count_by_type(self, product_type):
+        return len(self._by_type.get(product_type, ()))
+    
+    def product_count(self):
+        return len(self._products)
+    
+    def value_by_type(self, product_type):
+        return self._type_value.get(product_type, 0)
+    
+    def stock_by_type(self, product_type):
+        return self._type_stock.get(product_type, 0)
+    
+    def list_all_products(self):
+        return list(self._products.values())
+    
+    def query_page(self, offset=0, limit=50, sort_by=None, descending=False, product_type=None, name=None):
+        """Return (number of matches, products from offset to offset + limit).
+        
+        Filters by type and case-insensitive name substring, then sorts on one of PAGE_SORT_FIELDS
+        (insertion order if sort_by is None); ties keep insertion order.
+        """
+        if sort_by is not None and sort_by not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Can't sort by {sort_by!r}")
+        if not (name or product_type or sort_by or descending):
+            return len(self._products), list(itertools.islice(self._products.values(), offset, offset + limit))
+        if name:
+            products = self.search_by_name(name)
+            if product_type:
+                products = [p for p in products if p.__class__.__name__ == product_type]
+        elif product_type:
+            products = self.search_by_type(product_type)
+        else:
+            products = self.list_all_products()
+        
+        if sort_by is None:
+            if descending:
+                products.reverse()
+            return len(products), products[offset:offset + limit]
+        key = self._page_key(sort_by)
+        # Only the first offset + limit in order are needed, not a full sort
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return len(products), pick(offset + limit, products, key)[offset:]
+    
+    def find_products(self, query, limit=PICKER_LIMIT):
+        """Type-ahead lookup: the product with ID query first, then up to limit whose names contain it."""
+        query = query.strip()
+        exact = self.get_product(int(query)) if query.isdecimal() else None
+        matches = self._first_matches(query, limit)
+        if exact is not None:
+            matches = [exact] + [p for p in matches if p._product_id != exact._product_id][:limit - 1]
+        return matches
+    
+    def _first_matches(self, query, limit):
+        return self.query_page(0, limit, name=query or None)[1]
+    
+    def _page_key(self, sort_by):
+        if sort_by == "name":
+            names = self._names
+            return lambda p: names[p._product_id]
+        if sort_by == "type":
+            return lambda p: p.__class__.__name__
+        if sort_by == "value":
+            return lambda p: p._price * p._quantity_in_stock
+        attribute = "_" + sort_by
+        return lambda p: getattr(p, attribute)
+    
+    def query(self, predicate):
+        """Lazily yield the products matching predicate (see Field), in insertion order."""
+        _, candidates = self._plan(predicate)
+        return self._matching(candidates, predicate._python())
+    
+    def query_plan(self, predicate):
+        """How query finds its candidates, e.g. "type index (Electronics): 3,334 candidates"."""
+        return self._plan(predicate)[0]
+    
+    def _matching(self, candidates, check):
+        products = self._products
+        for pid in candidates:
+            product = products.get(pid)  # None if removed while the caller was iterating
+            if product is not None and check(product):
+                yield product
+    
+    def _plan(self, predicate):
+        """(description, candidate product_ids in insertion order) from the most selective index."""
+        best = None
+        for part in predicate.conjuncts():
+            option = self._index_option(part)
+            if option is not None and (best is None or option[0] < best[0]):
+                best = option
+        if best is None or best[0] >= len(self._products):
+            # Copy the keys, so changes while the caller iterates can't break the loop
+            return f"full scan: {len(self._products):,} products", tuple(self._products)
+        size, description, candidates = best
+        return f"{description}: {size:,} candidates", candidates()
+    
+    def _index_option(self, part):
+        """(estimated candidates, description, function listing them) for one conjunct, or None."""
+        field = getattr(part, "field", None)
+        order = self._order
+        
+        def in_order(ids):
+            return sorted(ids, key=order.__getitem__)
+        
+        if field == "product_id" and isinstance(part, Compare) and part.op == "==":
+            return 1, "product_id lookup", lambda: (part.value,)
+        if field == "product_id" and isinstance(part, In):
+            return len(part.values), "product_id lookup", lambda: in_order(pid for pid in part.values if pid in order)
+        if field == "name" and isinstance(part, Contains) and len(part.text) >= NGRAM_SIZE:
+            postings = sorted((self._name_index.get(gram, ()) for gram in name_ngrams(part.text)), key=len)
+            return len(postings[0]), "name n-gram index", lambda: in_order(set(postings[0]).intersection(*postings[1:]))
+        if field == "expiry_date" and isinstance(part, Compare) and part.op != "!=":
+            dates, value = self._expiry_dates, part.value
+            lo = bisect.bisect_right(dates, value) if part.op == ">" else 0 if part.op in ("<", "<=") \
+                else bisect.bisect_left(dates, value)
+            hi = bisect.bisect_left(dates, value) if part.op == "<" else len(dates) if part.op in (">", ">=") \
+                else bisect.bisect_right(dates, value)
+            buckets = [self._expiry_buckets[expiry] for expiry in dates[lo:hi]]
+            return sum(map(len, buckets)), "expiry index", lambda: in_order(pid for bucket in buckets for pid in bucket)
+        
+        if field == "type" and isinstance(part, Compare) and part.op == "==":
+            types = (part.value,)
+        elif field == "type" and isinstance(part, In):
+            types = tuple(part.values)
+        elif QUERY_FIELDS.get(field) and isinstance(part, (Compare, In, Contains)):
+            types = (QUERY_FIELDS[field],)  # e.g. a brand condition only holds for Electronics
+        else:
+            return None
+        buckets = [self._by_type.get(ptype, {}) for ptype in types]
+        size = sum(map(len, buckets))
+        if len(buckets) == 1:
+            return size, f"type index ({types[0]})", lambda: tuple(buckets[0])
+        return size, f"type index ({', '.join(sorted(types))})", lambda: in_order(pid for bucket in buckets for pid in bucket)
+    
+    def sell_product(self, product_id, quantity):
+        product = self.get_product(product_id)
+        if product is None:
+            return False, "Product not found"
+        
+        if quantity <= 0:
+            return False, "Quantity must be positive"
+        
+        try:
+            # Check and decrement under the product's stripe so concurrent sells can't oversell
+            with self._stripe(product_id):
+                if product._inventory is not self:
+                    return False, "Product not found"  # removed after the lookup
+                available = self._available(product)
+                if available < quantity:
+                    raise InsufficientStockError(f"Not enough stock. Available: {available}")
+                
+                # Only a sale that happened reaches the ledger and the journal
+                if not product.sell(quantity):
+                    return False, "Quantity must be positive"
+                self.sales.record(product_id, quantity, product._price)
+                self._log({"op": "sell", "id": product_id, "qty": quantity})
+            self._maybe_compact()
+            return True, f"Sold {quantity} units of {product._name}"
+        except InsufficientStockError as e:
+            return False, str(e)
+    
+    def restock_product(self, product_id, quantity):
+        product = self.get_product(product_id)
+        if product is None:
+            return False, "Product not found"
+        
+        if quantity <= 0:
+            return False, "Quantity must be positive"
+        
+        with self._stripe(product_id):
+            if product._inventory is not self:
+                return False, "Product not found"
+            product.restock(quantity)
+            self._log({"op": "restock", "id": product_id, "qty": quantity})
+        self._maybe_compact()
+        return True, f"Restocked {quantity} units of {product._name}"
+    
+    def reserve(self, product_id, quantity):
+        """Atomically hold quantity units for a later commit_reservation or release_reservation.
+        
+        Held units count as unavailable to other sells but stay in stock (and in snapshots)
+        until the reservation is committed.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        product = self.get_product(product_id)
+        if product is None:
+            raise ProductNotFoundError(f"Product {product_id} not found")
+        with self._stripe(product_id):
+            if product._inventory is not self:
+                raise ProductNotFoundError(f"Product {product_id} not found")
+            available = self._available(product)
+            if available < quantity:
+                raise InsufficientStockError(f"Not enough stock. Available: {available}")
+            self._held[product_id] = self._held.get(product_id, 0) + quantity
+        return Reservation(product_id, quantity)
+    
+    def _settle(self, reservation):
+        if reservation.state != "held":
+            raise ValueError(f"Reservation is already {reservation.state}")
+        held = self._held.get(reservation.product_id, 0) - reservation.quantity
+        if held > 0:
+            self._held[reservation.product_id] = held
+        else:
+            self._held.pop(reservation.product_id, None)
+    
+    def commit_reservation(self, reservation):
+        """Turn a held reservation into a sale."""
+        with self._stripe(reservation.product_id):
+            if reservation.state != "held":
+                raise ValueError(f"Reservation is already {reservation.state}")
+            product = self.get_product(reservation.product_id)
+            if product is None or reservation.product_id not in self._held:
+                reservation.state = "released"  # the product was removed meanwhile
+                raise ProductNotFoundError(f"Product {reservation.product_id} not found")
+            self._settle(reservation)
+            product.sell(reservation.quantity)
+            self.sales.record(reservation.product_id, reservation.quantity, product._price)
+            reservation.state = "committed"
+            self._log({"op": "sell", "id": reservation.product_id, "qty": reservation.quantity})
+        self._maybe_compact()
+    
+    def release_reservation(self, reservation):
+        """Give held units back without selling them."""
+        with self._stripe(reservation.product_id):
+            if reservation.state == "held" and reservation.product_id not in self._held:
+                reservation.state = "released"
+                return
+            self._settle(reservation)
+            reservation.state = "released"
+    
+    def sell_many(self, lines):
+        """Sell every (product_id, quantity) line, or none of them if any line is invalid."""
+        return self._apply_batch(lines, -1)
+    
+    def restock_many(self, lines):
+        """Restock every (product_id, quantity) line, or none of them if any line is invalid."""
+        return self._apply_batch(lines, 1)
+    
+    def _apply_batch(self, lines, sign):
+        lines = list(lines)
+        errors = []
+        parsed = []
+        for number, line in enumerate(lines, 1):
+            try:
+                pid, qty = line
+                hash(pid)
+            except (TypeError, ValueError):
+                errors.append(BatchLineError(number, None, None, "Expected (product_id, quantity)"))
+                continue
+            if type(qty) is not int and (not isinstance(qty, (int, np.integer)) or isinstance(qty, bool)) or qty <= 0:
+                errors.append(BatchLineError(number, pid, qty, "Quantity must be a positive integer"))
+                continue
+            parsed.append((number, pid, int(qty)))
+        
+        with self._all_stripes():
+            # Walk the lines against running stock, so the line that overdraws a product is the one reported
+            remaining = self._stock_levels({pid for _, pid, _ in parsed})
+            for pid, held in self._held.items():
+                if pid in remaining:
+                    remaining[pid] -= held
+            deltas = {}
+            for number, pid, qty in parsed:
+                available = remaining.get(pid)
+                if available is None:
+                    errors.append(BatchLineError(number, pid, qty, "Product not found"))
+                elif sign < 0 and available < qty:
+                    errors.append(BatchLineError(number, pid, qty, f"Not enough stock. Available: {available}"))
+                else:
+                    remaining[pid] = available + sign * qty
+                    deltas[pid] = deltas.get(pid, 0) + sign * qty
+            
+            if errors:
+                errors.sort(key=lambda error: error.line)
+                return BatchResult(len(lines), 0, errors)
+            if deltas:
+                self._change_stock(deltas)
+                if sign < 0:
+                    prices = self._prices(deltas)
+                    self.sales.record_many((pid, -delta, prices[pid]) for pid, delta in deltas.items())
+                self._log({"op": "batch", "deltas": [[pid, delta] for pid, delta in deltas.items()]})
+        self._maybe_compact()
+        return BatchResult(len(lines), sum(qty for _, _, qty in parsed), [])
+    
+    def _stock_levels(self, product_ids):
+        """Map each existing product_id to its stock; unknown ids are left out."""
+        levels = {}
+        for pid in product_ids:
+            product = self._products.get(pid)
+            if product is not None:
+                levels[pid] = product._quantity_in_stock
+        return levels
+    
+    def _prices(self, product_ids):
+        """Map each of product_ids, which must exist, to its unit price."""
+        return {pid: self._products[pid]._price for pid in product_ids}
+    
+    def _change_stock(self, deltas):
+        """Apply validated {product_id: delta} changes with one totals update per type."""
+        products = self._products
+        type_value = {}
+        type_stock = {}
+        reordered = []
+        for pid, delta in deltas.items():
+            product = products[pid]
+            product._quantity_in_stock += delta
+            ptype = product.__class__.__name__
+            type_value[ptype] = type_value.get(ptype, 0) + product._price * delta
+            type_stock[ptype] = type_stock.get(ptype, 0) + delta
+            if product._reorder_point is not None:
+                reordered.append((product, delta))
+        with self._totals_lock:
+            for ptype, value in type_value.items():
+                self._total_value += value
+                self._type_value[ptype] += value
+                self._type_stock[ptype] += type_stock[ptype]
+            crossed = [product for product, delta in reordered if self._move_reorder(product, delta)]
+        for product in crossed:
+            self._reorder_crossed(product._product_id, product._name, product._quantity_in_stock,
+                                  product._reorder_point)
+        self._touch(deltas)
+    
+    def total_inventory_value(self):
+        return self._total_value
+    
+    def low_stock_products(self, threshold):
+        return [p for p in self._products.values() if p._quantity_in_stock <= threshold]
+    
+    def set_reorder_point(self, product_id, reorder_point):
+        """Alert when the product's stock falls to reorder_point or below; None stops alerting.
+        
+        Raises ProductNotFoundError, or ValueError unless reorder_point is None or a non-negative integer.
+        """
+        reorder_point = reorder_point_value(reorder_point)
+        with self._all_stripes():
+            product = self.get_product(product_id)
+            if product is None:
+                raise ProductNotFoundError(f"Product {product_id} not found")
+            self._change_reorder_point(product, reorder_point)
+            self._log({"op": "reorder", "id": product_id, "point": reorder_point})
+        self._maybe_compact()
+    
+    def _change_reorder_point(self, product, reorder_point):
+        pid = product._product_id
+        stock = self._stock_levels((pid,))[pid]
+        was_low = product._reorder_point is not None and stock <= product._reorder_point
+        self._set_reorder_point(product, reorder_point)
+        if not was_low and reorder_point is not None and stock <= reorder_point:
+            self._reorder_crossed(pid, product._name, stock, reorder_point)
+        self._touch((pid,))
+    
+    def _set_reorder_point(self, product, reorder_point):
+        with self._totals_lock:
+            if product._reorder_point is not None:
+                self._drop_reorder(product._product_id, product._quantity_in_stock - product._reorder_point)
+            product._reorder_point = reorder_point
+            if reorder_point is not None:
+                self._add_reorder(product, product._quantity_in_stock - reorder_point)
+    
+    def _reorder_due(self):
+        margins = self._reorder_margins
+        return [self._reorder_buckets[margin] for margin in margins[:bisect.bisect_right(margins, 0)]]
+    
+    def reorder_products(self, limit=None):
+        """Products at or below their reorder point, in inventory order; the first limit of them if given."""
+        with self._totals_lock:
+            due = [product for bucket in self._reorder_due() for product in bucket.values()]
+        if limit is not None and limit < len(due):
+            return heapq.nsmallest(limit, due, key=lambda p: self._order[p._product_id])
+        due.sort(key=lambda p: self._order[p._product_id])
+        return due
+    
+    def reorder_count(self):
+        with self._totals_lock:
+            return sum(len(bucket) for bucket in self._reorder_due())
+    
+    def check_consistency(self):
+        """Recompute the derived state from scratch and return a list of mismatches."""
+        problems = []
+        products = self._products.values()
+        
+        def close(a, b):
+            return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+        
+        expected_value = math.fsum(p.get_total_value() for p in products)
+        if not close(self._total_value, expected_value):
+            problems.append(f"total value {self._total_value} != {expected_value}")
+        
+        types = {}
+        for p in products:
+            types.setdefault(p.__class__.__name__, []).append(p)
+            if p._inventory is not self:
+                problems.append(f"product {p._product_id} is not attached to this inventory")
+        if set(types) != set(self._by_type):
+            problems.append(f"indexed types {sorted(self._by_type)} != {sorted(types)}")
+        for ptype, members in types.items():
+            if [p._product_id for p in members] != list(self._by_type.get(ptype, ())):
+                problems.append(f"type index for {ptype} is out of date")
+            value = math.fsum(p.get_total_value() for p in members)
+            if not close(self.value_by_type(ptype), value):
+                problems.append(f"{ptype} value {self.value_by_type(ptype)} != {value}")
+            stock = sum(p._quantity_in_stock for p in members)
+            if self.stock_by_type(ptype) != stock:
+                problems.append(f"{ptype} stock {self.stock_by_type(ptype)} != {stock}")
+        
+        for pid, p in self._products.items():
+            if self._names.get(pid) != str(p._name).lower():
+                problems.append(f"name index for product {pid} is out of date")
+        
+        groceries = {p._product_id for p in types.get("Grocery", ())}
+        indexed = {pid for bucket in self._expiry_buckets.values() for pid in bucket}
+        if groceries != indexed or self._expiry_dates != sorted(self._expiry_buckets):
+            problems.append("expiry index is out of date")
+        
+        margins = {p._product_id: p._quantity_in_stock - p._reorder_point
+                   for p in products if p._reorder_point is not None}
+        indexed = {pid: margin for margin, bucket in self._reorder_buckets.items() for pid in bucket}
+        if margins != indexed or self._reorder_margins != sorted(self._reorder_buckets):
+            problems.append("reorder index is out of date")
+        return problems
+    
+    def _expiry_range(self, start=None, end=None):
+        """Yield groceries expiring in [start, end), earliest first."""
+        dates = self._expiry_dates
+        lo = 0 if start is None else bisect.bisect_left(dates, start)
+        hi = len(dates) if end is None else bisect.bisect_left(dates, end)
+        for expiry in dates[lo:hi]:
+            yield from self._expiry_buckets[expiry].values()
+    
+    def expired_count(self, today=None):
+        if today is None:
+            today = date.today()
+        dates = self._expiry_dates
+        return sum(len(self._expiry_buckets[d]) for d in dates[:bisect.bisect_left(dates, today)])
+    
+    def expired_products(self, today=None):
+        if today is None:
+            today = date.today()
+        return list(self._expiry_range(end=today))
+    
+    def expiring_within(self, days, today=None):
+        """Return groceries that are not expired yet but will be within the next days days."""
+        if today is None:
+            today = date.today()
+        return list(self._expiry_range(today, today + timedelta(days=days + 1)))
+    
+    def remove_expired_products(self):
+        with self._all_stripes():
+            removed = self._remove_expired()
+        self._maybe_compact()
+        return removed
+    
+    def _remove_expired(self):
+        expired = self.expired_products()
+        # Report names in inventory order, as a full scan would
+        expired.sort(key=lambda p: self._order[p._product_id])
+        expired_products = []
+        for product in expired:
+            expired_products.append(product._name)
+            self._discard(product._product_id)
+            self._held.pop(product._product_id, None)
+            self._warehouse_stock.pop(product._product_id, None)
+            self._log({"op": "remove", "id": product._product_id})
+        return expired_products
+    
+    def iter_products(self):
+        return iter(self._products.values())
+    
+    def save_to_file(self, filename):
+        if self._is_journal_snapshot(filename):
+            # The journal's base file must only be rewritten together with the journal
+            return self.compact_journal()
+        try:
+            # Records are serialized one at a time, so memory doesn't grow with the inventory
+            if is_snapshot(filename):
+                builder = ColumnarInventory()
+                for product in self.iter_products():
+                    builder._write_row(product)
+                builder.save_snapshot(filename)
+                return True, "Inventory saved successfully"
+            
+            records = (product.to_dict() for product in self.iter_products())
+            with open(filename, 'w') as f:
+                if is_json_lines(filename):
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+                else:
+                    write_json_array(f, records)
+            return True, "Inventory saved successfully"
+        except Exception as e:
+            return False, f"Error saving file: {str(e)}"
+    
+    def load_from_file(self, filename):
+        # The whole file is read before anything changes, so a bad file leaves the inventory and journal as they were
+        try:
+            staged = self._read_file(filename)
+        except InvalidDataError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Error loading file: {str(e)}"
+        
+        self.close_journal()
+        with self._all_stripes():
+            self._held.clear()
+            self._warehouse_stock.clear()
+            try:
+                self._install(staged)
+            except Exception as e:
+                return False, f"Error loading file: {str(e)}"
+        return True, "Inventory loaded successfully"
+    
+    def _read_file(self, filename):
+        return list(iter_file_products(filename))
+    
+    def _install(self, staged):
+        self._replace_products(staged)
+    
+    def load_from_files(self, sources, on_duplicate="raise", workers=None):
+        """Replace the inventory with several warehouses' saved files, merged into one catalog.
+        
+        sources maps warehouse name -> filename, or is a list of filenames named after their stem.
+        The files are parsed in parallel by up to workers processes (default: one per file, at most
+        one per CPU). on_duplicate is one of MERGE_POLICIES; see merge_warehouses. Raises
+        InvalidDataError or DuplicateProductError and leaves the inventory as it was on failure.
+        Returns the number of products loaded.
+        """
+        if on_duplicate not in MERGE_POLICIES:
+            raise ValueError(f"on_duplicate must be one of {', '.join(MERGE_POLICIES)}")
+        if not isinstance(sources, dict):
+            filenames = list(sources)
+            sources = {Path(filename).stem: filename for filename in filenames}
+            if len(sources) != len(filenames):
+                raise ValueError("Two files have the same name; pass {warehouse: filename} instead")
+        warehouses = list(sources)
+        filenames = [str(sources[warehouse]) for warehouse in warehouses]
+        if workers is None:
+            workers = min(len(filenames), os.cpu_count() or 1)
+        
+        if workers > 1 and len(filenames) > 1:
+            with import_pool(min(workers, len(filenames))) as pool:
+                loaded = list(pool.map(read_inventory_file, filenames))
+        else:
+            loaded = [read_inventory_file(filename) for filename in filenames]
+        products, stock = merge_warehouses(zip(warehouses, loaded), on_duplicate)
+        
+        self.close_journal()
+        with self._all_stripes():
+            self._held.clear()
+            self._replace_products(products)
+            self._warehouse_stock = stock
+        return len(products)
+    
+    def _replace_products(self, products):
+        self._clear()
+        for product in products:
+            self._store(product)
+    
+    def warehouse_stock(self, product_id):
+        """{warehouse: units} for a product as loaded by load_from_files; later sells and restocks change only its total."""
+        return dict(self._warehouse_stock.get(product_id, {}))
+    
+    def warehouse_totals(self):
+        """{warehouse: (products, units)} as loaded by load_from_files, in file order."""
+        totals = {}
+        for by_warehouse in self._warehouse_stock.values():
+            for warehouse, units in by_warehouse.items():
+                products, total = totals.get(warehouse, (0, 0))
+                totals[warehouse] = (products + 1, total + units)
+        return totals
+    
+    def import_products(self, filename, chunk_size=IMPORT_CHUNK_SIZE, workers=None, progress=None):
+        """Add every product in a CSV or Parquet catalog, or none of them.
+        
+        Raises InvalidDataError naming the bad rows, or DuplicateProductError naming IDs that
+        repeat in the file or already exist. progress, if given, is called as progress(fraction, text).
+        Returns the number of products added.
+        """
+        report = progress or (lambda fraction, text: None)
+        frames = []
+        bad_rows = 0
+        messages = []
+        first_row = 1
+        for frame, fraction in iter_import_chunks(filename, chunk_size):
+            clean, bad, found = validate_import_chunk(frame, first_row)
+            first_row += len(frame)
+            bad_rows += bad
+            messages.extend(found[:IMPORT_MAX_ERRORS - len(messages)])
+            if not bad_rows:
+                frames.append(clean)
+            report(0.5 * fraction, f"Validated {first_row - 1:,} rows")
+        if bad_rows:
+            raise InvalidDataError(f"{bad_rows:,} invalid row(s). " + "; ".join(messages))
+        
+        ids = np.concatenate([frame["product_id"].to_numpy() for frame in frames]) if frames else np.empty(0, np.int64)
+        unique, counts = np.unique(ids, return_counts=True)
+        total = len(ids)
+        with self._all_stripes():
+            # The whole file is checked as a group before anything is added
+            repeated = unique[counts > 1].tolist()
+            existing = sorted(self._stock_levels(unique.tolist()))
+            if repeated or existing:
+                shown = ", ".join(str(pid) for pid in (repeated + existing)[:IMPORT_MAX_ERRORS])
+                raise DuplicateProductError(
+                    f"{len(repeated):,} ID(s) repeat in the file and {len(existing):,} already exist: {shown}")
+            for done in self._import_frames(frames, IMPORT_WORKERS if workers is None else workers):
+                report(0.5 + 0.5 * done / max(total, 1), f"Added {done:,} of {total:,} products")
+        self._maybe_compact()
+        return total
+    
+    def _import_frames(self, frames, workers):
+        """Store validated import chunks, yielding the running count after each one."""
+        pool = import_pool(workers) if workers > 1 and len(frames) > 1 else None
+        batches = pool.map(products_from_frame, frames) if pool else map(products_from_frame, frames)
+        try:
+            done = 0
+            for batch in batches:
+                for product in batch:
+                    self._store(product)
+                    self._log({"op": "add", "product": product.to_dict()})
+                done += len(batch)
+                yield done
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    # Journaling: changes are appended to <snapshot>.log and folded into the snapshot on compaction
+    def _log(self, record):
+        if self._journal is not None:
+            self._journal.append(record)
+    
+    def _maybe_compact(self):
+        # Called after the caller's stripe is released: compaction needs every stripe
+        journal = self._journal
+        if journal is not None and journal.records >= journal.compact_every:
+            with self._all_stripes():
+                if self._journal is journal and journal.records >= journal.compact_every:
+                    self.compact_journal()
+    
+    def _is_journal_snapshot(self, filename):
+        return (self._journal is not None
+                and os.path.abspath(filename) == os.path.abspath(self._journal.snapshot))
+    
+    def _apply_change(self, record):
+        op = record["op"]
+        if op == "add":
+            self._store(product_from_dict(record["product"]))
+            return
+        if op == "batch":
+            self._apply_batch_record(record)
+            return
+        product = self.get_product(record["id"])
+        if product is None:
+            raise InvalidDataError(f"Product {record['id']} not found")
+        if op == "remove":
+            self._discard(record["id"])
+        elif op == "sell":
+            product.sell(record["qty"])
+        elif op == "restock":
+            product.restock(record["qty"])
+        elif op == "reorder":
+            self._change_reorder_point(product, reorder_point_value(record["point"]))
+        else:
+            raise InvalidDataError(f"Unknown journal operation: {op}")
+    
+    def _apply_batch_record(self, record):
+        deltas = {}
+        for pid, delta in record["deltas"]:
+            deltas[pid] = deltas.get(pid, 0) + delta
+        levels = self._stock_levels(deltas)
+        for pid, delta in deltas.items():
+            if pid not in levels:
+                raise InvalidDataError(f"Product {pid} not found")
+            if levels[pid] + delta < 0:
+                raise InvalidDataError(f"Product {pid} would go below zero stock")
+        self._change_stock(deltas)
+    
+    def _replay_journal(self, log_path, base):
+        """Apply log_path's records if it belongs to base; return how many, or None if unusable."""
+        if not os.path.exists(log_path):
+            return None
+        count = 0
+        with open(log_path, "rb") as f:
+            header = f.readline()
+            try:
+                if json.loads(header).get("base") != base:
+                    return None  # left over from before the last compaction
+            except ValueError:
+                return None
+            good = f.tell()
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                record = None
+                if line.endswith(b"\n"):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        pass
+                if record is None:
+                    if f.readline():
+                        raise InvalidDataError(f"Journal record {count + 1} is corrupt")
+                    break  # torn write at the tail from a crash: drop it
+                try:
+                    self._apply_change(record)
+                except (InvalidDataError, KeyError, TypeError, ValueError) as e:
+                    raise InvalidDataError(f"Journal record {count + 1}: {e}")
+                count += 1
+                good = f.tell()
+        if good < os.path.getsize(log_path):
+            os.truncate(log_path, good)
+        return count
+    
+    def open_journal(self, filename, compact_every=JOURNAL_COMPACT_EVERY, sync=False):
+        """Load filename and replay its journal, then log every change to the journal."""
+        if os.path.exists(filename):
+            success, message = self.load_from_file(filename)
+        else:
+            self.close_journal()
+            success, message = self.save_to_file(filename)
+        if not success:
+            return success, message
+        
+        log_path = str(filename) + JOURNAL_SUFFIX
+        base = file_identity(filename)
+        try:
+            with self._all_stripes():
+                replayed = self._replay_journal(log_path, base)
+        except InvalidDataError as e:
+            return False, str(e)
+        if replayed is None:
+            start_journal(log_path, base)
+            replayed = 0
+        
+        self._journal = Journal(filename, log_path, compact_every, sync)
+        self._journal.records = replayed
+        if replayed >= compact_every:
+            return self.compact_journal()
+        return True, f"Journal opened, replayed {replayed} changes"
+    
+    def compact_journal(self):
+        """Fold the journal into a fresh snapshot and start an empty journal."""
+        journal = self._journal
+        if journal is None:
+            return False, "No journal is open"
+        snapshot = Path(journal.snapshot)
+        staging = snapshot.with_name(".compacting-" + snapshot.name)
+        # No stock change may land between writing the snapshot and resetting the journal
+        with self._all_stripes():
+            success, message = self.save_to_file(staging)
+            if not success:
+                return success, message
+            
+            journal.close()
+            os.replace(staging, snapshot)
+            # If we crash before the new journal is in place, the old one no longer matches the snapshot
+            start_journal(journal.path, file_identity(snapshot))
+            self._journal = Journal(journal.snapshot, journal.path, journal.compact_every, journal.sync)
+        return True, "Journal compacted into snapshot"
+    
+    def close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+# Columnar Inventory backend
+# Products live as rows of NumPy columns; Product objects are built on access
+COLUMNAR_TYPES = ("Electronics", "Grocery", "Clothing")
+REMOVED_TYPE = -1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()  # day 0 of datetime64[D], as a date ordinal
+COLUMNAR_COLUMNS = (
+    ("ids", np.int64),
+    ("prices", np.float64),
+    ("stock", np.int64),
+    ("types", np.int8),      # index into COLUMNAR_TYPES, REMOVED_TYPE for deleted rows
+    ("expiry", np.int32),    # date ordinal, Grocery only
+    ("warranty", np.int32),  # Electronics only
+    ("attr1", np.int32),     # string code: brand / expiry_date / size
+    ("attr2", np.int32),     # string code: material
+    ("reorder", np.int64),   # reorder point, NO_REORDER for none
+)
+NO_REORDER = -1  # below any stock level, so "stock <= reorder" is never true without a reorder point
+# Everything a staged load hands over to the instance it replaces
+COLUMNAR_STATE = ("_columns", "_size", "_removed", "_row_map", "_scans", "_mapped", "_names", "_strings",
+                  "_string_codes")
+# Point lookups on a fresh snapshot scan the ids column this many times, then build the id -> row map
+SNAPSHOT_SCAN_LOOKUPS = 8
+
+class ColumnarInventory(Inventory):
+    """Inventory backend keeping numeric fields in NumPy arrays and strings dictionary-encoded.
+    
+    Totals, type counts, expiry and low-stock queries run vectorized. Rows are kept in
+    insertion order; removed rows are tombstoned and compacted away in bulk.
+    """
+    
+    def __init__(self, capacity=1024):
+        self._initial_capacity = capacity
+        self._init_concurrency()
+        self._init_versions()
+        self._init_events()
+        self._reset()
+    
+    def _reset(self):
+        self._columns = {name: np.zeros(self._initial_capacity, dtype) for name, dtype in COLUMNAR_COLUMNS}
+        self._size = 0              # rows in use, including tombstones
+        self._removed = 0
+        self._row_map = {}          # product_id -> row; None until first needed after a snapshot load
+        self._scans = 0             # point lookups answered by scanning while _row_map is None
+        self._mapped = None         # snapshot file the columns and names are mapped from, if any
+        self._names = []            # row -> name (None for removed rows), or SnapshotNames
+        self._strings = []          # string table for attr1 / attr2
+        self._string_codes = {}
+        self._views = weakref.WeakValueDictionary()  # product_id -> live Product view
+        self._name_blob = None      # lowercased names joined for search, rebuilt lazily
+    
+    @property
+    def _row_of(self):
+        if self._row_map is None:
+            rows = self._live_rows()
+            self._row_map = dict(zip(self._column("ids")[rows].tolist(), rows.tolist()))
+        return self._row_map
+    
+    def _find_row(self, product_id):
+        if (self._row_map is None and self._scans < SNAPSHOT_SCAN_LOOKUPS
+                and isinstance(product_id, (int, np.integer))):
+            # Fresh snapshot: a vectorized scan beats building the id map for a few lookups, not for many
+            self._scans += 1
+            mask = (self._column("ids") == product_id) & (self._column("types") != REMOVED_TYPE)
+            rows = np.flatnonzero(mask)
+            return int(rows[0]) if len(rows) else None
+        return self._row_of.get(product_id)
+    
+    def _unmap(self):
+        """Copy mapped columns and names into memory, so the snapshot file can be replaced."""
+        self._columns = {name: np.array(column) for name, column in self._columns.items()}
+        self._mutable_names()
+        self._mapped = None
+    
+    def _mutable_names(self):
+        if not isinstance(self._names, list):
+            self._names = list(self._names)
+        return self._names
+    
+    def _encode(self, text):
+        code = self._string_codes.get(text)
+        if code is None:
+            code = self._string_codes[text] = len(self._strings)
+            self._strings.append(text)
+        return code
+    
+    def _column(self, name):
+        return self._columns[name][:self._size]
+    
+    def _live_rows(self):
+        return np.flatnonzero(self._column("types") != REMOVED_TYPE)
+    
+    def _type_mask(self, product_type):
+        if product_type not in COLUMNAR_TYPES:
+            return np.zeros(self._size, bool)
+        return self._column("types") == COLUMNAR_TYPES.index(product_type)
+    
+    def _materialize(self, row):
+        cols = self._columns
+        strings = self._strings
+        pid = int(cols["ids"][row])
+        common = (pid, self._names[row], float(cols["prices"][row]), int(cols["stock"][row]))
+        reorder_point = int(cols["reorder"][row])
+        reorder_point = None if reorder_point == NO_REORDER else reorder_point
+        ptype = COLUMNAR_TYPES[cols["types"][row]]
+        if ptype == "Electronics":
+            product = Electronics(*common, int(cols["warranty"][row]), strings[cols["attr1"][row]], reorder_point)
+        elif ptype == "Grocery":
+            product = Grocery(*common, strings[cols["attr1"][row]], reorder_point)
+        else:
+            product = Clothing(*common, strings[cols["attr1"][row]], strings[cols["attr2"][row]], reorder_point)
+        product._inventory = self
+        self._views[pid] = product
+        return product
+    
+    def _products_at(self, rows):
+        ids = self._columns["ids"]
+        views = self._views
+        products = []
+        for row in rows:
+            product = views.get(int(ids[row]))
+            products.append(product if product is not None else self._materialize(row))
+        return products
+    
+    def _store(self, product):
+        self._write_row(product)
+        product._inventory = self
+        self._views[product._product_id] = product
+        self._touch((product._product_id,))
+    
+    def _write_row(self, product):
+        pid = product._product_id
+        if not isinstance(pid, (int, np.integer)) or isinstance(pid, bool):
+            raise InvalidDataError(f"Columnar inventory needs integer product IDs, got {pid!r}")
+        ptype = product.__class__.__name__
+        if ptype not in COLUMNAR_TYPES:
+            raise InvalidDataError(f"Unknown product type: {ptype}")
+        
+        row = self._row_of.get(pid)
+        if row is None:
+            if self._size == len(self._columns["ids"]):
+                self._resize(max(2 * self._size, 16))
+            row = self._size
+            self._size += 1
+            self._row_of[pid] = row
+            self._mutable_names().append(None)
+        else:
+            old = self._views.pop(pid, None)
+            if old is not None:
+                old._inventory = None
+        
+        cols = self._columns
+        cols["ids"][row] = pid
+        cols["prices"][row] = product._price
+        cols["stock"][row] = product._quantity_in_stock
+        cols["types"][row] = COLUMNAR_TYPES.index(ptype)
+        cols["reorder"][row] = NO_REORDER if product._reorder_point is None else product._reorder_point
+        if ptype == "Electronics":
+            cols["warranty"][row] = product._warranty_years
+            cols["attr1"][row] = self._encode(product._brand)
+        elif ptype == "Grocery":
+            cols["expiry"][row] = product._expiry.toordinal()
+            cols["attr1"][row] = self._encode(product._expiry_date)
+        else:
+            cols["attr1"][row] = self._encode(product._size)
+            cols["attr2"][row] = self._encode(product._material)
+        self._mutable_names()[row] = product._name
+        self._name_blob = None
+    
+    def _discard(self, product_id):
+        row = self._row_of.pop(product_id)
+        product = self._views.pop(product_id, None)
+        if product is None:
+            product = self._materialize(row)
+            del self._views[product_id]
+        product._inventory = None
+        
+        cols = self._columns
+        cols["types"][row] = REMOVED_TYPE
+        cols["prices"][row] = 0
+        cols["stock"][row] = 0
+        cols["reorder"][row] = NO_REORDER
+        self._mutable_names()[row] = None
+        self._removed += 1
+        self._name_blob = None
+        if self._removed > self.product_count():
+            self._compact()
+        self._touch((product_id,))
+        return product
+    
+    def _clear(self):
+        for product in self._views.values():
+            product._inventory = None
+        self._reset()
+        self._touch()
+    
+    def _resize(self, capacity):
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+    
+    def _compact(self):
+        rows = self._live_rows()
+        for name, column in self._columns.items():
+            kept = column[rows]
+            column[:len(rows)] = kept
+        self._names = [self._names[row] for row in rows]
+        self._size = len(rows)
+        self._removed = 0
+        ids = self._columns["ids"]
+        self._row_map = {int(ids[row]): row for row in range(self._size)}
+        self._name_blob = None
+    
+    def _stock_changed(self, product, delta):
+        row = self._find_row(product._product_id)
+        stock = self._columns["stock"]
+        stock[row] += delta
+        level = int(stock[row])
+        reorder_point = int(self._columns["reorder"][row])
+        if level <= reorder_point < level - delta:
+            self._reorder_crossed(product._product_id, product._name, level, reorder_point)
+        self._touch((product._product_id,))
+    
+    def _stock_levels(self, product_ids):
+        row_of = self._row_of
+        found = [(pid, row_of[pid]) for pid in product_ids if pid in row_of]
+        if not found:
+            return {}
+        stock = self._columns["stock"][[row for _, row in found]].tolist()
+        return {pid: level for (pid, _), level in zip(found, stock)}
+    
+    def _prices(self, product_ids):
+        row_of = self._row_of
+        rows = [row_of[pid] for pid in product_ids]
+        return dict(zip(product_ids, self._columns["prices"][rows].tolist()))
+    
+    def _change_stock(self, deltas):
+        row_of = self._row_of
+        rows = np.fromiter((row_of[pid] for pid in deltas), np.int64, len(deltas))
+        stock = self._columns["stock"]
+        before = stock[rows]
+        stock[rows] += np.fromiter(deltas.values(), stock.dtype, len(deltas))
+        reorder = self._columns["reorder"][rows]
+        for row in rows[(stock[rows] <= reorder) & (before > reorder)].tolist():
+            self._reorder_crossed(int(self._columns["ids"][row]), self._names[row], int(stock[row]),
+                                  int(self._columns["reorder"][row]))
+        views = self._views
+        for pid, row in zip(deltas, rows.tolist()):
+            product = views.get(pid)
+            if product is not None:
+                product._quantity_in_stock = int(stock[row])
+        self._touch(deltas)
+    
+    def _available(self, product):
+        # A view materialized by another thread may predate the last sell; the column is the truth
+        product._quantity_in_stock = int(self._columns["stock"][self._find_row(product._product_id)])
+        return super()._available(product)
+    
+    def get_product(self, product_id):
+        row = self._find_row(product_id)
+        if row is None:
+            return None
+        product = self._views.get(product_id)
+        return product if product is not None else self._materialize(row)
+    
+    def list_all_products(self):
+        return self._products_at(self._live_rows())
+    
+    def iter_products(self):
+        # Views are not kept alive here, so a full pass stays flat in memory
+        for row in self._live_rows():
+            product = self._views.get(int(self._columns["ids"][row]))
+            yield product if product is not None else self._materialize(row)
+    
+    def product_count(self):
+        return self._size - self._removed
+    
+    def search_by_name(self, name):
+        if not name:
+            return self.list_all_products()
+        return self._products_at(self._name_rows(name))
+    
+    def _name_rows(self, name):
+        """Rows whose lowercased name contains name.lower(), in row order."""
+        query = name.lower()
+        if "\0" in query:
+            return np.empty(0, np.int64)
+        if self._name_blob is None:
+            # Names can't contain NUL, so matches never span two rows
+            lowered = ["" if n is None else str(n).lower() + "\0" for n in self._names]
+            lengths = np.fromiter((len(n) for n in lowered), np.int64, len(lowered))
+            self._name_starts = np.concatenate(([0], np.cumsum(lengths)))
+            self._name_blob = "".join(lowered)
+        
+        if not query:
+            return self._live_rows()
+        blob = self._name_blob
+        hits = []
+        pos = blob.find(query)
+        while pos != -1:
+            hits.append(pos)
+            pos = blob.find(query, pos + 1)
+        # Map match offsets back to rows; a row can match more than once
+        rows = np.unique(np.searchsorted(self._name_starts, hits, side="right") - 1)
+        return rows[self._columns["types"][rows] != REMOVED_TYPE]
+    
+    def query_page(self, offset=0, limit=50, sort_by=None, descending=False, product_type=None, name=None):
+        if sort_by is not None and sort_by not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Can't sort by {sort_by!r}")
+        rows = self._name_rows(name) if name else self._live_rows()
+        if product_type:
+            rows = rows[self._type_mask(product_type)[rows]]
+        
+        if sort_by is None:
+            order = rows[::-1] if descending else rows
+        elif sort_by == "name":
+            names = self._names
+            keyed = sorted(rows.tolist(), key=lambda row: str(names[row]).lower(), reverse=descending)
+            order = np.array(keyed, np.int64)
+        else:
+            if sort_by == "type":
+                # Type codes aren't alphabetical; rank them so the order matches the type names
+                ranks = np.argsort(np.argsort(COLUMNAR_TYPES))
+                keys = ranks[self._columns["types"][rows]]
+            elif sort_by == "value":
+                keys = self._columns["prices"][rows] * self._columns["stock"][rows]
+            else:
+                keys = self._columns[{"product_id": "ids", "price": "prices", "quantity_in_stock": "stock"}[sort_by]][rows]
+            # Stable sorts keep row (insertion) order among ties, in both directions
+            order = rows[np.argsort(-keys if descending else keys, kind="stable")]
+        return len(rows), self._products_at(order[offset:offset + limit])
+    
+    def search_by_type(self, product_type):
+        return self._products_at(np.flatnonzero(self._type_mask(product_type)))
+    
+    def query(self, predicate):
+        # The conditions run vectorized up front; only the products are built lazily
+        _, rows = self._plan(predicate)
+        return self._query_products(self._columns["ids"][rows[predicate._mask(self, rows)]])
+    
+    def _query_products(self, ids):
+        # By id, not row: a compaction while the caller iterates moves rows
+        for start in range(0, len(ids), QUERY_CHUNK):
+            for pid in ids[start:start + QUERY_CHUNK].tolist():
+                product = self.get_product(pid)
+                if product is not None:
+                    yield product
+    
+    def _plan(self, predicate):
+        """(description, rows to evaluate predicate on): an id lookup or name search narrows them."""
+        for part in sorted(predicate.conjuncts(), key=lambda part: part.cost):
+            field = getattr(part, "field", None)
+            if field == "product_id" and (isinstance(part, In) or isinstance(part, Compare) and part.op == "=="):
+                values = part.values if isinstance(part, In) else (part.value,)
+                found = (self._find_row(value) for value in values if isinstance(value, (int, np.integer)))
+                rows = np.array(sorted(row for row in found if row is not None), np.int64)
+                return f"product_id lookup: {len(rows):,} rows", rows
+            if field == "name" and isinstance(part, Contains):
+                rows = self._name_rows(part.text)
+                return f"name search: {len(rows):,} rows", rows
+        return f"column scan: {self.product_count():,} rows", self._live_rows()
+    
+    def count_by_type(self, product_type):
+        return int(np.count_nonzero(self._type_mask(product_type)))
+    
+    def value_by_type(self, product_type):
+        mask = self._type_mask(product_type)
+        return float(np.dot(self._column("prices")[mask], self._column("stock")[mask]))
+    
+    def stock_by_type(self, product_type):
+        return int(self._column("stock")[self._type_mask(product_type)].sum())
+    
+    def total_inventory_value(self):
+        # Removed rows have price and stock zeroed, so no mask is needed
+        return float(np.dot(self._column("prices"), self._column("stock")))
+    
+    def low_stock_products(self, threshold):
+        mask = (self._column("stock") <= threshold) & (self._column("types") != REMOVED_TYPE)
+        return self._products_at(np.flatnonzero(mask))
+    
+    def _set_reorder_point(self, product, reorder_point):
+        row = self._find_row(product._product_id)
+        self._columns["reorder"][row] = NO_REORDER if reorder_point is None else reorder_point
+        product._reorder_point = reorder_point
+    
+    def _reorder_mask(self):
+        # Removed rows and rows without a reorder point hold NO_REORDER, so need no mask of their own
+        return self._column("stock") <= self._column("reorder")
+    
+    def reorder_products(self, limit=None):
+        return self._products_at(np.flatnonzero(self._reorder_mask())[:limit])
+    
+    def reorder_count(self):
+        return int(np.count_nonzero(self._reorder_mask()))
+    
+    def _expired_mask(self, today):
+        return self._type_mask("Grocery") & (self._column("expiry") < today.toordinal())
+    
+    def expired_count(self, today=None):
+        if today is None:
+            today = date.today()
+        return int(np.count_nonzero(self._expired_mask(today)))
+    
+    def expired_products(self, today=None):
+        if today is None:
+            today = date.today()
+        rows = np.flatnonzero(self._expired_mask(today))
+        rows = rows[np.argsort(self._column("expiry")[rows], kind="stable")]
+        return self._products_at(rows)
+    
+    def expiring_within(self, days, today=None):
+        if today is None:
+            today = date.today()
+        expiry = self._column("expiry")
+        start = today.toordinal()
+        mask = self._type_mask("Grocery") & (expiry >= start) & (expiry <= start + days)
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(expiry[rows], kind="stable")]
+        return self._products_at(rows)
+    
+    def _remove_expired(self):
+        rows = np.flatnonzero(self._expired_mask(date.today()))
+        ids = self._columns["ids"]
+        expired_products = [self._names[row] for row in rows]
+        for pid in [int(ids[row]) for row in rows]:
+            self._discard(pid)
+            self._held.pop(pid, None)
+            self._warehouse_stock.pop(pid, None)
+            self._log({"op": "remove", "id": pid})
+        return expired_products
+    
+    def save_snapshot(self, filename):
+        if self._mapped is not None and os.path.exists(filename) and os.path.samefile(filename, self._mapped):
+            self._unmap()
+        rows = self._live_rows()
+        columns = {name: self._column(name)[rows] for name, _ in COLUMNAR_COLUMNS}
+        write_snapshot(filename, columns, [self._names[row] for row in rows], self._strings)
+    
+    def open_snapshot(self, filename):
+        """Memory-map a snapshot; products are only built when accessed."""
+        header, mapped = read_snapshot(filename)
+        rows = header["rows"]
+        columns = {}
+        # Everything is checked before the current rows are dropped
+        for name, dtype in COLUMNAR_COLUMNS:
+            offset = header["columns"].get(name)
+            if offset is None:
+                # Snapshots from before reorder points have no reorder column
+                columns[name] = np.full(rows, NO_REORDER, dtype)
+                continue
+            columns[name] = mapped[offset:offset + rows * np.dtype(dtype).itemsize].view(dtype)
+            if len(columns[name]) != rows:
+                raise InvalidDataError(f"{filename} is truncated")
+        names = SnapshotNames(mapped, header)
+        if len(names) != rows or (rows and names._offsets[-1] > len(names._data)):
+            raise InvalidDataError(f"{filename} is truncated")
+        
+        self._clear()
+        self._columns = columns
+        self._size = rows
+        self._row_map = None
+        self._mapped = filename
+        self._names = names
+        self._strings = header["strings"]
+        self._string_codes = {text: code for code, text in enumerate(self._strings)}
+        self._touch()
+    
+    def save_to_file(self, filename):
+        if not is_snapshot(filename) or self._is_journal_snapshot(filename):
+            return super().save_to_file(filename)
+        try:
+            self.save_snapshot(filename)
+            return True, "Inventory saved successfully"
+        except Exception as e:
+            return False, f"Error saving file: {str(e)}"
+    
+    def _import_frames(self, frames, workers):
+        if self._journal is not None:
+            # The journal needs one add record per product, so go through Product objects
+            yield from super()._import_frames(frames, workers)
+            return
+        done = 0
+        for frame in frames:
+            self._append_frame(frame)
+            done += len(frame)
+            yield done
+    
+    def _append_frame(self, frame):
+        """Write a validated import chunk straight into new rows, without building Products."""
+        import pandas as pd
+        count = len(frame)
+        start = self._size
+        if start + count > len(self._columns["ids"]):
+            self._resize(max(2 * self._size, start + count, 16))
+        rows = slice(start, start + count)
+        cols = self._columns
+        types = frame["type"].map({ptype: code for code, ptype in enumerate(COLUMNAR_TYPES)}).to_numpy()
+        electronics = types == COLUMNAR_TYPES.index("Electronics")
+        grocery = types == COLUMNAR_TYPES.index("Grocery")
+        clothing = types == COLUMNAR_TYPES.index("Clothing")
+        ids = frame["product_id"].to_numpy()
+        
+        cols["ids"][rows] = ids
+        cols["prices"][rows] = frame["price"].to_numpy()
+        cols["stock"][rows] = frame["quantity_in_stock"].to_numpy()
+        cols["types"][rows] = types
+        cols["reorder"][rows] = frame["reorder_point"].to_numpy()
+        cols["warranty"][rows] = np.where(electronics, frame["warranty_years"].to_numpy(), 0)
+        days = pd.to_datetime(frame["expiry_date"].where(grocery), format="%Y-%m-%d").to_numpy("datetime64[D]")
+        cols["expiry"][rows] = np.where(grocery, days.astype(np.int64) + EPOCH_ORDINAL, 0)
+        attr1 = np.where(electronics, frame["brand"], np.where(grocery, frame["expiry_date"], frame["size"]))
+        attr2 = np.where(clothing, frame["material"], "")
+        for name, values in (("attr1", attr1), ("attr2", attr2)):
+            codes, strings = pd.factorize(values)
+            cols[name][rows] = np.array([self._encode(text) for text in strings], cols[name].dtype)[codes]
+        
+        self._mutable_names().extend(frame["name"].tolist())
+        if self._row_map is not None:
+            self._row_map.update(zip(ids.tolist(), range(start, start + count)))
+        self._size += count
+        self._name_blob = None
+        self._touch(ids.tolist())
+    
+    def _read_file(self, filename):
+        # Staged as rows of a separate instance, then swapped in whole
+        staged = ColumnarInventory()
+        if is_snapshot(filename):
+            staged.open_snapshot(filename)
+        else:
+            for product in iter_file_products(filename):
+                staged._store(product)
+        return staged
+    
+    def _install(self, staged):
+        for product in self._views.values():
+            product._inventory = None
+        for name in COLUMNAR_STATE:
+            setattr(self, name, getattr(staged, name))
+        self._views = weakref.WeakValueDictionary()
+        self._name_blob = None
+        self._touch()
+    
+    def check_consistency(self):
+        """Check the row map and cached views against the columns; return a list of mismatches."""
+        problems = []
+        rows = self._live_rows()
+        ids = self._column("ids")
+        if len(rows) != len(self._row_of):
+            problems.append(f"{len(rows)} live rows but {len(self._row_of)} mapped ids")
+        for pid, row in self._row_of.items():
+            if ids[row] != pid or self._columns["types"][row] == REMOVED_TYPE:
+                problems.append(f"row map for product {pid} is out of date")
+        if self._size - len(rows) != self._removed:
+            problems.append("tombstone count is out of date")
+        for pid, product in list(self._views.items()):
+            row = self._row_of.get(pid)
+            if row is None:
+                problems.append(f"view for removed product {pid} is still cached")
+            elif (product._inventory is not self or product._quantity_in_stock != self._columns["stock"][row]
+                  or (NO_REORDER if product._reorder_point is None else product._reorder_point)
+                  != self._columns["reorder"][row]):
+                problems.append(f"view for product {pid} is out of sync")
+        return problems
+
+# Binary snapshots: a JSON header followed by 64-byte aligned column blocks, mapped with np.memmap
+SNAPSHOT_SUFFIX = ".invsnap"
+SNAPSHOT_MAGIC = b"INVSNAP1"
+SNAPSHOT_ALIGN = 64
+
+def is_snapshot(filename):
+    return str(filename).lower().endswith(SNAPSHOT_SUFFIX)
+
+def _aligned(offset):
+    return -(-offset // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+def write_snapshot(filename, columns, names, strings):
+    """Write fixed-width columns, a UTF-8 name table and the attribute string table."""
+    encoded = [("" if name is None else str(name)).encode("utf-8") for name in names]
+    name_offsets = np.zeros(len(encoded) + 1, np.int64)
+    np.cumsum([len(b) for b in encoded], out=name_offsets[1:])
+    blocks = [(name, np.ascontiguousarray(column)) for name, column in columns.items()]
+    blocks.append(("name_offsets", name_offsets))
+    blocks.append(("name_data", np.frombuffer(b"".join(encoded), np.uint8)))
+    
+    # Block offsets live in the header, so reserve a header slot large enough for them
+    layout = {"rows": len(names), "strings": list(strings), "columns": {}}
+    header_slot = len(json.dumps(layout).encode("utf-8")) + 64 * (len(blocks) + 1)
+    offset = _aligned(len(SNAPSHOT_MAGIC) + 8 + header_slot)
+    for name, block in blocks:
+        layout["columns"][name] = offset
+        offset = _aligned(offset + block.nbytes)
+    header = json.dumps(layout).encode("utf-8")
+    
+    # Written aside and renamed over the target: an instance mapping the old file keeps its pages
+    staging = f"{filename}.tmp"
+    with open(staging, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, block in blocks:
+            f.write(b"\0" * (layout["columns"][name] - f.tell()))
+            f.write(block.tobytes())
+    os.replace(staging, filename)
+
+def read_snapshot(filename):
+    """Return (header, copy-on-write byte map of the whole file)."""
+    with open(filename, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise InvalidDataError(f"{filename} is not an inventory snapshot")
+        header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+    # mode "c": sell/restock on the mapped columns stay private to this process
+    return header, np.memmap(filename, dtype=np.uint8, mode="c")
+
+class SnapshotNames:
+    """Read-only row -> name sequence decoded on demand from a mapped snapshot."""
+    
+    def __init__(self, mapped, header):
+        rows = header["rows"]
+        start = header["columns"]["name_offsets"]
+        self._offsets = mapped[start:start + (rows + 1) * 8].view(np.int64)
+        self._data = mapped[header["columns"]["name_data"]:]
+    
+    def __len__(self):
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, row):
+        return self._data[self._offsets[row]:self._offsets[row + 1]].tobytes().decode("utf-8")
+    
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+def convert_inventory_file(source, target):
+    """Convert between the JSON, JSON-lines and snapshot formats, chosen by file extension."""
+    inventory = ColumnarInventory()
+    success, message = inventory.load_from_file(source)
+    if not success:
+        return success, message
+    return inventory.save_to_file(target)
+
+# SQLite Inventory backend
+SQLITE_FIELDS = ("product_id", "type", "name", "price", "quantity_in_stock",
+                 "warranty_years", "brand", "expiry_date", "size", "material", "reorder_point")
+SQLITE_DUE = "p.reorder_point IS NOT NULL AND p.quantity_in_stock - p.reorder_point <= 0"
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    name NOT NULL,
+    price NOT NULL,
+    quantity_in_stock NOT NULL,
+    warranty_years,
+    brand,
+    expiry_date,
+    expiry_ordinal INTEGER,
+    size,
+    material,
+    reorder_point INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_products_type ON products(type);
+CREATE INDEX IF NOT EXISTS idx_products_expiry ON products(expiry_ordinal) WHERE expiry_ordinal IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_products_stock ON products(quantity_in_stock);
+-- Stock left above the reorder point; the products due for reorder are the entries <= 0
+CREATE INDEX IF NOT EXISTS idx_products_reorder ON products(quantity_in_stock - reorder_point)
+    WHERE reorder_point IS NOT NULL;
+-- Lowercased names, rowid-aligned with products; trigrams answer substring search
+CREATE VIRTUAL TABLE IF NOT EXISTS product_names USING fts5(name, tokenize='trigram case_sensitive 1');
+"""
+
+class SQLiteInventory(Inventory):
+    """Inventory backend stored in SQLite; searches, totals and expiry run as indexed SQL.
+    
+    Products are materialized from rows on access and cached weakly, like ColumnarInventory.
+    The database path defaults to INVENTORY_DB, or an in-memory database.
+    """
+    
+    def __init__(self, path=None):
+        if path is None:
+            path = os.environ.get("INVENTORY_DB", ":memory:")
+        self._init_concurrency()
+        self._init_versions()
+        self._init_events()
+        self._views = weakref.WeakValueDictionary()
+        # Autocommit; multi-row changes use _transaction. Streamlit may rerun on another thread.
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(products)")}
+        if columns and "reorder_point" not in columns:
+            # A database from before reorder points
+            self._conn.execute("ALTER TABLE products ADD COLUMN reorder_point INTEGER")
+        self._conn.executescript(SQLITE_SCHEMA)
+        # Case folding for query(): SQLite's lower() only folds ASCII
+        self._conn.create_function("py_lower", 1, lambda text: None if text is None else str(text).lower(),
+                                   deterministic=True)
+    
+    @contextmanager
+    def _transaction(self):
+        if self._conn.in_transaction:
+            yield
+            return
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _select(self, where="", params=(), order="p.rowid"):
+        columns = ", ".join(f"p.{field}" for field in SQLITE_FIELDS)
+        sql = f"SELECT {columns} FROM products p {where} ORDER BY {order}"
+        return self._conn.execute(sql, params)
+    
+    def _view(self, row):
+        product = self._views.get(row[0])
+        if product is None:
+            item = {field: value for field, value in zip(SQLITE_FIELDS, row) if value is not None}
+            product = product_from_dict(item)
+            product._inventory = self
+            self._views[row[0]] = product
+        return product
+    
+    def _store(self, product):
+        record = product.to_dict()
+        values = [record.get(field) for field in SQLITE_FIELDS]
+        expiry = product._expiry.toordinal() if isinstance(product, Grocery) else None
+        updates = ", ".join(f"{field} = excluded.{field}" for field in SQLITE_FIELDS[1:])
+        with self._transaction():
+            # Upsert keeps the rowid, so a reloaded product keeps its position like a dict key
+            rowid = self._conn.execute(
+                f"INSERT INTO products ({', '.join(SQLITE_FIELDS)}, expiry_ordinal) "
+                f"VALUES ({', '.join('?' * (len(SQLITE_FIELDS) + 1))}) "
+                f"ON CONFLICT(product_id) DO UPDATE SET {updates}, expiry_ordinal = excluded.expiry_ordinal "
+                f"RETURNING rowid", values + [expiry]).fetchone()[0]
+            self._conn.execute("DELETE FROM product_names WHERE rowid = ?", (rowid,))
+            self._conn.execute("INSERT INTO product_names (rowid, name) VALUES (?, ?)",
+                               (rowid, str(product._name).lower()))
+        
+        old = self._views.get(product._product_id)
+        if old is not None and old is not product:
+            old._inventory = None
+        product._inventory = self
+        self._views[product._product_id] = product
+        self._touch((product._product_id,))
+    
+    def _discard(self, product_id):
+        product = self.get_product(product_id)
+        with self._transaction():
+            rowid = self._conn.execute("DELETE FROM products WHERE product_id = ? RETURNING rowid",
+                                       (product_id,)).fetchone()[0]
+            self._conn.execute("DELETE FROM product_names WHERE rowid = ?", (rowid,))
+        self._views.pop(product_id, None)
+        product._inventory = None
+        self._touch((product_id,))
+        return product
+    
+    def _clear(self):
+        for product in self._views.values():
+            product._inventory = None
+        self._views = weakref.WeakValueDictionary()
+        with self._transaction():
+            self._conn.execute("DELETE FROM products")
+            self._conn.execute("DELETE FROM product_names")
+        self._touch()
+    
+    def _stock_changed(self, product, delta):
+        (level, reorder_point), = self._conn.execute(
+            "UPDATE products SET quantity_in_stock = quantity_in_stock + ? WHERE product_id = ? "
+            "RETURNING quantity_in_stock, reorder_point", (delta, product._product_id)).fetchall()
+        if reorder_point is not None and level <= reorder_point < level - delta:
+            self._reorder_crossed(product._product_id, product._name, level, reorder_point)
+        self._touch((product._product_id,))
+    
+    def _stock_levels(self, product_ids):
+        # json_each keeps the batch to one query whatever its size, and keeps int/str ids apart
+        rows = self._conn.execute(
+            "SELECT product_id, quantity_in_stock FROM products "
+            "WHERE product_id IN (SELECT value FROM json_each(?))", (json.dumps(list(product_ids)),))
+        return dict(rows.fetchall())
+    
+    def _prices(self, product_ids):
+        rows = self._conn.execute("SELECT product_id, price FROM products WHERE product_id IN "
+                                  "(SELECT value FROM json_each(?))", (json.dumps(list(product_ids)),))
+        return dict(rows.fetchall())
+    
+    def _change_stock(self, deltas):
+        with self._transaction():
+            # Only products with a reorder point can cross it; read their stock before the update
+            watched = self._conn.execute(
+                "SELECT product_id, name, quantity_in_stock, reorder_point FROM products "
+                "WHERE reorder_point IS NOT NULL AND product_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(deltas)),)).fetchall()
+            self._conn.executemany(
+                "UPDATE products SET quantity_in_stock = quantity_in_stock + ? WHERE product_id = ?",
+                [(delta, pid) for pid, delta in deltas.items()])
+        for pid, name, before, reorder_point in watched:
+            level = before + deltas[pid]
+            if level <= reorder_point < before:
+                self._reorder_crossed(pid, name, level, reorder_point)
+        for pid, delta in deltas.items():
+            product = self._views.get(pid)
+            if product is not None:
+                product._quantity_in_stock += delta
+        self._touch(deltas)
+    
+    def _available(self, product):
+        # A view built by another thread may come from a row read before the last sell
+        product._quantity_in_stock = self._conn.execute(
+            "SELECT quantity_in_stock FROM products WHERE product_id = ?", (product._product_id,)).fetchone()[0]
+        return super()._available(product)
+    
+    def close(self):
+        self.close_journal()
+        self._conn.close()
+    
+    def get_product(self, product_id):
+        product = self._views.get(product_id)
+        if product is not None:
+            return product
+        row = self._select("WHERE p.product_id = ?", (product_id,)).fetchone()
+        return None if row is None else self._view(row)
+    
+    def iter_products(self):
+        for row in self._select():
+            yield self._view(row)
+    
+    def list_all_products(self):
+        return list(self.iter_products())
+    
+    def product_count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    
+    def search_by_name(self, name):
+        query = name.lower()
+        join = "JOIN product_names n ON n.rowid = p.rowid"
+        if len(query) < NGRAM_SIZE:
+            # Trigrams can't answer short queries; scan the lowercased names instead
+            rows = self._select(f"{join} WHERE instr(n.name, ?) > 0", (query,))
+        else:
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self._select(f"{join} WHERE product_names MATCH ?", (phrase,))
+        return [self._view(row) for row in rows]
+    
+    def search_by_type(self, product_type):
+        return [self._view(row) for row in self._select("WHERE p.type = ?", (product_type,))]
+    
+    def query(self, predicate):
+        # SQLite's planner picks the index; rows are fetched as the caller iterates
+        where, params = predicate._sql()
+        return (self._view(row) for row in self._select(f"WHERE {where}", params))
+    
+    def query_plan(self, predicate):
+        where, params = predicate._sql()
+        columns = ", ".join(f"p.{field}" for field in SQLITE_FIELDS)
+        plan = self._conn.execute(f"EXPLAIN QUERY PLAN SELECT {columns} FROM products p WHERE {where} "
+                                  f"ORDER BY p.rowid", params).fetchall()
+        return "; ".join(row[-1] for row in plan)
+    
+    def query_page(self, offset=0, limit=50, sort_by=None, descending=False, product_type=None, name=None,
+                   count=True):
+        if sort_by is not None and sort_by not in PAGE_SORT_FIELDS:
+            raise ValueError(f"Can't sort by {sort_by!r}")
+        # The names table is only joined when filtering or sorting by name
+        join = "JOIN product_names n ON n.rowid = p.rowid" if name or sort_by == "name" else ""
+        conditions, params = [], []
+        if name:
+            query = name.lower()
+            if len(query) < NGRAM_SIZE:
+                conditions.append("instr(n.name, ?) > 0")
+                params.append(query)
+            else:
+                conditions.append("product_names MATCH ?")
+                params.append('"' + query.replace('"', '""') + '"')
+        if product_type:
+            conditions.append("p.type = ?")
+            params.append(product_type)
+        where = f"{join} WHERE {' AND '.join(conditions)}" if conditions else join
+        total = self._conn.execute(f"SELECT COUNT(*) FROM products p {where}", params).fetchone()[0] if count else None
+        
+        direction = "DESC" if descending else ""
+        key = {None: None, "name": "n.name", "value": "p.price * p.quantity_in_stock"}.get(sort_by, f"p.{sort_by}")
+        order = f"p.rowid {direction}" if key is None else f"{key} {direction}, p.rowid"
+        rows = self._select(where, params + [limit, offset], order + " LIMIT ? OFFSET ?")
+        return total, [self._view(row) for row in rows]
+    
+    def _first_matches(self, query, limit):
+        # The picker never shows a match count, so skip counting every match
+        return self.query_page(0, limit, name=query or None, count=False)[1]
+    
+    def count_by_type(self, product_type):
+        return self._conn.execute("SELECT COUNT(*) FROM products WHERE type = ?", (product_type,)).fetchone()[0]
+    
+    def value_by_type(self, product_type):
+        return self._conn.execute("SELECT COALESCE(SUM(price * quantity_in_stock), 0) FROM products WHERE type = ?",
+                                  (product_type,)).fetchone()[0]
+    
+    def stock_by_type(self, product_type):
+        return self._conn.execute("SELECT COALESCE(SUM(quantity_in_stock), 0) FROM products WHERE type = ?",
+                                  (product_type,)).fetchone()[0]
+    
+    def total_inventory_value(self):
+        return self._conn.execute("SELECT COALESCE(SUM(price * quantity_in_stock), 0) FROM products").fetchone()[0]
+    
+    def low_stock_products(self, threshold):
+        return [self._view(row) for row in self._select("WHERE p.quantity_in_stock <= ?", (threshold,))]
+    
+    def _set_reorder_point(self, product, reorder_point):
+        self._conn.execute("UPDATE products SET reorder_point = ? WHERE product_id = ?",
+                           (reorder_point, product._product_id))
+        product._reorder_point = reorder_point
+    
+    def reorder_products(self, limit=None):
+        rows = self._select(f"WHERE {SQLITE_DUE}", (-1 if limit is None else limit,), "p.rowid LIMIT ?")
+        return [self._view(row) for row in rows]
+    
+    def reorder_count(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM products p WHERE {SQLITE_DUE}").fetchone()[0]
+    
+    def expired_count(self, today=None):
+        if today is None:
+            today = date.today()
+        return self._conn.execute("SELECT COUNT(*) FROM products WHERE expiry_ordinal < ?",
+                                  (today.toordinal(),)).fetchone()[0]
+    
+    def expired_products(self, today=None):
+        if today is None:
+            today = date.today()
+        rows = self._select("WHERE p.expiry_ordinal < ?", (today.toordinal(),), "p.expiry_ordinal, p.rowid")
+        return [self._view(row) for row in rows]
+    
+    def expiring_within(self, days, today=None):
+        if today is None:
+            today = date.today()
+        start = today.toordinal()
+        rows = self._select("WHERE p.expiry_ordinal BETWEEN ? AND ?", (start, start + days),
+                            "p.expiry_ordinal, p.rowid")
+        return [self._view(row) for row in rows]
+    
+    def _remove_expired(self):
+        today = date.today().toordinal()
+        expired = self._conn.execute("SELECT product_id, name FROM products WHERE expiry_ordinal < ? ORDER BY rowid",
+                                     (today,)).fetchall()
+        with self._transaction():
+            self._conn.execute("DELETE FROM product_names WHERE rowid IN "
+                               "(SELECT rowid FROM products WHERE expiry_ordinal < ?)", (today,))
+            self._conn.execute("DELETE FROM products WHERE expiry_ordinal < ?", (today,))
+        self._touch(product_id for product_id, _ in expired)
+        for product_id, _ in expired:
+            product = self._views.pop(product_id, None)
+            if product is not None:
+                product._inventory = None
+            self._held.pop(product_id, None)
+            self._warehouse_stock.pop(product_id, None)
+            self._log({"op": "remove", "id": product_id})
+        return [name for _, name in expired]
+    
+    def _replace_products(self, products):
+        # One transaction instead of one per product, and none of it if a write fails
+        with self._transaction():
+            super()._replace_products(products)
+    
+    def _import_frames(self, frames, workers):
+        # One transaction, so a failure part-way leaves the table as it was
+        with self._transaction():
+            if self._journal is not None:
+                yield from super()._import_frames(frames, workers)
+                return
+            done = 0
+            for frame in frames:
+                self._insert_frame(frame)
+                done += len(frame)
+                yield done
+    
+    def _insert_frame(self, frame):
+        """Insert a validated import chunk with executemany instead of one upsert per product."""
+        import pandas as pd
+        electronics = frame["type"] == "Electronics"
+        grocery = frame["type"] == "Grocery"
+        clothing = frame["type"] == "Clothing"
+        applies = {"warranty_years": electronics, "brand": electronics, "expiry_date": grocery,
+                   "size": clothing, "material": clothing}
+        applies["reorder_point"] = frame["reorder_point"] != NO_REORDER
+        values = [frame[field].astype(object).where(applies[field], None).tolist() if field in applies
+                  else frame[field].tolist() for field in SQLITE_FIELDS]
+        days = pd.to_datetime(frame["expiry_date"].where(grocery), format="%Y-%m-%d").to_numpy("datetime64[D]")
+        ordinals = pd.Series(days.astype(np.int64) + EPOCH_ORDINAL, index=frame.index)
+        values.append(ordinals.astype(object).where(grocery, None).tolist())
+        self._conn.executemany(
+            f"INSERT INTO products ({', '.join(SQLITE_FIELDS)}, expiry_ordinal) "
+            f"VALUES ({', '.join('?' * (len(SQLITE_FIELDS) + 1))})", zip(*values))
+        self._conn.executemany(
+            "INSERT INTO product_names (rowid, name) VALUES ((SELECT rowid FROM products WHERE product_id = ?), ?)",
+            zip(frame["product_id"].tolist(), (str(name).lower() for name in frame["name"].tolist())))
+        self._touch(frame["product_id"].tolist())
+    
+    def check_consistency(self):
+        """Check the name index and cached views against the products table; return a list of mismatches."""
+        problems = []
+        rows = self._conn.execute("SELECT p.product_id, p.name, n.name, p.quantity_in_stock, p.reorder_point "
+                                  "FROM products p LEFT JOIN product_names n ON n.rowid = p.rowid").fetchall()
+        names = self._conn.execute("SELECT COUNT(*) FROM product_names").fetchone()[0]
+        if names != len(rows):
+            problems.append(f"{names} indexed names for {len(rows)} products")
+        stock = {}
+        for product_id, name, indexed, quantity, reorder_point in rows:
+            stock[product_id] = (quantity, reorder_point)
+            if indexed != str(name).lower():
+                problems.append(f"name index for product {product_id} is out of date")
+        for product_id, product in list(self._views.items()):
+            if product_id not in stock:
+                problems.append(f"view for removed product {product_id} is still cached")
+            elif (product._inventory is not self
+                  or (product._quantity_in_stock, product._reorder_point) != stock[product_id]):
+                problems.append(f"view for product {product_id} is out of sync")
+        return problems
+
+# Available Inventory backends, chosen with the INVENTORY_BACKEND environment variable
+INVENTORY_BACKENDS = {
+    "dict": Inventory,
+    "columnar": ColumnarInventory,
+    "sqlite": SQLiteInventory,
+}
+
+# Shared inventory: one catalog per process instead of one copy per browser session
+class ReadWriteLock:
+    """Any number of readers or one writer. Waiting writers go before new readers.
+    
+    Reads re-enter freely, the writer may re-enter and read, and a reader must not ask to write.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None   # ident of the thread holding the write lock
+        self._writes = 0      # its re-entry depth
+        self._waiting = 0     # writers waiting for the readers to drain
+        self._local = threading.local()
+    
+    @contextmanager
+    def read(self):
+        if self._writer == threading.get_ident():
+            yield
+            return
+        depth = getattr(self._local, "reads", 0)
+        with self._cond:
+            # A nested read must not wait behind a writer that is waiting for this thread's outer read
+            while not depth and (self._writer is not None or self._waiting):
+                self._cond.wait()
+            self._readers += 1
+        self._local.reads = depth + 1
+        try:
+            yield
+        finally:
+            self._local.reads = depth
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if getattr(self._local, "reads", 0):
+                    raise RuntimeError("Can't write while holding a read lock")
+                self._waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting -= 1
+                self._writer = me
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._cond.notify_all()
+
+class SharedInventory:
+    """Thread-safe facade letting every Streamlit session use the same Inventory.
+    
+    Reads share a read lock, so sessions don't queue behind each other; structural changes
+    take it exclusively. Sells and restocks skip it and rely on the Inventory's per-product
+    lock stripes. list_all_products is an immutable snapshot, swapped for a new tuple after
+    each structural change; sessions holding the old one keep a consistent view.
+    """
+    
+    MUTATORS = frozenset({
+        "add_product", "remove_product", "remove_expired_products", "load_from_file", "load_from_files",
+        "import_products", "open_journal", "set_reorder_point",
+    })
+    # Stock-only operations lock per product inside Inventory, so they skip the facade lock;
+    # they don't change which products exist, so the shared listing stays valid
+    CONCURRENT = frozenset({
+        "sell_product", "restock_product", "sell_many", "restock_many", "reserve", "commit_reservation",
+        "release_reservation", "compact_journal",
+    })
+    
+    def __init__(self, inventory):
+        self._inventory = inventory
+        self._lock = ReadWriteLock()
+        self._version = 0
+        self._listing = (None, ())
+    
+    def __getattr__(self, name):
+        attr = getattr(self._inventory, name)
+        if not callable(attr) or name in self.CONCURRENT:
+            return attr
+        
+        if name in self.MUTATORS:
+            def locked(*args, **kwargs):
+                with self._lock.write():
+                    try:
+                        return attr(*args, **kwargs)
+                    finally:
+                        self._version += 1
+        else:
+            def locked(*args, **kwargs):
+                with self._lock.read():
+                    return attr(*args, **kwargs)
+        return locked
+    
+    def list_all_products(self):
+        # The current snapshot needs no lock; it is one tuple, swapped whole
+        version, listing = self._listing
+        if version == self._version:
+            return listing
+        with self._lock.read():
+            version = self._version
+            listing = tuple(self._inventory.list_all_products())
+            self._listing = (version, listing)
+        return listing
+
+def create_inventory():
+    return INVENTORY_BACKENDS[os.environ.get("INVENTORY_BACKEND", "dict")]()
+
+# Instrumentation: off by default, and then the classes carry no wrappers at all
+PERF_BUFFER_SIZE = 10_000
+INSTRUMENTED_METHODS = (
+    "add_product", "remove_product", "search_by_name", "search_by_type", "sell_product", "restock_product",
+    "sell_many", "restock_many", "total_inventory_value", "remove_expired_products", "save_to_file",
+    "load_from_file", "load_from_files", "import_products", "query_page", "find_products", "set_reorder_point",
+    "reorder_products",
+)
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list; None when it is empty."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+class PerfRecorder:
+    """Call counts and a ring buffer of recent timings per operation.
+    
+    enable() wraps INSTRUMENTED_METHODS on every backend class and disable() puts the
+    originals back, so a disabled recorder costs nothing on the hot paths.
+    """
+    
+    def __init__(self, size=PERF_BUFFER_SIZE):
+        self._samples = deque(maxlen=size)
+        self._counts = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patched = []
+    
+    @property
+    def enabled(self):
+        return bool(self._patched)
+    
+    def enable(self):
+        if self._patched:
+            return
+        for cls in {*INVENTORY_BACKENDS.values(), Inventory}:
+            for name in INSTRUMENTED_METHODS:
+                if name in cls.__dict__:
+                    original = cls.__dict__[name]
+                    setattr(cls, name, self.wrap(name, original))
+                    self._patched.append((cls, name, original))
+    
+    def disable(self):
+        while self._patched:
+            cls, name, original = self._patched.pop()
+            setattr(cls, name, original)
+    
+    def wrap(self, name, func):
+        """func, recording each call's duration under name; nested calls of the same name count once."""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            active = self._local.__dict__.setdefault("active", set())
+            if name in active:
+                # e.g. ColumnarInventory.save_to_file delegating to Inventory.save_to_file
+                return func(*args, **kwargs)
+            active.add(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+                active.discard(name)
+        return timed
+    
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples.append((name, seconds))
+            self._counts[name] = self._counts.get(name, 0) + 1
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+    
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+    
+    def stats(self):
+        """One dict per operation: lifetime calls and total seconds, percentiles over the buffered calls."""
+        with self._lock:
+            samples = list(self._samples)
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+        recent = {}
+        for name, seconds in samples:
+            recent.setdefault(name, []).append(seconds)
+        rows = []
+        for name in sorted(counts, key=totals.get, reverse=True):
+            # Calls that already left the buffer still count, but have no percentiles
+            ordered = sorted(seconds * 1000 for seconds in recent.get(name, ()))
+            rows.append({
+                "operation": name,
+                "calls": counts[name],
+                "p50_ms": percentile(ordered, 50),
+                "p99_ms": percentile(ordered, 99),
+                "max_ms": percentile(ordered, 100),
+                "total_s": totals[name],
+            })
+        return rows
+
+PERF = PerfRecorder()
+if os.environ.get("INVENTORY_PERF", "0") == "1":
+    PERF.enable()
@@ -0,0 +1,39 @@
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import inventory_core as core  # noqa: E402
+
+
+@pytest.fixture(params=list(core.INVENTORY_BACKENDS))
+def backend(request):
+    return core.INVENTORY_BACKENDS[request.param]
+
+
+def make_products(n, seed=1, first_id=1):
+    """n products of every type; about a third of the groceries have expired and one in five has a reorder point."""
+    rng = random.Random(seed)
+    for pid in range(first_id, first_id + n):
+        price = round(rng.uniform(1, 500), 2)
+        stock = rng.randint(0, 50)
+        reorder_point = rng.randint(0, 20) if rng.random() < 0.2 else None
+        kind = pid % 3
+        if kind == 0:
+            yield core.Electronics(pid, f"Phone {pid}", price, stock, rng.randint(0, 3), "Nokia", reorder_point)
+        elif kind == 1:
+            expiry = date.today() + timedelta(days=rng.randint(-30, 60))
+            yield core.Grocery(pid, f"Rice {pid}", price, stock, expiry.strftime("%Y-%m-%d"), reorder_point)
+        else:
+            yield core.Clothing(pid, f"Scarf {pid}", price, stock, "M", "Wool", reorder_point)
+
+
+def filled(backend, n=60, seed=1):
+    inventory = backend()
+    for product in make_products(n, seed):
+        inventory.add_product(product)
+    return inventory
@@ -0,0 +1,143 @@
+"""Concurrent sells, restocks and reservations lose no updates and never oversell, on every backend."""
+import sys
+import threading
+
+import pytest
+
+import inventory_core as core
+from conftest import filled
+
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def switch_often():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def hammer(work):
+    """Run work(thread number) on THREADS threads at once; returns their results in thread order."""
+    results = [None] * THREADS
+    start = threading.Barrier(THREADS)
+
+    def run(n):
+        start.wait()
+        results[n] = work(n)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+        assert not thread.is_alive()
+    return results
+
+
+def stocked(backend, units):
+    inventory = filled(backend, n=12)
+    for pid in range(1, 13):
+        inventory.restock_product(pid, units)
+    return inventory, {pid: inventory.get_product(pid)._quantity_in_stock for pid in range(1, 13)}
+
+
+def test_sells_never_oversell(backend):
+    inventory, before = stocked(backend, 100)
+
+    def sell(n):
+        sold = {pid: 0 for pid in before}
+        for _ in range(60):
+            for pid in before:
+                if inventory.sell_product(pid, 1)[0]:
+                    sold[pid] += 1
+        return sold
+
+    results = hammer(sell)
+    for pid, stock in before.items():
+        sold = sum(result[pid] for result in results)
+        assert sold == min(stock, 60 * THREADS)
+        assert inventory.get_product(pid)._quantity_in_stock == stock - sold
+    assert inventory.check_consistency() == []
+
+
+def test_sells_and_restocks_lose_no_updates(backend):
+    inventory, before = stocked(backend, 1000)
+
+    def trade(n):
+        sold = 0
+        for i in range(50):
+            for pid in before:
+                if n % 2:
+                    inventory.restock_product(pid, 2)
+                elif inventory.sell_product(pid, 3)[0]:
+                    sold += 3
+                if i % 10 == 0:
+                    result = inventory.sell_many([(pid, 1)]) if n % 2 else inventory.restock_many([(pid, 1)])
+                    assert result.ok
+        return sold
+
+    results = hammer(trade)
+    restockers = THREADS // 2
+    for pid, stock in before.items():
+        sold = sum(results) // len(before)
+        assert inventory.get_product(pid)._quantity_in_stock == stock + restockers * 50 * 2 - sold
+    assert inventory.check_consistency() == []
+
+
+def test_reservations_hold_units_until_settled(backend):
+    inventory, before = stocked(backend, 0)
+    pid = 1
+    stock = before[pid]
+    held = inventory.reserve(pid, stock - 1)
+    assert inventory.sell_product(pid, 2)[0] is False
+    with pytest.raises(core.InsufficientStockError):
+        inventory.reserve(pid, 2)
+    with pytest.raises(ValueError):
+        inventory.reserve(pid, 0)
+    with pytest.raises(core.ProductNotFoundError):
+        inventory.reserve(999, 1)
+
+    inventory.commit_reservation(held)
+    assert held.state == "committed"
+    assert inventory.get_product(pid)._quantity_in_stock == 1
+    with pytest.raises(ValueError):
+        inventory.commit_reservation(held)
+
+    released = inventory.reserve(pid, 1)
+    inventory.release_reservation(released)
+    assert released.state == "released"
+    assert inventory.sell_product(pid, 1)[0] is True
+
+    gone = inventory.reserve(2, 1)
+    inventory.remove_product(2)
+    with pytest.raises(core.ProductNotFoundError):
+        inventory.commit_reservation(gone)
+    assert gone.state == "released"
+    assert inventory.check_consistency() == []
+
+
+def test_concurrent_reservations_never_overcommit(backend):
+    inventory, before = stocked(backend, 50)
+
+    def reserve(n):
+        committed = 0
+        for _ in range(40):
+            for pid in before:
+                try:
+                    reservation = inventory.reserve(pid, 1)
+                except core.InsufficientStockError:
+                    continue
+                if n % 3:
+                    inventory.commit_reservation(reservation)
+                    committed += 1
+                else:
+                    inventory.release_reservation(reservation)
+        return committed
+
+    committed = sum(hammer(reserve))
+    assert sum(before.values()) - sum(inventory.get_product(pid)._quantity_in_stock for pid in before) == committed
+    assert all(inventory.get_product(pid)._quantity_in_stock >= 0 for pid in before)
+    assert inventory._held == {}
+    assert inventory.check_consistency() == []
@@ -0,0 +1,148 @@
+"""Running totals and indexes stay equal to a full recount after every kind of change, on every backend."""
+import math
+
+import pytest
+
+import inventory_core as core
+from conftest import filled, make_products
+
+
+def recount(inventory):
+    products = inventory.list_all_products()
+    by_type = {ptype: [p for p in products if type(p).__name__ == ptype] for ptype in core.COLUMNAR_TYPES}
+    return {
+        "count": len(products),
+        "value": math.fsum(p.get_total_value() for p in products),
+        "types": {ptype: (len(members), math.fsum(p.get_total_value() for p in members),
+                          sum(p._quantity_in_stock for p in members)) for ptype, members in by_type.items()},
+        "expired": sum(1 for p in products if isinstance(p, core.Grocery) and p.is_expired()),
+        "reorder": sorted(p._product_id for p in products if p.needs_reorder()),
+    }
+
+
+def totals(inventory):
+    return {
+        "count": inventory.product_count(),
+        "value": inventory.total_inventory_value(),
+        "types": {ptype: (inventory.count_by_type(ptype), inventory.value_by_type(ptype),
+                          inventory.stock_by_type(ptype)) for ptype in core.COLUMNAR_TYPES},
+        "expired": inventory.expired_count(),
+        "reorder": sorted(p._product_id for p in inventory.reorder_products()),
+    }
+
+
+def assert_consistent(inventory):
+    assert inventory.check_consistency() == []
+    expected, actual = recount(inventory), totals(inventory)
+    assert actual["value"] == pytest.approx(expected.pop("value"))
+    for ptype, (count, value, stock) in actual.pop("types").items():
+        assert (count, pytest.approx(value), stock) == expected["types"][ptype]
+    del actual["value"], expected["types"]
+    assert actual == expected
+
+
+def test_fresh_inventory(backend):
+    assert_consistent(backend())
+    assert_consistent(filled(backend))
+
+
+def test_sells_and_restocks(backend):
+    inventory = filled(backend)
+    for pid in range(1, 61):
+        inventory.restock_product(pid, pid % 7 + 1)
+        inventory.sell_product(pid, pid % 5 + 1)
+    inventory.sell_product(2, 10_000)  # refused
+    product = inventory.get_product(3)
+    product.sell(1)
+    product.restock(4)
+    assert_consistent(inventory)
+
+
+def test_adds_and_removes(backend):
+    inventory = filled(backend)
+    for pid in range(1, 61, 4):
+        assert inventory.remove_product(pid)
+    assert not inventory.remove_product(9999)
+    for product in make_products(20, seed=2, first_id=100):
+        inventory.add_product(product)
+    with pytest.raises(core.DuplicateProductError):
+        inventory.add_product(core.Clothing(100, "Again", 1.0, 1, "S", "Silk"))
+    assert_consistent(inventory)
+    
+    removed = inventory.remove_expired_products()
+    assert removed
+    assert inventory.expired_count() == 0
+    assert_consistent(inventory)
+
+
+def test_reorder_points(backend):
+    inventory = filled(backend)
+    inventory.set_reorder_point(1, 100)
+    inventory.set_reorder_point(2, None)
+    inventory.sell_product(4, 1)
+    assert_consistent(inventory)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl", core.SNAPSHOT_SUFFIX])
+def test_save_and_load(backend, suffix, tmp_path):
+    inventory = filled(backend)
+    inventory.sell_product(1, 1)
+    filename = str(tmp_path / f"inventory{suffix}")
+    assert inventory.save_to_file(filename)[0]
+    
+    loaded = filled(backend, n=10, seed=3)
+    assert loaded.load_from_file(filename) == (True, "Inventory loaded successfully")
+    assert_consistent(loaded)
+    saved, restored = totals(inventory), totals(loaded)
+    assert restored.pop("value") == pytest.approx(saved.pop("value"))
+    assert restored["count"] == saved["count"] and restored["reorder"] == saved["reorder"]
+    loaded.sell_product(2, 1)
+    loaded.remove_product(3)
+    loaded.add_product(core.Clothing(500, "New", 2.0, 3, "L", "Silk"))
+    assert_consistent(loaded)
+
+
+def test_failed_load_changes_nothing(backend, tmp_path):
+    inventory = filled(backend)
+    before = totals(inventory)
+    bad = tmp_path / "bad.json"
+    bad.write_text('[{"type": "Clothing", "product_id": 1')
+    assert not inventory.load_from_file(str(bad))[0]
+    assert totals(inventory) == before
+    assert_consistent(inventory)
+
+
+def test_batches(backend):
+    inventory = filled(backend)
+    before = totals(inventory)
+    failed = inventory.sell_many([(1, 1), (2, 10_000), (9999, 1)])
+    assert [error.line for error in failed.errors] == [2, 3]
+    assert totals(inventory) == before
+    
+    assert inventory.restock_many([(pid, 3) for pid in range(1, 61)]).errors == []
+    assert inventory.sell_many([(pid, 2) for pid in range(1, 61, 2)] + [(1, 1)]).errors == []
+    assert_consistent(inventory)
+
+
+def test_reservations(backend):
+    inventory = filled(backend)
+    inventory.restock_product(1, 10)
+    held = inventory.reserve(1, 5)
+    released = inventory.reserve(1, 2)
+    inventory.commit_reservation(held)
+    inventory.release_reservation(released)
+    assert_consistent(inventory)
+
+
+def test_import_products(backend, tmp_path):
+    pytest.importorskip("pandas")
+    csv = tmp_path / "catalog.csv"
+    csv.write_text("type,product_id,name,price,quantity_in_stock,warranty_years,brand,expiry_date,size,material,"
+                   "reorder_point\n"
+                   "Electronics,200,Radio,20.5,4,1,Sony,,,,\n"
+                   "Grocery,201,Milk,1.25,30,,,2000-01-01,,,5\n"
+                   "Clothing,202,Coat,80,2,,,,XL,Wool,3\n")
+    inventory = filled(backend)
+    assert inventory.import_products(str(csv)) == 3
+    assert inventory.get_product(202).needs_reorder()
+    assert_consistent(inventory)
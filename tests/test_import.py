@@ -0,0 +1,83 @@
+"""CSV import refuses numbers int64 can't hold exactly, and pool workers give the same result as one process."""
+import pytest
+
+import inventory_core as core
+from conftest import filled
+
+pytest.importorskip("pandas")
+
+HEADER = "type,product_id,name,price,quantity_in_stock,warranty_years,brand,expiry_date,size,material,reorder_point\n"
+
+
+def refused(inventory, tmp_path, rows):
+    csv = tmp_path / "catalog.csv"
+    csv.write_text(HEADER + "".join(rows))
+    before = inventory.product_count()
+    with pytest.raises(core.InvalidDataError) as error:
+        inventory.import_products(str(csv))
+    assert inventory.product_count() == before
+    return str(error.value)
+
+
+def test_numbers_beyond_int64_are_refused(backend, tmp_path):
+    message = refused(filled(backend), tmp_path, [
+        "Clothing,300,Coat,80,2,,,,XL,Wool,\n",
+        "Clothing,1e30,Hat,10,2,,,,M,Felt,\n",
+        "Electronics,301,Radio,20.5,1e25,1,Sony,,,,\n",
+        "Electronics,302,Phone,99,1,1e19,Nokia,,,,\n",
+        "Grocery,303,Milk,1.25,30,,,2000-01-01,,,-9223372036854775809e3\n",
+        "Grocery,304,Bread,2,30,,,2000-01-01,,,1e20\n",
+    ])
+    assert message.startswith("5 invalid row(s).")
+    assert f"Row 2: product_id must be less than {core.IMPORT_INT_LIMIT}" in message
+    assert f"Row 3: quantity_in_stock must be less than {core.IMPORT_INT_LIMIT}" in message
+    assert f"Row 4: warranty_years must be less than {core.IMPORT_INT_LIMIT}" in message
+    assert "Row 5: reorder_point must be blank or a non-negative integer" in message
+    assert f"Row 6: reorder_point must be less than {core.IMPORT_INT_LIMIT}" in message
+
+
+def test_integers_floats_cannot_hold_are_refused(backend, tmp_path):
+    message = refused(backend(), tmp_path, [
+        "Clothing,9007199254740993,Coat,80,2,,,,XL,Wool,\n",
+        "Clothing,1,Hat,10,9007199254740993,,,,M,Felt,\n",
+    ])
+    assert f"Row 1: product_id must be less than {core.IMPORT_INT_LIMIT}" in message
+    assert f"Row 2: quantity_in_stock must be less than {core.IMPORT_INT_LIMIT}" in message
+
+
+def test_the_largest_exact_integers_import(backend, tmp_path):
+    largest = core.IMPORT_INT_LIMIT - 1
+    csv = tmp_path / "catalog.csv"
+    csv.write_text(HEADER + f"Clothing,{largest},Coat,80,{largest},,,,XL,Wool,\n")
+    inventory = backend()
+    assert inventory.import_products(str(csv)) == 1
+    assert inventory.get_product(largest)._quantity_in_stock == largest
+
+
+def test_pools_never_fork_this_process():
+    with core.import_pool(1) as pool:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_pool_import_matches_serial(backend, tmp_path):
+    csv = tmp_path / "catalog.csv"
+    csv.write_text(HEADER + "".join(f"Clothing,{pid},Coat {pid},80,{pid % 9},,,,XL,Wool,{pid % 4 or ''}\n"
+                                    for pid in range(1, 301)))
+    serial, pooled = backend(), backend()
+    assert serial.import_products(str(csv), chunk_size=50, workers=0) == 300
+    assert pooled.import_products(str(csv), chunk_size=50, workers=2) == 300
+    assert [p.to_dict() for p in pooled.list_all_products()] == [p.to_dict() for p in serial.list_all_products()]
+    assert pooled.check_consistency() == []
+
+
+def test_pool_load_matches_serial(backend, tmp_path):
+    files = []
+    for warehouse in range(3):
+        filename = str(tmp_path / f"warehouse{warehouse}.json")
+        assert filled(backend, seed=warehouse).save_to_file(filename)[0]
+        files.append(filename)
+    serial, pooled = backend(), backend()
+    assert serial.load_from_files(files, on_duplicate="sum", workers=1) == 60
+    assert pooled.load_from_files(files, on_duplicate="sum", workers=3) == 60
+    assert [p.to_dict() for p in pooled.list_all_products()] == [p.to_dict() for p in serial.list_all_products()]
+    assert pooled.warehouse_totals() == serial.warehouse_totals()
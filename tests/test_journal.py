@@ -0,0 +1,114 @@
+"""Crash recovery of the change journal: torn tails, replay after a crash, compaction then replay."""
+import inventory_core as core
+
+
+def make_catalog(backend):
+    inventory = backend()
+    inventory.add_product(core.Electronics(1, "Phone", 100.0, 10, 1, "Nokia"))
+    inventory.add_product(core.Grocery(2, "Rice", 5.0, 40, "2099-01-01"))
+    inventory.add_product(core.Clothing(3, "Scarf", 20.0, 7, "M", "Wool"))
+    return inventory
+
+
+def state(inventory):
+    return sorted((p.to_dict() for p in inventory.list_all_products()), key=lambda d: d["product_id"])
+
+
+def crash(inventory):
+    """Stop journaling without compacting, as a killed process would; appends are already flushed."""
+    inventory._journal.close()
+    inventory._journal = None
+
+
+def recover(backend, filename):
+    recovered = backend()
+    success, message = recovered.open_journal(filename)
+    assert success, message
+    return recovered
+
+
+def test_replay_after_crash(backend, tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    inventory = make_catalog(backend)
+    assert inventory.open_journal(filename)[0]
+    inventory.sell_product(1, 3)
+    inventory.restock_product(2, 5)
+    inventory.add_product(core.Clothing(4, "Jacket", 80.0, 2, "L", "Denim"))
+    inventory.remove_product(3)
+    inventory.set_reorder_point(2, 10)
+    expected = state(inventory)
+    crash(inventory)
+
+    recovered = recover(backend, filename)
+    assert state(recovered) == expected
+    assert recovered.check_consistency() == []
+
+
+def test_torn_final_line_is_dropped(backend, tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    inventory = make_catalog(backend)
+    assert inventory.open_journal(filename)[0]
+    inventory.sell_product(1, 2)
+    expected = state(inventory)
+    crash(inventory)
+    log_path = filename + core.JOURNAL_SUFFIX
+    with open(log_path, "a") as f:
+        f.write('{"op": "sell", "id": 1, "qt')
+
+    recovered = recover(backend, filename)
+    assert state(recovered) == expected
+    with open(log_path) as f:
+        assert f.read().endswith("\n")  # the torn record is cut off, so new records start on a fresh line
+    recovered.sell_product(1, 1)
+    crash(recovered)
+    assert recover(backend, filename).get_product(1)._quantity_in_stock == 7
+
+
+def test_corrupt_record_before_the_tail_is_an_error(backend, tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    inventory = make_catalog(backend)
+    assert inventory.open_journal(filename)[0]
+    inventory.sell_product(1, 1)
+    inventory.sell_product(1, 1)
+    crash(inventory)
+    log_path = filename + core.JOURNAL_SUFFIX
+    with open(log_path) as f:
+        lines = f.readlines()
+    lines[1] = "garbage\n"
+    with open(log_path, "w") as f:
+        f.writelines(lines)
+
+    success, message = backend().open_journal(filename)
+    assert not success and "corrupt" in message
+
+
+def test_compaction_then_replay(backend, tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    inventory = make_catalog(backend)
+    assert inventory.open_journal(filename, compact_every=1_000)[0]
+    inventory.sell_product(1, 4)
+    assert inventory.compact_journal()[0]
+    with open(filename + core.JOURNAL_SUFFIX) as f:
+        assert len(f.readlines()) == 1  # only the header is left
+    inventory.restock_product(3, 6)
+    inventory.remove_product(2)
+    expected = state(inventory)
+    crash(inventory)
+
+    recovered = recover(backend, filename)
+    assert state(recovered) == expected
+    assert recovered.check_consistency() == []
+
+
+def test_automatic_compaction_then_replay(backend, tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    inventory = make_catalog(backend)
+    assert inventory.open_journal(filename, compact_every=5)[0]
+    for _ in range(12):
+        inventory.sell_product(2, 1)
+    expected = state(inventory)
+    crash(inventory)
+
+    recovered = recover(backend, filename)
+    assert state(recovered) == expected
+    assert recovered.get_product(2)._quantity_in_stock == 28
@@ -0,0 +1,48 @@
+"""Inventory.query returns what a plain filter returns, in the same order, on every backend."""
+from datetime import date, timedelta
+
+import pytest
+
+import inventory_core as core
+from conftest import filled
+from inventory_core import Field
+
+SOON = date.today() + timedelta(days=30)
+QUERIES = [
+    ((Field("type") == "Electronics") & (Field("warranty_years") >= 2) & (Field("quantity_in_stock") < 30),
+     lambda p: isinstance(p, core.Electronics) and p._warranty_years >= 2 and p._quantity_in_stock < 30),
+    (Field("name").contains("ICE") | (Field("price") > 400),
+     lambda p: "ice" in p._name.lower() or p._price > 400),
+    ((Field("expiry_date") >= date.today()) & (Field("expiry_date") <= SOON),
+     lambda p: isinstance(p, core.Grocery) and date.today() <= p._expiry <= SOON),
+    (Field("material").isin(["Wool", "Silk"]) & Field("product_id").between(10, 80),
+     lambda p: isinstance(p, core.Clothing) and p._material in ("Wool", "Silk") and 10 <= p._product_id <= 80),
+    (~(Field("brand") == "Nokia") & (Field("product_id") != 5),
+     lambda p: not (isinstance(p, core.Electronics) and p._brand == "Nokia") and p._product_id != 5),
+    (Field("product_id") == 7, lambda p: p._product_id == 7),
+]
+
+
+@pytest.mark.parametrize("predicate, check", QUERIES, ids=[repr(predicate) for predicate, _ in QUERIES])
+def test_query_matches_a_filter(backend, predicate, check):
+    inventory = filled(backend, n=150)
+    inventory.remove_product(9)
+    expected = [p._product_id for p in inventory.list_all_products() if check(p)]
+    assert [p._product_id for p in inventory.query(predicate)] == expected
+
+
+@pytest.mark.parametrize("op", ["=", "is", "== 1 or 1 ==", "<> ? OR 1=1 --", "in"])
+def test_unknown_comparisons_are_refused(op):
+    with pytest.raises(ValueError, match="Unknown comparison"):
+        core.Compare("price", op, 1)
+
+
+def test_bad_fields_and_values_are_refused():
+    with pytest.raises(ValueError):
+        Field("__class__")
+    with pytest.raises(ValueError):
+        Field("brand") < "Sony"
+    with pytest.raises(ValueError):
+        Field("price") == "cheap"
+    with pytest.raises(ValueError):
+        Field("quantity").contains("1")
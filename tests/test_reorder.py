@@ -0,0 +1,84 @@
+"""Reorder points: the low-stock list comes from the index, and only crossings raise alerts."""
+import pytest
+
+import inventory_core as core
+from conftest import filled
+
+
+def scan(inventory):
+    return sorted(p._product_id for p in inventory.list_all_products() if p.needs_reorder())
+
+
+def alerted(inventory, after=0):
+    return [(alert.product_id, alert.quantity_in_stock) for alert in inventory.reorder_alerts(after)]
+
+
+def test_low_stock_matches_a_scan(backend):
+    inventory = filled(backend, n=120)
+    assert sorted(p._product_id for p in inventory.reorder_products()) == scan(inventory)
+    assert inventory.reorder_count() == len(scan(inventory))
+    assert [p._product_id for p in inventory.reorder_products(limit=3)] == \
+        [p._product_id for p in inventory.reorder_products()][:3]
+
+
+def test_only_crossings_raise_alerts(backend):
+    inventory = filled(backend)
+    inventory.restock_product(1, 20)
+    stock = inventory.get_product(1)._quantity_in_stock
+    inventory.set_reorder_point(1, stock - 5)
+    seen = inventory.reorder_alerts()[-1].seq if inventory.reorder_alerts() else 0
+
+    inventory.sell_product(1, 4)
+    assert alerted(inventory, seen) == []
+    inventory.sell_product(1, 1)  # at the reorder point
+    assert alerted(inventory, seen) == [(1, stock - 5)]
+    inventory.sell_product(1, 1)  # still below; no new alert
+    inventory.get_product(1).sell(1)
+    assert len(alerted(inventory, seen)) == 1
+    assert 1 in [p._product_id for p in inventory.reorder_products()]
+
+    inventory.restock_product(1, 10)
+    assert 1 not in [p._product_id for p in inventory.reorder_products()]
+    inventory.get_product(1).sell(10)  # crosses again
+    assert alerted(inventory, seen) == [(1, stock - 5), (1, stock - 7)]
+    assert scan(inventory) == sorted(p._product_id for p in inventory.reorder_products())
+
+
+def test_setting_a_point_at_or_above_stock_alerts(backend):
+    inventory = filled(backend)
+    stock = inventory.get_product(2)._quantity_in_stock
+    inventory.set_reorder_point(2, None)
+    seen = inventory.reorder_alerts()[-1].seq if inventory.reorder_alerts() else 0
+    inventory.set_reorder_point(2, stock)
+    assert alerted(inventory, seen) == [(2, stock)]
+    inventory.set_reorder_point(2, stock + 1)  # already low
+    assert len(alerted(inventory, seen)) == 1
+    inventory.set_reorder_point(2, None)
+    assert 2 not in scan(inventory) and inventory.get_product(2)._reorder_point is None
+    assert inventory.check_consistency() == []
+
+
+def test_bad_reorder_points_are_refused(backend):
+    inventory = filled(backend)
+    for bad in (-1, 1.5, "3", True):
+        with pytest.raises(ValueError):
+            inventory.set_reorder_point(1, bad)
+    with pytest.raises(core.ProductNotFoundError):
+        inventory.set_reorder_point(999, 3)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl", ".csv", core.SNAPSHOT_SUFFIX])
+def test_reorder_points_persist(backend, tmp_path, suffix):
+    inventory = filled(backend)
+    inventory.set_reorder_point(3, 7)
+    filename = str(tmp_path / f"catalog{suffix}")
+    ok, message = inventory.save_to_file(filename)
+    assert ok, message
+
+    loaded = backend()
+    ok, message = loaded.load_from_file(filename)
+    assert ok, message
+    points = {p._product_id: p._reorder_point for p in inventory.list_all_products()}
+    assert {p._product_id: p._reorder_point for p in loaded.list_all_products()} == points
+    assert loaded.get_product(3).to_dict()["reorder_point"] == 7
+    assert sorted(p._product_id for p in loaded.reorder_products()) == scan(inventory)
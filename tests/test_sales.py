@@ -0,0 +1,77 @@
+"""The sales ledger records every sale made and keeps its rollups equal to the raw records."""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import inventory_core as core
+from conftest import filled
+
+
+def at(day, hour=12):
+    return datetime.combine(day, datetime.min.time()).timestamp() + hour * 3600
+
+
+def test_sales_reach_the_ledger(backend):
+    inventory = filled(backend)
+    inventory.restock_product(1, 10)
+    inventory.restock_product(2, 10)
+    price1, price2 = inventory.get_product(1)._price, inventory.get_product(2)._price
+
+    assert inventory.sell_product(1, 3)[0]
+    assert inventory.sell_many([(1, 2), (2, 4)]).ok
+    inventory.commit_reservation(inventory.reserve(2, 1))
+    assert inventory.sales.product_sales(1) == (5, pytest.approx(5 * price1))
+    assert inventory.sales.product_sales(2) == (5, pytest.approx(5 * price2))
+    assert len(inventory.sales) == 4
+
+    today = inventory.sales.daily(1)[0]
+    assert today[0] == date.today() and today[1] == 10
+    assert today[2] == pytest.approx(5 * price1 + 5 * price2)
+    assert [(pid, units) for _, pid, units, _ in inventory.sales.recent(2)] == [(2, 1), (2, 4)]
+
+
+def test_refused_sales_are_not_recorded(backend):
+    inventory = filled(backend)
+    stock = inventory.get_product(1)._quantity_in_stock
+    assert not inventory.sell_product(1, stock + 1)[0]
+    assert not inventory.sell_product(999, 1)[0]
+    assert not inventory.sell_many([(1, 1), (2, stock + 10_000)]).ok
+    inventory.release_reservation(inventory.reserve(3, 1))
+    inventory.restock_product(1, 5)
+    assert len(inventory.sales) == 0
+    assert inventory.sales.daily(1)[0][1:] == (0, 0.0)
+    assert inventory.sales.top_products() == []
+
+
+def test_rollups_match_the_records():
+    ledger = core.SalesLedger(capacity=1000, days=30)
+    today = date.today()
+    expected = {}
+    for n in range(300):
+        day = today - timedelta(days=n % 20)
+        ledger.record(n % 7, n % 5 + 1, 2.5, at(day, n % 24))
+        units, revenue = expected.get(day, (0, 0.0))
+        expected[day] = (units + n % 5 + 1, revenue + (n % 5 + 1) * 2.5)
+    assert {day: (units, revenue) for day, units, revenue in ledger.daily(20, today)} == \
+        {day: (units, pytest.approx(revenue)) for day, (units, revenue) in expected.items()}
+    assert sum(units for _, units, _ in ledger.monthly()) == sum(units for units, _ in expected.values())
+
+    top = ledger.top_products(3, by="units")
+    totals = sorted(((sum(n % 5 + 1 for n in range(300) if n % 7 == pid), pid) for pid in range(7)), reverse=True)
+    assert [units for _, units, _ in top] == [units for units, _ in totals[:3]]
+    with pytest.raises(ValueError):
+        ledger.top_products(by="profit")
+
+
+def test_memory_stays_bounded():
+    ledger = core.SalesLedger(capacity=5, days=3)
+    today = date.today()
+    for n in range(20):
+        ledger.record(n, 1, 1.0, at(today - timedelta(days=19 - n)))
+    assert len(ledger) == 5
+    assert [pid for _, pid, _, _ in ledger.recent()] == [19, 18, 17, 16, 15]
+
+    # Days older than the window fold into their months, and no sale is lost from the rollups
+    assert len(ledger._daily) <= 3
+    assert sum(units for _, units, _ in ledger.monthly()) == 20
+    assert sum(ledger.product_sales(n)[0] for n in range(20)) == 20
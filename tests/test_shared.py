@@ -0,0 +1,73 @@
+"""SharedInventory lets sessions read side by side and hands them immutable listings."""
+import threading
+
+import inventory_core as core
+from conftest import filled, make_products
+
+
+class Gate:
+    """Stands in for an Inventory; its read waits until `parties` callers are inside at once."""
+
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties, timeout=5)
+        self.writing = threading.Event()
+
+    def wait_for_readers(self):
+        self.barrier.wait()
+        return not self.writing.is_set()
+
+    def add_product(self, product):
+        self.writing.set()
+
+
+def run(threads):
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+        assert not thread.is_alive()
+
+
+def test_readers_do_not_queue_behind_each_other():
+    shared = core.SharedInventory(Gate(4))
+    results = []
+    run([threading.Thread(target=lambda: results.append(shared.wait_for_readers())) for _ in range(4)])
+    assert results == [True] * 4  # a single lock would have left the barrier waiting forever
+
+
+def test_writer_waits_for_readers():
+    lock = core.ReadWriteLock()
+    order = []
+    inside = threading.Event()
+
+    def reader():
+        with lock.read():
+            inside.set()
+            with lock.read():  # re-entering while a writer waits must not deadlock
+                threading.Event().wait(0.1)
+            order.append("read")
+
+    def writer():
+        inside.wait(5)
+        with lock.write():
+            with lock.write(), lock.read():
+                order.append("write")
+
+    run([threading.Thread(target=reader), threading.Thread(target=writer)])
+    assert order == ["read", "write"]
+
+
+def test_listing_is_an_immutable_snapshot(backend):
+    shared = core.SharedInventory(filled(backend))
+    listing = shared.list_all_products()
+    assert isinstance(listing, tuple) and len(listing) == 60
+    assert shared.list_all_products() is listing
+    shared.sell_product(1, 1)
+    assert shared.list_all_products() is listing  # stock changes don't change the membership
+
+    shared.add_product(next(make_products(1, first_id=61)))
+    shared.remove_product(2)
+    current = shared.list_all_products()
+    assert len(listing) == 60 and len(current) == 60
+    assert {p._product_id for p in current} == set(range(1, 62)) - {2}
+    assert shared.check_consistency() == []
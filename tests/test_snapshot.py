@@ -0,0 +1,63 @@
+"""Binary snapshots: saving over the file a ColumnarInventory is currently mapped from."""
+import inventory_core as core
+from conftest import make_products
+
+
+def opened(filename, n=3000):
+    inventory = core.ColumnarInventory()
+    for product in make_products(n):
+        inventory.add_product(product)
+    assert inventory.save_to_file(filename)[0]
+    mapped = core.ColumnarInventory()
+    assert mapped.load_from_file(filename)[0]
+    return mapped
+
+
+def state(inventory):
+    return [p.to_dict() for p in inventory.list_all_products()]
+
+
+def test_save_over_the_open_snapshot(tmp_path):
+    filename = str(tmp_path / "inventory.invsnap")
+    inventory = opened(filename)
+    inventory.remove_product(5)
+    inventory.sell_product(8, 1)
+    expected = state(inventory)
+    
+    assert inventory.save_to_file(filename)[0]
+    assert inventory.get_product(7)._product_id == 7
+    assert inventory.check_consistency() == []
+    assert state(inventory) == expected
+    
+    reopened = core.ColumnarInventory()
+    assert reopened.load_from_file(filename)[0]
+    assert state(reopened) == expected
+
+
+def test_save_over_the_open_snapshot_after_many_removals(tmp_path):
+    filename = str(tmp_path / "inventory.invsnap")
+    inventory = opened(filename)
+    for pid in range(1, 3001, 2):
+        inventory.remove_product(pid)
+    inventory.add_product(core.Clothing(9000, "Coat", 80.0, 2, "XL", "Wool"))
+    expected = state(inventory)
+    
+    for _ in range(2):
+        assert inventory.save_to_file(filename)[0]
+        inventory.restock_product(2, 1)
+        expected[0]["quantity_in_stock"] += 1
+    assert inventory.check_consistency() == []
+    assert state(inventory) == expected
+
+
+def test_save_over_leaves_other_open_instances_intact(tmp_path):
+    filename = str(tmp_path / "inventory.invsnap")
+    reader = opened(filename)
+    writer = core.ColumnarInventory()
+    assert writer.load_from_file(filename)[0]
+    expected = state(reader)
+    
+    writer.remove_product(1)
+    assert writer.save_to_file(filename)[0]
+    assert state(reader) == expected
+    assert reader.check_consistency() == []
@@ -0,0 +1,68 @@
+"""Every change bumps the inventory version and the versions of the products it touched, and no others."""
+import pytest
+
+from conftest import filled, make_products
+
+
+def versions(inventory, product_ids=range(1, 61)):
+    return {pid: inventory.product_version(pid) for pid in product_ids}
+
+
+def bumped(inventory, change):
+    """The products whose version changed, after checking the inventory version grew past all of them."""
+    before, version = versions(inventory), inventory.version()
+    change()
+    after = versions(inventory)
+    assert inventory.version() > version
+    assert all(v <= inventory.version() for v in after.values())
+    return sorted(pid for pid in before if after[pid] != before[pid])
+
+
+def test_stock_changes_bump_their_product(backend):
+    inventory = filled(backend)
+    inventory.restock_product(1, 20)
+    inventory.restock_product(2, 20)
+    assert bumped(inventory, lambda: inventory.sell_product(1, 1)) == [1]
+    assert bumped(inventory, lambda: inventory.restock_product(2, 1)) == [2]
+    assert bumped(inventory, lambda: inventory.get_product(3).restock(1)) == [3]
+    assert bumped(inventory, lambda: inventory.get_product(1).sell(1)) == [1]
+    assert bumped(inventory, lambda: inventory.sell_many([(1, 1), (2, 1)])) == [1, 2]
+    assert bumped(inventory, lambda: inventory.restock_many([(4, 1), (5, 1)])) == [4, 5]
+    assert bumped(inventory, lambda: inventory.commit_reservation(inventory.reserve(2, 1))) == [2]
+
+
+def test_refused_changes_bump_nothing(backend):
+    inventory = filled(backend)
+    before, version = versions(inventory), inventory.version()
+    inventory.sell_product(1, 10_000)
+    inventory.get_product(1).sell(10_000)
+    inventory.restock_product(1, 0)
+    inventory.sell_many([(1, 1), (2, 10_000)])
+    assert versions(inventory) == before and inventory.version() == version
+
+
+def test_catalog_changes_bump_their_product(backend):
+    inventory = filled(backend)
+    assert bumped(inventory, lambda: inventory.set_reorder_point(6, 3)) == [6]
+    assert bumped(inventory, lambda: inventory.remove_product(7)) == [7]
+    product = next(make_products(1, seed=5, first_id=7))
+    assert bumped(inventory, lambda: inventory.add_product(product)) == [7]
+
+
+def test_bulk_changes_bump_every_product(backend, tmp_path):
+    inventory = filled(backend)
+    filename = str(tmp_path / "catalog.json")
+    assert inventory.save_to_file(filename)[0]
+    assert bumped(inventory, lambda: inventory.load_from_file(filename)) == list(range(1, 61))
+
+
+def test_imports_bump_only_the_new_products(backend, tmp_path):
+    pytest.importorskip("pandas")
+    csv = tmp_path / "catalog.csv"
+    csv.write_text("type,product_id,name,price,quantity_in_stock,warranty_years,brand,expiry_date,size,material,"
+                   "reorder_point\n"
+                   "Clothing,61,Coat,80,2,,,,XL,Wool,\n")
+    inventory = filled(backend)
+    before = inventory.product_version(61)
+    assert bumped(inventory, lambda: inventory.import_products(str(csv))) == []
+    assert inventory.product_version(61) > before